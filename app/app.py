@@ -14,6 +14,19 @@ from app.routes.metas import router as metas_router
 from app.routes.ayuda import router as ayuda_router
 from app.routes.categorias import router as categorias_router
 from app.routes.logros import router as logros_router       # ¡AQUÍ ESTABA FALTANDO!
+from app.routes.sync import router as sync_router
+from app.routes.notificaciones import router as notificaciones_router
+from app.routes.fotos import router as fotos_router
+from app.routes.metricas import router as metricas_router, MiddlewareMetricas, instrumentar_threadpool, registrar_servicio
+from app.routes import password_executor, miniaturas
+from app.routes.catalogo import catalogo
+from app.routes.recordatorios import programador
+from app.routes.correos import repartidor
+from app.routes.eventos import bus
+from app.routes import motor_logros  # noqa: F401  (suscribe las reglas de logros al bus)
+from app.routes.progreso_metas import renovador
+from app.routes.auth_cache import cache_usuarios
+from app.routes.limitador import limitador
 
 # Crear la app
 app = FastAPI(
@@ -34,6 +47,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Métricas (GET /metrics): la más externa, mide también CORS
+app.add_middleware(MiddlewareMetricas)
 
 # === INCLUIR TODOS LOS ROUTERS (sin duplicados) ===
 app.include_router(auth_router)
@@ -46,12 +61,48 @@ app.include_router(metas_router)
 app.include_router(ayuda_router)
 app.include_router(categorias_router)
 app.include_router(logros_router)       # ¡AHORA SÍ APARECE!
+app.include_router(sync_router)
+app.include_router(notificaciones_router)
+app.include_router(fotos_router)
+app.include_router(metricas_router)
+
+# Estadísticas de los servicios en /metrics
+registrar_servicio("recordatorios", programador.estadisticas)
+registrar_servicio("correos", repartidor.estadisticas)
+registrar_servicio("eventos", bus.estadisticas)
+registrar_servicio("metas_renovacion", renovador.estadisticas)
+registrar_servicio("miniaturas", miniaturas.estadisticas)
+registrar_servicio("password", password_executor.estadisticas)
+registrar_servicio("cache_usuarios", cache_usuarios.estadisticas)
+registrar_servicio("limites", limitador.estadisticas)
 
 # Crear carpeta database al iniciar
 @app.on_event("startup")
 def startup():
     os.makedirs("app/database", exist_ok=True)
     print("Carpeta 'database' asegurada")
+    catalogo.cargar()
+
+# Programador de recordatorios, repartidor de correos, bus de eventos y renovación de metas: necesitan el loop corriendo
+@app.on_event("startup")
+async def iniciar_tareas_de_fondo():
+    instrumentar_threadpool()
+    programador.iniciar()
+    repartidor.iniciar()
+    bus.iniciar()
+    renovador.iniciar()
+
+@app.on_event("shutdown")
+async def detener_tareas_de_fondo():
+    await programador.detener()
+    await repartidor.detener()
+    await renovador.detener()
+    await bus.detener()
+
+@app.on_event("shutdown")
+def shutdown():
+    password_executor.cerrar()
+    miniaturas.cerrar()
 
 # Ruta raíz
 @app.get("/")
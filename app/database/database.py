@@ -1,16 +1,20 @@
 # app/database/database.py
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from pathlib import Path
+from app.database.migraciones import aplicar_migraciones
 
 # RUTA BASE CORREGIDA
 BASE_DIR = Path(__file__).resolve().parent.parent  # → TimeWise-API/
-DB_PATH = BASE_DIR / "database" / "timewise.db"
+# DB_PATH=... usa otro archivo (las pruebas crean uno temporal)
+DB_PATH = Path(os.getenv("DB_PATH") or BASE_DIR / "database" / "timewise.db")
 SQL_FILE = BASE_DIR / "database" / "create-timewise.sql"  # ← CORREGIDO
 
 # Crear directorio
-DB_PATH.parent.mkdir(exist_ok=True)
+DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 # Solo crear si no existe
 if not DB_PATH.exists():
@@ -24,16 +28,96 @@ if not DB_PATH.exists():
 else:
     print(f"Base de datos ya existe: {DB_PATH} → Datos preservados")
 
+# Aplicar migraciones pendientes (índices, cambios de esquema...)
+aplicar_migraciones(DB_PATH)
+
+# ==================== PERFIL DEL MOTOR ====================
+# DB_PROFILE=produccion (por defecto) → WAL: los lectores no se bloquean con los escritores
+# DB_PROFILE=desarrollo → comportamiento clásico de SQLite (journal DELETE)
+DB_PROFILE = os.getenv("DB_PROFILE", "produccion").lower()
+
+PERFILES = {
+    "desarrollo": {
+        "pragmas": {
+            "journal_mode": "DELETE",
+            "busy_timeout": 5000,
+        },
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "produccion": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",           # seguro con WAL, un fsync por checkpoint
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),  # negativo = KiB
+            "temp_store": "MEMORY",
+        },
+        # Uvicorn atiende los endpoints síncronos con hasta 40 hilos de AnyIO
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "20")),
+    },
+}
+
+if DB_PROFILE not in PERFILES:
+    raise ValueError(f"DB_PROFILE inválido: {DB_PROFILE}. Usa: {', '.join(PERFILES)}")
+PERFIL = PERFILES[DB_PROFILE]
+
 # Motor SQLAlchemy
 engine = create_engine(
     f"sqlite:///{DB_PATH}",
-    connect_args={"check_same_thread": False}
+    connect_args={
+        "check_same_thread": False,
+        "timeout": PERFIL["pragmas"]["busy_timeout"] / 1000,
+    },
+    poolclass=QueuePool,
+    pool_size=PERFIL["pool_size"],
+    max_overflow=PERFIL["max_overflow"],
+    pool_timeout=30,
+)
+
+
+# Motor asíncrono (aiosqlite) para los endpoints `async def` más usados.
+# Convive con el síncrono mientras se migran el resto de rutas.
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{DB_PATH}",
+    connect_args={"timeout": PERFIL["pragmas"]["busy_timeout"] / 1000},
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=PERFIL["pool_size"],
+    max_overflow=PERFIL["max_overflow"],
+    pool_timeout=30,
 )
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def aplicar_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for nombre, valor in PERFIL["pragmas"].items():
+        cursor.execute(f"PRAGMA {nombre} = {valor}")
+    cursor.close()
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def registrar_funciones(dbapi_connection, connection_record):
+    # lower() y NOCASE de SQLite solo pliegan ASCII: 'Á' no es 'á' sin esto
+    dbapi_connection.create_function(
+        "minusculas", 1, lambda s: s.lower() if isinstance(s, str) else s, deterministic=True
+    )
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
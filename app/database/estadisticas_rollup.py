@@ -0,0 +1,173 @@
+# app/database/estadisticas_rollup.py
+"""
+Rollups de estadísticas en la tabla `Estadisticas`.
+
+Cada fila es un acumulado por (usuario, categoría, periodo, fecha_inicio):
+  - tareas_completadas: tareas en estado 'completada' cuya fecha cae en el bucket
+  - tiempo_invertido:   SEGUNDOS de Cronometros de esas tareas
+Los buckets son semanal (lunes), mensual (día 1), anual (1 de enero) y
+'todo' (fecha fija FECHA_TODO). `productividad` se calcula al leer.
+
+Se mantienen de forma incremental desde tareas.py (cambios de estado,
+borrados) y al cerrar un cronómetro. Para reconstruir o verificar:
+
+    python -m app.database.estadisticas_rollup reconstruir
+    python -m app.database.estadisticas_rollup verificar
+"""
+import sys
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PERIODOS = ("semanal", "mensual", "anual", "todo")
+FECHA_TODO = date(1970, 1, 1)
+
+# Recalculo completo desde Tareas + Cronometros (mismo formato que la tabla)
+SQL_RECALCULO = """
+    SELECT t.id_usuario,
+           COALESCE(t.id_categoria, 0) AS id_categoria,
+           p.periodo,
+           CASE p.periodo
+               WHEN 'semanal' THEN date(t.fecha, 'weekday 0', '-6 days')
+               WHEN 'mensual' THEN date(t.fecha, 'start of month')
+               WHEN 'anual'   THEN date(t.fecha, 'start of year')
+               ELSE '1970-01-01'
+           END AS fecha_inicio,
+           COUNT(*) AS tareas_completadas,
+           COALESCE(SUM(c.segundos), 0) AS tiempo_invertido
+    FROM "Tareas" t
+    CROSS JOIN (SELECT 'semanal' AS periodo UNION ALL SELECT 'mensual'
+                UNION ALL SELECT 'anual' UNION ALL SELECT 'todo') p
+    LEFT JOIN (SELECT id_tarea, SUM(duracion_segundos) AS segundos
+               FROM "Cronometros" WHERE id_tarea IS NOT NULL
+               GROUP BY id_tarea) c ON c.id_tarea = t.id_tarea
+    WHERE t.estado = 'completada' AND t.fecha IS NOT NULL
+    GROUP BY t.id_usuario, COALESCE(t.id_categoria, 0), p.periodo, fecha_inicio
+"""
+
+_SQL_UPSERT = text("""
+    INSERT INTO "Estadisticas"
+        (id_usuario, id_categoria, periodo, fecha_inicio, tareas_completadas, tiempo_invertido, productividad)
+    VALUES (:id_usuario, :id_categoria, :periodo, :fecha_inicio, :tareas, :segundos, 0)
+    ON CONFLICT (id_usuario, id_categoria, periodo, fecha_inicio) DO UPDATE SET
+        tareas_completadas = tareas_completadas + excluded.tareas_completadas,
+        tiempo_invertido = tiempo_invertido + excluded.tiempo_invertido
+""")
+
+
+def inicio_bucket(periodo: str, fecha: date) -> date:
+    if periodo == "semanal":
+        return fecha - timedelta(days=fecha.weekday())
+    if periodo == "mensual":
+        return fecha.replace(day=1)
+    if periodo == "anual":
+        return fecha.replace(month=1, day=1)
+    return FECHA_TODO
+
+
+def segundos_de_tarea(db: Session, id_tarea: int) -> int:
+    return db.execute(
+        text('SELECT COALESCE(SUM(duracion_segundos), 0) FROM "Cronometros" WHERE id_tarea = :id'),
+        {"id": id_tarea},
+    ).scalar()
+
+
+def aplicar_delta(db: Session, id_usuario: int, id_categoria: Optional[int], fecha: date,
+                  tareas: int, segundos: int):
+    """Suma (o resta) en los 4 buckets de la fecha. No hace commit."""
+    if fecha is None or (tareas == 0 and segundos == 0):
+        return
+    db.execute(_SQL_UPSERT, [
+        {
+            "id_usuario": id_usuario,
+            "id_categoria": id_categoria or 0,
+            "periodo": periodo,
+            "fecha_inicio": inicio_bucket(periodo, fecha).isoformat(),
+            "tareas": tareas,
+            "segundos": segundos,
+        }
+        for periodo in PERIODOS
+    ])
+
+
+def registrar_cambio_tarea(db: Session, id_tarea: int, antes: Optional[tuple], despues: Optional[tuple]):
+    """
+    Ajusta los rollups cuando una tarea cambia. `antes`/`despues` son
+    (id_usuario, id_categoria, fecha, estado) o None si la tarea no existía / se borró.
+    Llamar antes del commit, en la misma transacción que el cambio.
+    """
+    completada_antes = antes is not None and antes[3] == "completada"
+    completada_despues = despues is not None and despues[3] == "completada"
+    if not completada_antes and not completada_despues:
+        return
+    if completada_antes and completada_despues and antes[:3] == despues[:3]:
+        return
+
+    segundos = segundos_de_tarea(db, id_tarea)
+    if completada_antes:
+        aplicar_delta(db, antes[0], antes[1], antes[2], -1, -segundos)
+    if completada_despues:
+        aplicar_delta(db, despues[0], despues[1], despues[2], 1, segundos)
+
+
+def registrar_cronometro_cerrado(db: Session, id_tarea: Optional[int], duracion_segundos: int):
+    """Suma la duración de un cronómetro recién cerrado si su tarea ya está completada."""
+    if not id_tarea or not duracion_segundos:
+        return
+    fila = db.execute(
+        text('SELECT id_usuario, id_categoria, fecha, estado FROM "Tareas" WHERE id_tarea = :id'),
+        {"id": id_tarea},
+    ).first()
+    if fila and fila.estado == "completada":
+        aplicar_delta(db, fila.id_usuario, fila.id_categoria, date.fromisoformat(str(fila.fecha)), 0, duracion_segundos)
+
+
+def reconstruir(db: Session):
+    """Borra y recalcula todos los rollups (backfill)."""
+    db.execute(text('DELETE FROM "Estadisticas"'))
+    db.execute(text(f"""
+        INSERT INTO "Estadisticas"
+            (id_usuario, id_categoria, periodo, fecha_inicio, tareas_completadas, tiempo_invertido, productividad)
+        SELECT id_usuario, id_categoria, periodo, fecha_inicio, tareas_completadas, tiempo_invertido, 0
+        FROM ({SQL_RECALCULO})
+    """))
+    db.commit()
+
+
+def verificar(db: Session) -> list:
+    """
+    Compara los rollups con un recálculo completo.
+    Retorna las diferencias como (origen, fila); lista vacía = consistente.
+    Los buckets en cero cuentan como inexistentes.
+    """
+    tabla = """
+        SELECT id_usuario, id_categoria, periodo, fecha_inicio, tareas_completadas, tiempo_invertido
+        FROM "Estadisticas" WHERE tareas_completadas != 0 OR tiempo_invertido != 0
+    """
+    sobran = db.execute(text(f"{tabla} EXCEPT SELECT * FROM ({SQL_RECALCULO})")).all()
+    faltan = db.execute(text(f"SELECT * FROM ({SQL_RECALCULO}) EXCEPT {tabla}")).all()
+    return [("rollup", tuple(f)) for f in sobran] + [("recalculo", tuple(f)) for f in faltan]
+
+
+if __name__ == "__main__":
+    from app.database.database import SessionLocal
+
+    comando = sys.argv[1] if len(sys.argv) > 1 else "verificar"
+    db = SessionLocal()
+    try:
+        if comando == "reconstruir":
+            reconstruir(db)
+            print("Rollups de estadísticas reconstruidos")
+        elif comando == "verificar":
+            diferencias = verificar(db)
+            for origen, fila in diferencias:
+                print(f"[{origen}] {fila}")
+            print("Rollups consistentes" if not diferencias else f"{len(diferencias)} diferencias")
+            sys.exit(1 if diferencias else 0)
+        else:
+            print("Uso: python -m app.database.estadisticas_rollup [reconstruir|verificar]")
+            sys.exit(2)
+    finally:
+        db.close()
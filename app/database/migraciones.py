@@ -0,0 +1,450 @@
+# app/database/migraciones.py
+"""
+Migraciones versionadas del esquema SQLite.
+
+`create-timewise.sql` solo crea la base la primera vez; los cambios
+posteriores del esquema van aquí como migraciones numeradas. La versión
+aplicada se guarda en `PRAGMA user_version` y, al arrancar, se ejecutan en
+orden las pendientes, cada una en su propia transacción.
+
+Uso manual:  python -m app.database.migraciones
+"""
+import sqlite3
+from pathlib import Path
+
+# (versión, nombre, SQL) → NUNCA modificar una migración ya publicada; agregar una nueva
+MIGRACIONES = [
+    (1, "indices_compuestos", """
+        -- Listados y filtros de tareas: WHERE id_usuario = ? ORDER BY fecha, hora, id_tarea
+        CREATE INDEX IF NOT EXISTS ix_tareas_usuario_fecha_hora
+            ON "Tareas"(id_usuario, fecha, hora);
+        -- Filtro por estado (estadísticas de completadas, /tareas/filtrar?estado=)
+        CREATE INDEX IF NOT EXISTS ix_tareas_usuario_estado_fecha
+            ON "Tareas"(id_usuario, estado, fecha);
+        -- Filtro por categoría (/tareas?categoria=)
+        CREATE INDEX IF NOT EXISTS ix_tareas_usuario_categoria_fecha
+            ON "Tareas"(id_usuario, id_categoria, fecha, hora);
+        CREATE INDEX IF NOT EXISTS ix_metas_usuario
+            ON "Metas"(id_usuario);
+        CREATE INDEX IF NOT EXISTS ix_logros_usuario_fecha
+            ON "logros"(id_usuario, fecha_creacion);
+        CREATE INDEX IF NOT EXISTS ix_cronometros_tarea
+            ON "Cronometros"(id_tarea);
+        CREATE INDEX IF NOT EXISTS ix_cronometros_usuario_inicio
+            ON "Cronometros"(id_usuario, inicio);
+        CREATE INDEX IF NOT EXISTS ix_estadisticas_usuario_periodo
+            ON "Estadisticas"(id_usuario, periodo, fecha_inicio);
+        -- /auth/reset-password busca por token
+        CREATE INDEX IF NOT EXISTS ix_usuario_token_reset
+            ON "Usuario"(token_reset);
+    """),
+    (2, "estadisticas_rollup", """
+        -- Estadisticas pasa a ser una tabla de rollups (ver estadisticas_rollup.py):
+        -- se descartan las filas de ejemplo y se recalcula desde Tareas + Cronometros
+        DELETE FROM "Estadisticas";
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_estadisticas_bucket
+            ON "Estadisticas"(id_usuario, id_categoria, periodo, fecha_inicio);
+        INSERT INTO "Estadisticas"
+            (id_usuario, id_categoria, periodo, fecha_inicio, tareas_completadas, tiempo_invertido, productividad)
+        SELECT t.id_usuario,
+               COALESCE(t.id_categoria, 0),
+               p.periodo,
+               CASE p.periodo
+                   WHEN 'semanal' THEN date(t.fecha, 'weekday 0', '-6 days')
+                   WHEN 'mensual' THEN date(t.fecha, 'start of month')
+                   WHEN 'anual'   THEN date(t.fecha, 'start of year')
+                   ELSE '1970-01-01'
+               END AS bucket,
+               COUNT(*),
+               COALESCE(SUM(c.segundos), 0),
+               0
+        FROM "Tareas" t
+        CROSS JOIN (SELECT 'semanal' AS periodo UNION ALL SELECT 'mensual'
+                    UNION ALL SELECT 'anual' UNION ALL SELECT 'todo') p
+        LEFT JOIN (SELECT id_tarea, SUM(duracion_segundos) AS segundos
+                   FROM "Cronometros" WHERE id_tarea IS NOT NULL
+                   GROUP BY id_tarea) c ON c.id_tarea = t.id_tarea
+        WHERE t.estado = 'completada' AND t.fecha IS NOT NULL
+        GROUP BY t.id_usuario, COALESCE(t.id_categoria, 0), p.periodo, bucket;
+    """),
+    (3, "catalogo_version", """
+        -- Versión del catálogo (categorías y modos): cada worker la compara para
+        -- saber si su caché en memoria quedó vieja. Los triggers cubren cualquier escritura.
+        CREATE TABLE IF NOT EXISTS "Catalogo_version" (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO "Catalogo_version" (id, version) VALUES (1, 0);
+        CREATE TRIGGER IF NOT EXISTS tr_categorias_version_ins AFTER INSERT ON "Tipos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS tr_categorias_version_upd AFTER UPDATE ON "Tipos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS tr_categorias_version_del AFTER DELETE ON "Tipos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_version_ins AFTER INSERT ON "Modos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_version_upd AFTER UPDATE ON "Modos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_version_del AFTER DELETE ON "Modos_de_tareas"
+        BEGIN UPDATE "Catalogo_version" SET version = version + 1 WHERE id = 1; END;
+    """),
+    (4, "versiones_coleccion", """
+        -- Sello de versión por (usuario, colección). Cualquier escritura lo incrementa
+        -- (triggers), y los listados responden 304 comparándolo con If-None-Match.
+        CREATE TABLE IF NOT EXISTS "Versiones_coleccion" (
+            id_usuario INTEGER NOT NULL,
+            coleccion TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_usuario, coleccion)
+        ) WITHOUT ROWID;
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_vc_ins AFTER INSERT ON "Tareas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'tareas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_vc_upd AFTER UPDATE ON "Tareas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'tareas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_vc_del AFTER DELETE ON "Tareas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (OLD.id_usuario, 'tareas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_metas_vc_ins AFTER INSERT ON "Metas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'metas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_metas_vc_upd AFTER UPDATE ON "Metas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'metas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_metas_vc_del AFTER DELETE ON "Metas"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (OLD.id_usuario, 'metas', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_logros_vc_ins AFTER INSERT ON "logros"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'logros', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_logros_vc_upd AFTER UPDATE ON "logros"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'logros', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_logros_vc_del AFTER DELETE ON "logros"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (OLD.id_usuario, 'logros', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_vc_ins AFTER INSERT ON "Usuario_Modos"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'modos', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_vc_upd AFTER UPDATE ON "Usuario_Modos"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (NEW.id_usuario, 'modos', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_modos_vc_del AFTER DELETE ON "Usuario_Modos"
+        BEGIN
+            INSERT INTO "Versiones_coleccion" (id_usuario, coleccion, version) VALUES (OLD.id_usuario, 'modos', 1)
+            ON CONFLICT (id_usuario, coleccion) DO UPDATE SET version = version + 1;
+        END;
+    """),
+    (5, "secuencia_sync", """
+        -- Secuencia global de cambios para /sync: cada INSERT/UPDATE sella la fila
+        -- con el siguiente valor y cada DELETE deja una lápida con el suyo.
+        CREATE TABLE IF NOT EXISTS "Sync_secuencia" (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL DEFAULT 0,
+            -- lápidas con seq <= purgado_hasta ya se borraron (ver sync_cambios.py)
+            purgado_hasta INTEGER NOT NULL DEFAULT 0
+        );
+        -- Las filas existentes quedan en seq 1: un cliente con since=0 las recibe todas
+        INSERT OR IGNORE INTO "Sync_secuencia" (id, seq) VALUES (1, 1);
+        CREATE TABLE IF NOT EXISTS "Sync_eliminados" (
+            seq INTEGER PRIMARY KEY,
+            id_usuario INTEGER NOT NULL,
+            coleccion TEXT NOT NULL,
+            id_registro INTEGER NOT NULL,
+            fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS ix_sync_eliminados_usuario_seq
+            ON "Sync_eliminados"(id_usuario, seq);
+
+        ALTER TABLE "Tareas" ADD COLUMN seq INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE "Metas" ADD COLUMN seq INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE "logros" ADD COLUMN seq INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE "Usuario_Modos" ADD COLUMN seq INTEGER NOT NULL DEFAULT 1;
+        CREATE INDEX IF NOT EXISTS ix_tareas_usuario_seq ON "Tareas"(id_usuario, seq);
+        CREATE INDEX IF NOT EXISTS ix_metas_usuario_seq ON "Metas"(id_usuario, seq);
+        CREATE INDEX IF NOT EXISTS ix_logros_usuario_seq ON "logros"(id_usuario, seq);
+        CREATE INDEX IF NOT EXISTS ix_usuario_modos_usuario_seq ON "Usuario_Modos"(id_usuario, seq);
+    """ + "".join(
+        # (tabla, colección, clave primaria, id que ve el cliente)
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tr_{coleccion}_seq_ins AFTER INSERT ON "{tabla}"
+        BEGIN
+            UPDATE "Sync_secuencia" SET seq = seq + 1 WHERE id = 1;
+            UPDATE "{tabla}" SET seq = (SELECT seq FROM "Sync_secuencia" WHERE id = 1) WHERE {pk} = NEW.{pk};
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_{coleccion}_seq_upd AFTER UPDATE ON "{tabla}"
+        WHEN NEW.seq IS OLD.seq
+        BEGIN
+            UPDATE "Sync_secuencia" SET seq = seq + 1 WHERE id = 1;
+            UPDATE "{tabla}" SET seq = (SELECT seq FROM "Sync_secuencia" WHERE id = 1) WHERE {pk} = NEW.{pk};
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_{coleccion}_seq_del AFTER DELETE ON "{tabla}"
+        BEGIN
+            UPDATE "Sync_secuencia" SET seq = seq + 1 WHERE id = 1;
+            INSERT INTO "Sync_eliminados" (seq, id_usuario, coleccion, id_registro)
+            VALUES ((SELECT seq FROM "Sync_secuencia" WHERE id = 1), OLD.id_usuario, '{coleccion}', OLD.{id_registro});
+        END;
+        """
+        for tabla, coleccion, pk, id_registro in (
+            ("Tareas", "tareas", "id_tarea", "id_tarea"),
+            ("Metas", "metas", "id_meta", "id_meta"),
+            ("logros", "logros", "id_logro", "id_logro"),
+            ("Usuario_Modos", "modos", "id_usuario_modo", "id_modo"),
+        )
+    )),
+    (6, "indices_usuarios_admin", """
+        -- Listado de /admin/usuarios: orden por fecha_registro / ultimo_login, con o sin rol
+        CREATE INDEX IF NOT EXISTS ix_usuario_fecha_registro ON "Usuario"(fecha_registro, id_usuario);
+        CREATE INDEX IF NOT EXISTS ix_usuario_ultimo_login ON "Usuario"(ultimo_login, id_usuario);
+        CREATE INDEX IF NOT EXISTS ix_usuario_rol_fecha_registro ON "Usuario"(id_rol, fecha_registro, id_usuario);
+        CREATE INDEX IF NOT EXISTS ix_usuario_rol_ultimo_login ON "Usuario"(id_rol, ultimo_login, id_usuario);
+        -- Búsqueda por prefijo sin distinguir mayúsculas: rangos sobre índices NOCASE
+        CREATE INDEX IF NOT EXISTS ix_usuario_nombre_nocase ON "Usuario"(nombre COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS ix_usuario_apellido_nocase ON "Usuario"(apellido COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS ix_usuario_correo_nocase ON "Usuario"(correo COLLATE NOCASE);
+    """),
+    (7, "tareas_fts", """
+        -- Índice de texto completo de título + descripción (contenido externo: no duplica
+        -- el texto). remove_diacritics 2: 'reunion' encuentra 'Reunión'.
+        CREATE VIRTUAL TABLE IF NOT EXISTS "Tareas_fts" USING fts5(
+            titulo, descripcion,
+            content='Tareas', content_rowid='id_tarea',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        INSERT INTO "Tareas_fts"("Tareas_fts") VALUES ('rebuild');
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_fts_ins AFTER INSERT ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"(rowid, titulo, descripcion) VALUES (NEW.id_tarea, NEW.titulo, NEW.descripcion);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_fts_del AFTER DELETE ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"("Tareas_fts", rowid, titulo, descripcion)
+            VALUES ('delete', OLD.id_tarea, OLD.titulo, OLD.descripcion);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_tareas_fts_upd AFTER UPDATE OF titulo, descripcion ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"("Tareas_fts", rowid, titulo, descripcion)
+            VALUES ('delete', OLD.id_tarea, OLD.titulo, OLD.descripcion);
+            INSERT INTO "Tareas_fts"(rowid, titulo, descripcion) VALUES (NEW.id_tarea, NEW.titulo, NEW.descripcion);
+        END;
+    """),
+    (8, "notificaciones", """
+        -- Notificaciones en la app. UNIQUE(id_tarea, tipo, momento) es el "reclamo":
+        -- si varios workers disparan el mismo recordatorio, solo un INSERT OR IGNORE gana.
+        CREATE TABLE IF NOT EXISTS "Notificaciones" (
+            id_notificacion INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_usuario INTEGER NOT NULL,
+            id_tarea INTEGER,
+            tipo TEXT NOT NULL,
+            mensaje TEXT NOT NULL,
+            momento DATETIME NOT NULL,
+            fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            leida INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (id_usuario) REFERENCES "Usuario"(id_usuario) ON DELETE CASCADE,
+            FOREIGN KEY (id_tarea) REFERENCES "Tareas"(id_tarea) ON DELETE SET NULL,
+            UNIQUE (id_tarea, tipo, momento)
+        );
+        CREATE INDEX IF NOT EXISTS ix_notificaciones_usuario
+            ON "Notificaciones"(id_usuario, leida, id_notificacion);
+        -- El programador de recordatorios sigue la secuencia de cambios de Tareas
+        CREATE INDEX IF NOT EXISTS ix_tareas_seq ON "Tareas"(seq);
+        -- Rehidratación: solo las tareas con recordatorio
+        CREATE INDEX IF NOT EXISTS ix_tareas_recordatorio
+            ON "Tareas"(fecha) WHERE recordatorio_minutos IS NOT NULL;
+    """),
+    (9, "correos_salida", """
+        -- Bandeja de salida: los endpoints solo encolan; el repartidor (app/routes/correos.py)
+        -- envía por lotes, reintenta con espera creciente y deja registrado el resultado.
+        CREATE TABLE IF NOT EXISTS "Correos_salida" (
+            id_correo INTEGER PRIMARY KEY AUTOINCREMENT,
+            destinatario TEXT NOT NULL,
+            asunto TEXT NOT NULL,
+            cuerpo TEXT NOT NULL,
+            subtipo TEXT NOT NULL DEFAULT 'html',
+            estado TEXT NOT NULL DEFAULT 'pendiente',   -- pendiente | enviando | enviado | fallido
+            intentos INTEGER NOT NULL DEFAULT 0,
+            proximo_intento DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            bloqueado_hasta DATETIME,
+            ultimo_error TEXT,
+            fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            fecha_envio DATETIME
+        );
+        CREATE INDEX IF NOT EXISTS ix_correos_salida_estado
+            ON "Correos_salida"(estado, proximo_intento);
+    """),
+    (10, "motor_logros", """
+        -- Logros otorgados por reglas (app/routes/motor_logros.py): la regla identifica
+        -- el logro y el índice único hace idempotente su inserción.
+        ALTER TABLE "logros" ADD COLUMN regla TEXT;
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_logros_usuario_regla
+            ON "logros"(id_usuario, regla) WHERE regla IS NOT NULL;
+        -- Contadores incrementales por usuario (tareas_completadas, metas_cumplidas, ...)
+        CREATE TABLE IF NOT EXISTS "Contadores_usuario" (
+            id_usuario INTEGER NOT NULL,
+            clave TEXT NOT NULL,
+            valor INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_usuario, clave),
+            FOREIGN KEY (id_usuario) REFERENCES "Usuario"(id_usuario) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        -- Racha de días consecutivos con al menos una tarea completada
+        CREATE TABLE IF NOT EXISTS "Rachas" (
+            id_usuario INTEGER PRIMARY KEY,
+            dias INTEGER NOT NULL DEFAULT 0,
+            maxima INTEGER NOT NULL DEFAULT 0,
+            ultimo_dia INTEGER NOT NULL DEFAULT 0,   -- date.toordinal()
+            FOREIGN KEY (id_usuario) REFERENCES "Usuario"(id_usuario) ON DELETE CASCADE
+        );
+        -- Arranque: contadores con el historial existente
+        INSERT OR IGNORE INTO "Contadores_usuario" (id_usuario, clave, valor)
+        SELECT id_usuario, 'tareas_completadas', COUNT(*) FROM "Tareas"
+        WHERE estado = 'completada' GROUP BY id_usuario;
+        INSERT OR IGNORE INTO "Contadores_usuario" (id_usuario, clave, valor)
+        SELECT id_usuario, 'metas_cumplidas', COUNT(*) FROM "Metas"
+        WHERE completada = 1 GROUP BY id_usuario;
+    """),
+    (11, "metas_automaticas", """
+        -- Metas que avanzan solas con las tareas completadas (app/routes/progreso_metas.py),
+        -- opcionalmente filtradas por categoría y/o prioridad. Cada meta cuenta dentro de
+        -- su ventana [fecha_inicio, fin_ventana): el día, la semana (lunes) o el mes.
+        ALTER TABLE "Metas" ADD COLUMN automatica INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE "Metas" ADD COLUMN id_categoria INTEGER;
+        ALTER TABLE "Metas" ADD COLUMN prioridad TEXT;
+        ALTER TABLE "Metas" ADD COLUMN fin_ventana DATE;
+        UPDATE "Metas" SET
+            fecha_inicio = COALESCE(fecha_inicio, date('now', 'localtime')),
+            fin_ventana = CASE frecuencia
+                WHEN 'diaria'  THEN date(COALESCE(fecha_inicio, date('now', 'localtime')), '+1 day')
+                WHEN 'semanal' THEN date(COALESCE(fecha_inicio, date('now', 'localtime')), 'weekday 0', '+1 day')
+                ELSE date(COALESCE(fecha_inicio, date('now', 'localtime')), 'start of month', '+1 month')
+            END;
+        -- Renovación de ventanas vencidas, por lotes
+        CREATE INDEX IF NOT EXISTS ix_metas_fin_ventana ON "Metas"(fin_ventana);
+        -- Progreso incremental: metas automáticas del usuario
+        CREATE INDEX IF NOT EXISTS ix_metas_automaticas
+            ON "Metas"(id_usuario, fin_ventana) WHERE automatica = 1;
+    """),
+    (12, "cambios_usuarios", """
+        -- Registro de usuarios modificados o borrados: cada worker lo sigue para
+        -- invalidar su caché de autenticación (app/routes/auth_cache.py). Solo las
+        -- columnas que ve get_current_user (ultimo_login y token_reset no cuentan).
+        -- Cada alta purga lo que tiene más de un día: para entonces ninguna entrada
+        -- de caché (TTL de segundos) es anterior al cambio.
+        CREATE TABLE IF NOT EXISTS "Usuarios_cambios" (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_usuario INTEGER NOT NULL,
+            fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TRIGGER IF NOT EXISTS tr_usuario_cambio_upd
+        AFTER UPDATE OF id_rol, nombre, apellido, edad, correo, contrasena, foto_perfil ON "Usuario"
+        BEGIN
+            DELETE FROM "Usuarios_cambios" WHERE fecha < datetime('now', '-1 day');
+            INSERT INTO "Usuarios_cambios" (id_usuario) VALUES (NEW.id_usuario);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tr_usuario_cambio_del AFTER DELETE ON "Usuario"
+        BEGIN
+            DELETE FROM "Usuarios_cambios" WHERE fecha < datetime('now', '-1 day');
+            INSERT INTO "Usuarios_cambios" (id_usuario) VALUES (OLD.id_usuario);
+        END;
+    """),
+    (13, "contadores_anterior", """
+        -- Valor previo al último UPSERT (motor_logros.py): con el tope MAX(0, ...)
+        -- valor - delta no siempre es el valor anterior, así que el RETURNING lo trae.
+        ALTER TABLE "Contadores_usuario" ADD COLUMN anterior INTEGER NOT NULL DEFAULT 0;
+    """),
+    (14, "busqueda_por_usuario", """
+        -- Tareas_fts indexa también id_usuario: MATCH filtra por usuario dentro del
+        -- índice en vez de recorrer las coincidencias de todos (ver busqueda.py).
+        DROP TRIGGER IF EXISTS tr_tareas_fts_ins;
+        DROP TRIGGER IF EXISTS tr_tareas_fts_del;
+        DROP TRIGGER IF EXISTS tr_tareas_fts_upd;
+        DROP TABLE IF EXISTS "Tareas_fts";
+        CREATE VIRTUAL TABLE "Tareas_fts" USING fts5(
+            titulo, descripcion, id_usuario,
+            content='Tareas', content_rowid='id_tarea',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        INSERT INTO "Tareas_fts"("Tareas_fts") VALUES ('rebuild');
+        CREATE TRIGGER tr_tareas_fts_ins AFTER INSERT ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"(rowid, titulo, descripcion, id_usuario)
+            VALUES (NEW.id_tarea, NEW.titulo, NEW.descripcion, NEW.id_usuario);
+        END;
+        CREATE TRIGGER tr_tareas_fts_del AFTER DELETE ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"("Tareas_fts", rowid, titulo, descripcion, id_usuario)
+            VALUES ('delete', OLD.id_tarea, OLD.titulo, OLD.descripcion, OLD.id_usuario);
+        END;
+        CREATE TRIGGER tr_tareas_fts_upd AFTER UPDATE OF titulo, descripcion, id_usuario ON "Tareas"
+        BEGIN
+            INSERT INTO "Tareas_fts"("Tareas_fts", rowid, titulo, descripcion, id_usuario)
+            VALUES ('delete', OLD.id_tarea, OLD.titulo, OLD.descripcion, OLD.id_usuario);
+            INSERT INTO "Tareas_fts"(rowid, titulo, descripcion, id_usuario)
+            VALUES (NEW.id_tarea, NEW.titulo, NEW.descripcion, NEW.id_usuario);
+        END;
+        -- Ranking congelado de una búsqueda paginada: las páginas siguientes salen de
+        -- aquí por posición, así un cambio en bm25 entre peticiones no salta ni repite filas.
+        CREATE TABLE IF NOT EXISTS "Busquedas_resultados" (
+            token TEXT NOT NULL,
+            posicion INTEGER NOT NULL,
+            id_usuario INTEGER NOT NULL,
+            id_tarea INTEGER NOT NULL,
+            creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (token, posicion)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_busquedas_resultados_creada ON "Busquedas_resultados"(creada);
+    """),
+]
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(db_path) -> int:
+    """Aplica las migraciones pendientes. Retorna la versión final del esquema."""
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        version = version_actual(conn)
+        for numero, nombre, sql in MIGRACIONES:
+            if numero <= version:
+                continue
+            try:
+                # executescript no abre transacción propia: BEGIN/COMMIT explícitos
+                conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {numero};\nCOMMIT;")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            print(f"Migración {numero:03d} aplicada: {nombre}")
+            version = numero
+        return version
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    from app.database.database import DB_PATH
+    print(f"Esquema en versión {aplicar_migraciones(DB_PATH)}")
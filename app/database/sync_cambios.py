@@ -0,0 +1,115 @@
+# app/database/sync_cambios.py
+"""
+Secuencia de cambios para la sincronización incremental (/sync).
+
+Triggers de la migración 005 sellan cada INSERT/UPDATE de Tareas, Metas,
+logros y Usuario_Modos con el siguiente valor de `Sync_secuencia.seq`, y cada
+DELETE deja una lápida en `Sync_eliminados`. Como SQLite tiene un solo
+escritor, un lector nunca ve un seq mayor sin haber visto los menores.
+
+Las lápidas se pueden purgar; quien pida `since` anterior a lo purgado
+debe resincronizar desde cero:
+
+    python -m app.database.sync_cambios purgar [dias]
+"""
+import sys
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+DIAS_RETENCION_LAPIDAS = 90
+
+# Ramas del feed: (coleccion, tabla, columna id). El orden global es (seq, coleccion, id).
+RAMAS = (
+    ("eliminados", "Sync_eliminados", "seq"),
+    ("logros", "logros", "id_logro"),
+    ("metas", "Metas", "id_meta"),
+    ("modos", "Usuario_Modos", "id_modo"),
+    ("tareas", "Tareas", "id_tarea"),
+)
+ID_MAXIMO = 2 ** 63 - 1
+COLECCIONES = {coleccion for coleccion, _, _ in RAMAS}
+
+
+def cursor_valido(cursor: list) -> bool:
+    """Un cursor del feed es (seq entero, nombre de colección de RAMAS, id entero)."""
+    seq, coleccion, id_registro = cursor
+    return (
+        type(seq) is int and seq >= 0
+        and coleccion in COLECCIONES
+        and type(id_registro) is int
+    )
+
+# Cada rama pide como mucho :limite filas ya ordenadas por su índice (id_usuario, seq),
+# arrancando justo después del cursor; la unión final ordena a lo sumo 5 × limite filas.
+SQL_CAMBIOS = text("SELECT seq, coleccion, id FROM (" + " UNION ALL ".join(
+    f"""SELECT * FROM (
+            SELECT seq, '{coleccion}' AS coleccion, {columna_id} AS id FROM "{tabla}"
+            WHERE id_usuario = :id_usuario AND (seq, {columna_id}) > (:seq_{coleccion}, :id_{coleccion})
+            ORDER BY seq, {columna_id} LIMIT :limite
+        )"""
+    for coleccion, tabla, columna_id in RAMAS
+) + ") ORDER BY seq, coleccion, id LIMIT :limite")
+
+SQL_ELIMINADOS = text(
+    'SELECT coleccion, id_registro AS id, seq FROM "Sync_eliminados" '
+    "WHERE id_usuario = :id_usuario AND seq IN :seqs ORDER BY seq"
+).bindparams(bindparam("seqs", expanding=True))
+
+SQL_ESTADO = text('SELECT seq, purgado_hasta FROM "Sync_secuencia" WHERE id = 1')
+
+
+def parametros_cambios(id_usuario: int, since: int, cursor: Optional[list], limite: int) -> dict:
+    """
+    Punto de partida de cada rama. Con cursor (seq, coleccion, id): las ramas
+    que ordenan antes que `coleccion` ya entregaron ese seq, la suya sigue
+    después de `id` y las posteriores lo empiezan completo.
+    """
+    parametros = {"id_usuario": id_usuario, "limite": limite}
+    for coleccion, _, _ in RAMAS:
+        if cursor is None:
+            seq, id_registro = since, ID_MAXIMO
+        else:
+            seq = cursor[0]
+            if coleccion < cursor[1]:
+                id_registro = ID_MAXIMO
+            elif coleccion == cursor[1]:
+                id_registro = cursor[2]
+            else:
+                id_registro = -1
+        parametros[f"seq_{coleccion}"] = seq
+        parametros[f"id_{coleccion}"] = id_registro
+    return parametros
+
+
+def purgar_eliminados(db: Session, dias: int = DIAS_RETENCION_LAPIDAS) -> int:
+    """Borra lápidas más viejas que `dias` y sube `purgado_hasta`. Retorna cuántas borró."""
+    limite = db.execute(
+        text("""SELECT MAX(seq) FROM "Sync_eliminados" WHERE fecha < datetime('now', :dias)"""),
+        {"dias": f"-{int(dias)} days"},
+    ).scalar()
+    if limite is None:
+        return 0
+    borradas = db.execute(text('DELETE FROM "Sync_eliminados" WHERE seq <= :seq'), {"seq": limite}).rowcount
+    db.execute(
+        text('UPDATE "Sync_secuencia" SET purgado_hasta = MAX(purgado_hasta, :seq) WHERE id = 1'),
+        {"seq": limite},
+    )
+    db.commit()
+    return borradas
+
+
+if __name__ == "__main__":
+    from app.database.database import SessionLocal
+
+    comando = sys.argv[1] if len(sys.argv) > 1 else ""
+    if comando != "purgar":
+        print("Uso: python -m app.database.sync_cambios purgar [dias]")
+        sys.exit(2)
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else DIAS_RETENCION_LAPIDAS
+    db = SessionLocal()
+    try:
+        print(f"{purgar_eliminados(db, dias)} lápidas purgadas (más de {dias} días)")
+    finally:
+        db.close()
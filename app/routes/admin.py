@@ -1,11 +1,21 @@
 # app/routes/admin.py
-from fastapi import APIRouter, Depends, HTTPException
+import string
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, or_, and_, func
 from sqlalchemy.orm import Session
-from app.database.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import SessionLocal, get_async_db
 from app.routes.models import Usuario
 from pydantic import BaseModel, validator
-from app.routes.auth import get_current_user, pwd_context
+from app.routes.auth import get_current_user
+from app.routes.password_executor import hash_contrasena
+from typing import Optional, List
+from datetime import datetime
+from app.routes.auth_cache import cache_usuarios
+from app.routes.limitador import limitador
 from app.routes.auth_utils import validar_id, validar_email, validar_contrasena, validar_string, validar_edad
+from app.routes.paginacion import preparar_pagina, cerrar_pagina
+from app.routes.json_rapido import columnas_de, filas_a_dicts, respuesta_json
 
 # --- Dependencia get_db ---
 def get_db():
@@ -66,27 +76,115 @@ class UsuarioCreate(BaseModel):
         return v
 
 class UsuarioUpdate(UsuarioCreate):
-    pass
+    # Opcional: si no se envía, se conserva la contraseña (y su hash) actual
+    contrasena: Optional[str] = None
 
-@router.get("/usuarios")
-def listar_usuarios(user = Depends(get_current_user), db: Session = Depends(get_db)):
+    @validator('contrasena')
+    def validar_pass(cls, v):
+        if v is None:
+            return v
+        es_valida, mensaje = validar_contrasena(v)
+        if not es_valida:
+            raise ValueError(mensaje)
+        return v
+
+# === Listado paginado ===
+class UsuarioAdminOut(BaseModel):
+    id_usuario: int
+    id_rol: Optional[int]
+    nombre: str
+    apellido: str
+    edad: Optional[int]
+    correo: str
+    foto_perfil: Optional[str]
+    fecha_registro: Optional[datetime]
+    ultimo_login: Optional[datetime]
+
+class UsuarioAdminPagina(BaseModel):
+    items: List[UsuarioAdminOut]
+    next_cursor: Optional[str] = None
+
+# Solo columnas públicas: nunca contrasena ni token_reset
+COLUMNAS_USUARIO_ADMIN = columnas_de(Usuario, UsuarioAdminOut)
+ORDENES_USUARIOS = {"fecha_registro": Usuario.fecha_registro, "ultimo_login": Usuario.ultimo_login}
+
+_MINUSCULAS_ASCII = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_ESCAPAR_LIKE = str.maketrans({"\\": "\\\\", "%": "\\%", "_": "\\_"})
+
+def _siguiente_nocase(prefijo: str) -> str:
+    """Menor texto mayor que todo lo que empieza por `prefijo` (ASCII en minúsculas) según NOCASE."""
+    siguiente = chr(ord(prefijo[-1]) + 1)
+    # NOCASE compara 'A'..'Z' como 'a'..'z': tras '@' viene '[' y no 'A'
+    if "A" <= siguiente <= "Z":
+        siguiente = "["
+    return prefijo[:-1] + siguiente
+
+def _rango_prefijo(columna, prefijo: str):
+    """
+    `columna` empieza por `prefijo` sin distinguir mayúsculas. La parte ASCII
+    inicial va como rango sobre el índice NOCASE (que solo pliega ASCII); desde
+    el primer carácter no ASCII se compara con minusculas() (Python, Unicode).
+    """
+    n_ascii = next((i for i, c in enumerate(prefijo) if not c.isascii()), len(prefijo))
+    condiciones = []
+    if n_ascii:
+        inicio = prefijo[:n_ascii].translate(_MINUSCULAS_ASCII)
+        nocase = columna.collate("NOCASE")
+        condiciones += [nocase >= inicio, nocase < _siguiente_nocase(inicio)]
+    if n_ascii < len(prefijo):
+        patron = prefijo.lower().translate(_ESCAPAR_LIKE) + "%"
+        condiciones.append(func.minusculas(columna).like(patron, escape="\\"))
+    return and_(*condiciones)
+
+@router.get("/usuarios", response_model=UsuarioAdminPagina)
+def listar_usuarios(
+    orden: str = Query("fecha_registro", description="fecha_registro o ultimo_login"),
+    direccion: str = Query("desc", description="asc o desc"),
+    rol: Optional[int] = Query(None, description="Filtra por id_rol"),
+    buscar: Optional[str] = Query(None, description="Prefijo de nombre, apellido o correo"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     # ✅ Validación: Solo admin
     if user.id_rol != 1:
         raise HTTPException(403, "Solo administradores pueden listar usuarios")
-    return db.query(Usuario).all()
+    # ✅ Validación: Orden y dirección
+    if orden not in ORDENES_USUARIOS:
+        raise HTTPException(400, "Orden inválido. Usa: fecha_registro o ultimo_login")
+    if direccion not in ("asc", "desc"):
+        raise HTTPException(400, "Dirección inválida. Usa: asc o desc")
+    descendente = direccion == "desc"
+    orden_keyset = [(ORDENES_USUARIOS[orden], descendente), (Usuario.id_usuario, descendente)]
+
+    q = select(*COLUMNAS_USUARIO_ADMIN)
+    if rol is not None:
+        q = q.where(Usuario.id_rol == rol)
+    if buscar and buscar.strip():
+        prefijo = buscar.strip()
+        q = q.where(or_(
+            _rango_prefijo(Usuario.nombre, prefijo),
+            _rango_prefijo(Usuario.apellido, prefijo),
+            _rango_prefijo(Usuario.correo, prefijo),
+        ))
+
+    filas = db.execute(preparar_pagina(q, orden_keyset, limit, cursor)).all()
+    filas, siguiente = cerrar_pagina(filas, orden_keyset, limit)
+    return respuesta_json({"items": filas_a_dicts(filas), "next_cursor": siguiente})
 
 @router.post("/usuarios")
-def crear_usuario(usuario: UsuarioCreate, user = Depends(get_current_user), db: Session = Depends(get_db)):
+async def crear_usuario(usuario: UsuarioCreate, user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     # ✅ Validación: Solo admin
     if user.id_rol != 1:
         raise HTTPException(403, "Solo administradores pueden crear usuarios")
     
     # ✅ Validación: Email no duplicado
-    existe = db.query(Usuario).filter(Usuario.correo == usuario.correo.lower()).first()
+    existe = (await db.execute(select(Usuario.id_usuario).where(Usuario.correo == usuario.correo.lower()))).first()
     if existe:
         raise HTTPException(400, "El email ya está registrado")
     
-    hashed = pwd_context.hash(usuario.contrasena)
+    hashed = await hash_contrasena(usuario.contrasena)
     new_user = Usuario(
         nombre=usuario.nombres,
         apellido=usuario.apellidos,
@@ -96,26 +194,26 @@ def crear_usuario(usuario: UsuarioCreate, user = Depends(get_current_user), db:
         id_rol=usuario.id_rol
     )
     db.add(new_user)
-    db.commit()
+    await db.commit()
     return {"msg": "Usuario creado correctamente", "id": new_user.id_usuario}
 
 @router.put("/usuarios/{id}")
-def actualizar_usuario(id: int, update: UsuarioUpdate, user = Depends(get_current_user), db: Session = Depends(get_db)):
+async def actualizar_usuario(id: int, update: UsuarioUpdate, user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     if not validar_id(id):
         raise HTTPException(400, "ID de usuario inválido")
     if user.id_rol != 1:
         raise HTTPException(403, "Solo administradores")
     
-    db_user = db.query(Usuario).filter(Usuario.id_usuario == id).first()
+    db_user = await db.get(Usuario, id)
     if not db_user:
         raise HTTPException(404, "Usuario no encontrado")
     
     # ✅ Validación: Email no duplicado
     if update.correo != db_user.correo:
-        existe = db.query(Usuario).filter(
+        existe = (await db.execute(select(Usuario.id_usuario).where(
             Usuario.correo == update.correo.lower(),
             Usuario.id_usuario != id
-        ).first()
+        ))).first()
         if existe:
             raise HTTPException(400, "El email ya está registrado")
     
@@ -123,10 +221,12 @@ def actualizar_usuario(id: int, update: UsuarioUpdate, user = Depends(get_curren
     db_user.apellido = update.apellidos
     db_user.edad = update.edad
     db_user.correo = update.correo.lower()
-    db_user.contrasena = pwd_context.hash(update.contrasena)
+    if update.contrasena is not None:
+        db_user.contrasena = await hash_contrasena(update.contrasena)
     db_user.id_rol = update.id_rol
     
-    db.commit()
+    await db.commit()
+    cache_usuarios.invalidar_usuario(id)
     return {"msg": "Usuario actualizado correctamente"}
 
 @router.delete("/usuarios/{id}")
@@ -145,4 +245,17 @@ def eliminar_usuario(id: int, user = Depends(get_current_user), db: Session = De
         raise HTTPException(404, "Usuario no encontrado")
     db.delete(db_user)
     db.commit()
-    return {"msg": "Usuario eliminado correctamente"}
\ No newline at end of file
+    cache_usuarios.invalidar_usuario(id)
+    return {"msg": "Usuario eliminado correctamente"}
+
+@router.get("/cache-usuarios")
+def estadisticas_cache_usuarios(user = Depends(get_current_user)):
+    if user.id_rol != 1:
+        raise HTTPException(403, "Solo administradores")
+    return cache_usuarios.estadisticas()
+
+@router.get("/limites")
+def estadisticas_limites(user = Depends(get_current_user)):
+    if user.id_rol != 1:
+        raise HTTPException(403, "Solo administradores")
+    return limitador.estadisticas()
\ No newline at end of file
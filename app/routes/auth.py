@@ -1,15 +1,22 @@
 # app/routes/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_db, get_async_db
 from app.routes.models import Usuario, Rol
-from app.routes.auth_utils import pwd_context, create_access_token, verify_token, validar_email, validar_contrasena, validar_string, validar_edad, validar_id
+from app.routes.auth_cache import cache_usuarios, usuario_desacoplado, adjuntar_usuario
+from app.routes.password_executor import hash_contrasena, verificar_y_actualizar
+from app.routes.correos import encolar, repartidor
+from app.routes.limitador import limitador
+from app.routes.auth_utils import pwd_context, create_access_token, decode_token, validar_email, validar_contrasena, validar_string, validar_edad, validar_id
 from datetime import datetime, timedelta
 import secrets
 import string
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from fastapi_mail import FastMail, ConnectionConfig
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -33,8 +40,8 @@ conf = ConnectionConfig(
     MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "TimeWise"),
     MAIL_STARTTLS=os.getenv("MAIL_TLS", "True").lower() == "true",
     MAIL_SSL_TLS=os.getenv("MAIL_SSL", "False").lower() == "true",
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
+    USE_CREDENTIALS=os.getenv("MAIL_USE_CREDENTIALS", "True").lower() == "true",
+    VALIDATE_CERTS=os.getenv("MAIL_VALIDATE_CERTS", "True").lower() == "true"
 )
 
 fm = FastMail(conf)
@@ -65,13 +72,13 @@ def generar_token() -> str:
 # --- RUTAS ---
 
 @router.post("/register")
-def register(user: RegisterUser, db: Session = Depends(get_db)):
+async def register(user: RegisterUser, db: AsyncSession = Depends(get_async_db)):
     # ✅ Validación 1: Email válido
     if not validar_email(user.correo):
         raise HTTPException(status_code=400, detail="Email inválido. Formato correcto: ejemplo@dominio.com")
     
     # ✅ Validación 2: Email duplicado
-    if db.query(Usuario).filter(Usuario.correo == user.correo.lower()).first():
+    if (await db.execute(select(Usuario.id_usuario).where(Usuario.correo == user.correo.lower()))).first():
         raise HTTPException(status_code=400, detail="El correo ya está registrado en el sistema")
 
     # ✅ Validación 3: Contraseña fuerte
@@ -99,12 +106,12 @@ def register(user: RegisterUser, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="ID de rol inválido")
     
     # ✅ Validación 8: Verificar que el rol existe
-    rol_existe = db.query(Rol).filter(Rol.id_rol == user.id_rol).first()
+    rol_existe = await db.get(Rol, user.id_rol)
     if not rol_existe:
         raise HTTPException(status_code=400, detail="El rol especificado no existe")
 
     # Hash de la contraseña
-    hashed_password = pwd_context.hash(user.contrasena)
+    hashed_password = await hash_contrasena(user.contrasena)
 
     # Crear usuario
     nuevo_usuario = Usuario(
@@ -117,24 +124,34 @@ def register(user: RegisterUser, db: Session = Depends(get_db)):
         fecha_registro=datetime.now()
     )
     db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+    await db.commit()
 
     return {"msg": "Usuario creado exitosamente", "usuario_id": nuevo_usuario.id_usuario}
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # Límite por IP y por cuenta antes de cualquier consulta o bcrypt
+    await limitador.comprobar_async(request, "login", cuenta=form_data.username)
+
     # ✅ Validación: Email válido
     if not validar_email(form_data.username):
         raise HTTPException(status_code=400, detail="Email inválido")
     
-    usuario = db.query(Usuario).filter(Usuario.correo == form_data.username.lower()).first()
-    if not usuario or not pwd_context.verify(form_data.password, usuario.contrasena):
+    resultado = await db.execute(select(Usuario).where(Usuario.correo == form_data.username.lower()))
+    usuario = resultado.scalar_one_or_none()
+    if not usuario:
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    valida, nuevo_hash = await verificar_y_actualizar(form_data.password, usuario.contrasena)
+    if not valida:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
-    # Actualizar último login
+    # Actualizar último login (y el hash si cambió el coste de bcrypt)
     usuario.ultimo_login = datetime.now()
-    db.commit()
+    if nuevo_hash:
+        usuario.contrasena = nuevo_hash
+    await db.commit()
+    if nuevo_hash:
+        cache_usuarios.invalidar_usuario(usuario.id_usuario)
 
     # Generar token JWT
     access_token = create_access_token(
@@ -145,7 +162,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/recover-password")
-async def recover_password(data: RecoverPassword, db: Session = Depends(get_db)):
+def recover_password(request: Request, data: RecoverPassword, db: Session = Depends(get_db)):
+    limitador.comprobar(request, "recover-password", cuenta=data.correo)
+
     # ✅ Validación: Email válido
     if not validar_email(data.correo):
         raise HTTPException(status_code=400, detail="Email inválido")
@@ -154,17 +173,15 @@ async def recover_password(data: RecoverPassword, db: Session = Depends(get_db))
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    # Generar y guardar token
+    # Generar y guardar token; el correo sale por la bandeja (app/routes/correos.py)
     token = generar_token()
     usuario.token_reset = token
     usuario.token_reset_expiry = datetime.now() + timedelta(minutes=15)
-    db.commit()
-
-    # Enviar email
-    message = MessageSchema(
-        subject="Recuperación de contraseña - TimeWise",
-        recipients=[usuario.correo],
-        body=f"""
+    encolar(
+        db,
+        destinatario=usuario.correo,
+        asunto="Recuperación de contraseña - TimeWise",
+        cuerpo=f"""
         <h2>Recuperación de contraseña</h2>
         <p>Hola <strong>{usuario.nombre}</strong>,</p>
         <p>Hemos recibido una solicitud para restablecer tu contraseña.</p>
@@ -175,17 +192,15 @@ async def recover_password(data: RecoverPassword, db: Session = Depends(get_db))
         <br>
         <p>Saludos,<br><strong>Equipo TimeWise</strong></p>
         """,
-        subtype="html"
     )
-
-    try:
-        await fm.send_message(message)
-        return {"msg": "Email enviado con token para recuperación"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error enviando email: {str(e)}")
+    db.commit()
+    repartidor.avisar()   # desde el hilo del threadpool: usa call_soon_threadsafe
+    return {"msg": "Email enviado con token para recuperación"}
 
 @router.post("/reset-password")
-def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
+async def reset_password(request: Request, data: ResetPassword, db: AsyncSession = Depends(get_async_db)):
+    await limitador.comprobar_async(request, "reset-password")
+
     # ✅ Validación 1: Token no vacío
     if not data.token or not data.token.strip():
         raise HTTPException(status_code=400, detail="Token es requerido")
@@ -195,7 +210,8 @@ def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
     if not es_valida:
         raise HTTPException(status_code=400, detail=mensaje)
     
-    usuario = db.query(Usuario).filter(Usuario.token_reset == data.token).first()
+    resultado = await db.execute(select(Usuario).where(Usuario.token_reset == data.token))
+    usuario = resultado.scalar_one_or_none()
     if not usuario:
         raise HTTPException(status_code=400, detail="Token inválido")
 
@@ -203,20 +219,40 @@ def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Token expirado. Solicita uno nuevo")
 
     # Actualizar contraseña
-    usuario.contrasena = pwd_context.hash(data.nueva_contrasena)
+    usuario.contrasena = await hash_contrasena(data.nueva_contrasena)
     usuario.token_reset = None
     usuario.token_reset_expiry = None
-    db.commit()
+    await db.commit()
+    cache_usuarios.invalidar_usuario(usuario.id_usuario)
 
     return {"msg": "Contraseña actualizada exitosamente"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    user_id = verify_token(token)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token inválido o expirado")
-    
-    usuario = db.query(Usuario).filter(Usuario.id_usuario == int(user_id)).first()
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    return usuario
\ No newline at end of file
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    Usuario autenticado como instancia desacoplada (solo lectura de columnas).
+    Los endpoints que lo modifican deben usar `get_current_user_db`.
+    """
+    # Cambios de otros workers: como mucho una revisión por intervalo, fuera del loop
+    if cache_usuarios.toca_revisar():
+        await run_in_threadpool(cache_usuarios.revisar)
+    # Caché: evita decodificar el JWT y consultar Usuario en cada petición
+    columnas = cache_usuarios.obtener(token)
+    if columnas is None:
+        payload = decode_token(token)
+        user_id = payload.get("sub") if payload else None
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Token inválido o expirado")
+
+        generacion = cache_usuarios.generacion(int(user_id))
+        resultado = await db.execute(select(Usuario).where(Usuario.id_usuario == int(user_id)))
+        usuario = resultado.scalar_one_or_none()
+        if not usuario:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+        columnas = cache_usuarios.guardar(token, usuario, payload.get("exp"), generacion)
+
+    return usuario_desacoplado(columnas)
+
+def get_current_user_db(user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Usuario autenticado adjunto a la sesión síncrona, para endpoints que lo modifican."""
+    return adjuntar_usuario(user, db)
\ No newline at end of file
@@ -0,0 +1,219 @@
+# app/routes/auth_cache.py
+"""
+Caché del usuario autenticado (principal) por token JWT.
+
+Evita decodificar el token y consultar `Usuario` en cada petición protegida.
+Es acotada (LRU) y cada entrada vence con el TTL configurado o cuando
+expira el propio token, lo que ocurra primero.
+
+Los cambios hechos en este worker invalidan al instante (`invalidar_usuario`).
+Los de otros workers se detectan como en el catálogo (catalogo.py): a lo sumo
+cada AUTH_CACHE_REVISION_SEGUNDOS, `PRAGMA data_version` en una conexión
+propia indica si alguien hizo commit y solo entonces se leen las filas nuevas
+de `Usuarios_cambios` (triggers, migración 012) para invalidar esos usuarios.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.database.database import DB_PATH
+from app.routes.models import Usuario
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_TTL_SEGUNDOS = int(os.getenv("AUTH_CACHE_TTL_SEGUNDOS", "60"))
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", "10000"))
+AUTH_CACHE_REVISION_SEGUNDOS = float(os.getenv("AUTH_CACHE_REVISION_SEGUNDOS", "1"))
+
+# Columnas que se guardan del usuario (sin relaciones)
+_COLUMNAS = [attr.key for attr in Usuario.__mapper__.column_attrs]
+
+
+class CacheUsuarios:
+    def __init__(self, max_entradas: int, ttl_segundos: int, db_path=None):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()   # token -> (vence, id_usuario, columnas)
+        self._tokens_por_usuario = {}    # id_usuario -> set(tokens)
+        self._generaciones = {}          # id_usuario -> nº de invalidaciones
+        self._epoca = 0                  # nº de vaciados completos
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+        # Cambios de otros workers (None = sin seguimiento)
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock_revision = threading.Lock()
+        self._proxima_revision = 0.0
+        self._data_version = None
+        self._ultimo_cambio: Optional[int] = None
+        self.revisiones = 0
+        self.invalidaciones_externas = 0
+
+    def obtener(self, token: str) -> Optional[dict]:
+        """Devuelve las columnas cacheadas del usuario o None si no hay entrada vigente."""
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is None:
+                self.misses += 1
+                return None
+            vence, id_usuario, columnas = entrada
+            if vence <= time.monotonic():
+                self._quitar(token, id_usuario)
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(token)
+            self.hits += 1
+            return columnas
+
+    def generacion(self, id_usuario: int) -> tuple:
+        with self._lock:
+            return self._epoca, self._generaciones.get(id_usuario, 0)
+
+    def guardar(self, token: str, usuario: Usuario, token_exp: Optional[float], generacion: tuple) -> dict:
+        """
+        Guarda una copia de las columnas del usuario y la retorna.
+        Si el usuario fue invalidado mientras se consultaba (generación distinta) no se guarda.
+        """
+        columnas = {key: getattr(usuario, key) for key in _COLUMNAS}
+        ttl = self.ttl_segundos
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if self.max_entradas <= 0 or ttl <= 0:
+            return columnas
+        id_usuario = columnas["id_usuario"]
+
+        with self._lock:
+            if (self._epoca, self._generaciones.get(id_usuario, 0)) != generacion:
+                return columnas
+            anterior = self._entradas.pop(token, None)
+            if anterior is not None:
+                self._tokens_por_usuario.get(anterior[1], set()).discard(token)
+            self._entradas[token] = (time.monotonic() + ttl, id_usuario, columnas)
+            self._tokens_por_usuario.setdefault(id_usuario, set()).add(token)
+            while len(self._entradas) > self.max_entradas:
+                token_viejo, (_, id_viejo, _) = next(iter(self._entradas.items()))
+                self._quitar(token_viejo, id_viejo)
+        return columnas
+
+    def invalidar_usuario(self, id_usuario: int):
+        """Elimina todas las entradas del usuario (llamar tras cambiar contraseña, correo, rol...)."""
+        with self._lock:
+            self._generaciones[id_usuario] = self._generaciones.get(id_usuario, 0) + 1
+            for token in self._tokens_por_usuario.pop(id_usuario, set()):
+                self._entradas.pop(token, None)
+            self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tokens_por_usuario.clear()
+            self._generaciones.clear()
+            self._epoca += 1   # una consulta en curso no guarda lo que leyó antes del vaciado
+
+    # --- Cambios hechos por otros workers ---
+    def toca_revisar(self) -> bool:
+        """True una sola vez por intervalo: quien lo recibe llama `revisar()` (en un hilo)."""
+        if self.db_path is None:
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._proxima_revision:
+                return False
+            self._proxima_revision = ahora + AUTH_CACHE_REVISION_SEGUNDOS
+            return True
+
+    def _conexion(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        return self._conn
+
+    def revisar(self):
+        """Invalida los usuarios que cambiaron en la base desde la última revisión. Hace E/S: no llamar en el loop."""
+        try:
+            with self._lock_revision:
+                self._revisar()
+        except sqlite3.Error:
+            # Sin poder verificar, nada de lo cacheado es confiable
+            logger.warning("Caché de usuarios: no se pudo leer Usuarios_cambios, se vacía", exc_info=True)
+            self.limpiar()
+
+    def _revisar(self):
+        conn = self._conexion()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        self.revisiones += 1
+        # Una sola transacción de lectura: tope y filas del mismo snapshot
+        conn.execute("BEGIN")
+        try:
+            fila = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Usuarios_cambios'").fetchone()
+            tope = fila[0] if fila else 0
+            if self._ultimo_cambio is None:
+                # Primera revisión: lo cacheado hasta ahora se leyó después de estos cambios
+                self._ultimo_cambio = tope
+                return
+            if tope == self._ultimo_cambio:
+                return
+            minimo = conn.execute('SELECT MIN(seq) FROM "Usuarios_cambios"').fetchone()[0]
+            if minimo is None or minimo > self._ultimo_cambio + 1:
+                # Se purgaron cambios que este worker no vio
+                self.limpiar()
+            else:
+                ids = {f[0] for f in conn.execute(
+                    'SELECT DISTINCT id_usuario FROM "Usuarios_cambios" WHERE seq > ? AND seq <= ?',
+                    (self._ultimo_cambio, tope),
+                )}
+                for id_usuario in ids:
+                    self.invalidar_usuario(id_usuario)
+                self.invalidaciones_externas += len(ids)
+            self._ultimo_cambio = tope
+        finally:
+            conn.execute("COMMIT")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidaciones": self.invalidaciones,
+                "invalidaciones_externas": self.invalidaciones_externas,
+                "revisiones": self.revisiones,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _quitar(self, token: str, id_usuario: int):
+        self._entradas.pop(token, None)
+        tokens = self._tokens_por_usuario.get(id_usuario)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_por_usuario[id_usuario]
+
+
+def usuario_desacoplado(columnas: dict) -> Usuario:
+    """Reconstruye el usuario cacheado como instancia desacoplada (sin sesión ni SQL)."""
+    usuario = Usuario(**columnas)
+    make_transient_to_detached(usuario)
+    return usuario
+
+
+def adjuntar_usuario(usuario: Usuario, db: Session) -> Usuario:
+    """Adjunta un usuario desacoplado a la sesión síncrona sin volver a consultarlo."""
+    return db.merge(usuario, load=False)
+
+
+cache_usuarios = CacheUsuarios(AUTH_CACHE_MAX, AUTH_CACHE_TTL_SEGUNDOS, DB_PATH)
@@ -9,7 +9,9 @@ import re
 load_dotenv()
 
 # Configuración de hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Si BCRYPT_ROUNDS cambia, los hashes con otro coste se regeneran en el siguiente login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Variables JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "tu_super_secreto_aqui_cambia_en_produccion")
@@ -22,14 +24,18 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# Verificar token JWT
-def verify_token(token: str):
+# Decodificar token JWT (payload completo o None si es inválido/expirado)
+def decode_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
+# Verificar token JWT
+def verify_token(token: str):
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
 def validar_id(id_value):
     """Valida que un ID sea válido (mayor a 0)."""
     try:
@@ -0,0 +1,126 @@
+# app/routes/busqueda.py
+"""
+Búsqueda de texto completo sobre tareas (FTS5, migraciones 007 y 014).
+
+`Tareas_fts` indexa titulo + descripcion + id_usuario con contenido externo y
+la mantienen triggers. El texto del usuario nunca se pasa tal cual a MATCH: se
+parte en palabras y cada una va entre comillas (sin operadores FTS), la última
+como prefijo para buscar mientras se escribe. Las palabras se buscan solo en
+titulo/descripcion y se cruzan con `id_usuario:"N"` dentro del índice, así
+MATCH no recorre las coincidencias de los demás usuarios.
+
+Paginación: bm25 depende de estadísticas de toda la tabla (cualquier alta o
+edición, de cualquier usuario, mueve los rangos), así que un keyset sobre el
+rango saltaría o repetiría filas entre peticiones. Si hay más de una página,
+la primera petición guarda los ids ya ordenados (hasta MAX_RESULTADOS) en
+`Busquedas_resultados` y el cursor es (token, posición): las páginas
+siguientes siguen ese orden congelado. Una tarea borrada o que ya deja de
+coincidir desaparece de su página; una nueva no entra hasta buscar de nuevo.
+El token caduca a los VIGENCIA_MINUTOS (410: hay que repetir la búsqueda).
+"""
+import re
+import secrets
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.routes.paginacion import codificar_cursor, decodificar_cursor
+
+TABLA_FTS = table("Tareas_fts", column("rowid"))
+# La columna oculta con el nombre de la tabla: MATCH, bm25() y snippet() la reciben
+TAREAS_FTS = literal_column('"Tareas_fts"')
+
+# bm25: un acierto en el título pesa más que en la descripción (menor = más relevante);
+# id_usuario solo filtra, no puntúa
+PESO_TITULO, PESO_DESCRIPCION, PESO_USUARIO = 10.0, 1.0, 0.0
+MAX_PALABRAS = 10
+
+MAX_RESULTADOS = 1000
+VIGENCIA_MINUTOS = 30
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+_SQL_PURGAR = text("""
+    DELETE FROM "Busquedas_resultados" WHERE creada < datetime('now', :vigencia)
+""")
+_SQL_CONGELAR = text("""
+    INSERT INTO "Busquedas_resultados" (token, posicion, id_usuario, id_tarea)
+    VALUES (:token, :posicion, :id_usuario, :id_tarea)
+""")
+_SQL_PAGINA = text("""
+    SELECT posicion, id_tarea FROM "Busquedas_resultados"
+    WHERE token = :token AND id_usuario = :id_usuario AND posicion > :desde
+      AND creada >= datetime('now', :vigencia)
+    ORDER BY posicion
+    LIMIT :n
+""")
+_SQL_VIGENTE = text("""
+    SELECT 1 FROM "Busquedas_resultados"
+    WHERE token = :token AND id_usuario = :id_usuario AND creada >= datetime('now', :vigencia)
+    LIMIT 1
+""")
+
+
+def consulta_fts(texto: str, id_usuario: int) -> Optional[str]:
+    """
+    'reunión equi' → '{titulo descripcion}: ("reunión" "equi"*) AND id_usuario:"7"'.
+    None si no queda ninguna palabra.
+    """
+    palabras = _PALABRA.findall(texto)[:MAX_PALABRAS]
+    if not palabras:
+        return None
+    terminos = " ".join(f'"{p}"' for p in palabras) + "*"
+    return f'{{titulo descripcion}}: ({terminos}) AND id_usuario:"{int(id_usuario)}"'
+
+
+def rango():
+    return func.bm25(TAREAS_FTS, PESO_TITULO, PESO_DESCRIPCION, PESO_USUARIO)
+
+
+def fragmento(tokens: int = 12):
+    """Fragmento de la columna que más coincide, con las coincidencias entre <b></b>."""
+    return func.snippet(TAREAS_FTS, -1, "<b>", "</b>", "…", tokens)
+
+
+# =====================================================
+# Ranking congelado (paginación estable)
+# =====================================================
+def _vigencia() -> str:
+    return f"-{VIGENCIA_MINUTOS} minutes"
+
+
+def cursor_busqueda(token: str, posicion: int) -> str:
+    return codificar_cursor([token, posicion])
+
+
+def leer_cursor(cursor: str) -> Tuple[str, int]:
+    token, posicion = decodificar_cursor(cursor, 2)
+    # ✅ Validación: (token, posición) y nada más
+    if not isinstance(token, str) or type(posicion) is not int or posicion < 0:
+        raise HTTPException(400, "Cursor inválido")
+    return token, posicion
+
+
+async def congelar(db: AsyncSession, id_usuario: int, ids: Sequence[int]) -> str:
+    """Guarda el orden de `ids` (posiciones desde 1) y devuelve su token."""
+    token = secrets.token_urlsafe(12)
+    await db.execute(_SQL_PURGAR, {"vigencia": _vigencia()})
+    await db.execute(_SQL_CONGELAR, [
+        {"token": token, "posicion": posicion, "id_usuario": id_usuario, "id_tarea": id_tarea}
+        for posicion, id_tarea in enumerate(ids, 1)
+    ])
+    await db.commit()
+    return token
+
+
+async def pagina_congelada(
+    db: AsyncSession, token: str, id_usuario: int, desde: int, n: int,
+) -> List[Tuple[int, int]]:
+    """Hasta `n` pares (posición, id_tarea) tras `desde`. 410 si el token no existe o caducó."""
+    params = {"token": token, "id_usuario": id_usuario, "vigencia": _vigencia()}
+    filas = (await db.execute(_SQL_PAGINA, {**params, "desde": desde, "n": n})).all()
+    if not filas and (await db.execute(_SQL_VIGENTE, params)).first() is None:
+        raise HTTPException(410, "La búsqueda caducó: repítela sin cursor")
+    return [(posicion, id_tarea) for posicion, id_tarea in filas]
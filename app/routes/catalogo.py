@@ -0,0 +1,112 @@
+# app/routes/catalogo.py
+"""
+Caché en memoria del catálogo (Tipos_de_tareas y Modos_de_tareas).
+
+Son tablas pequeñas y casi siempre de lectura: se cargan al arrancar y se
+sirven desde memoria, incluida la respuesta JSON ya serializada con su ETag.
+
+Para detectar cambios hechos por otros workers sin consultar las tablas:
+  1. `PRAGMA data_version` en una conexión propia (sin I/O) indica si alguien
+     hizo commit en la base desde la última revisión;
+  2. solo entonces se lee `Catalogo_version`, que los triggers incrementan en
+     cada escritura del catálogo, y se recarga si cambió.
+Los endpoints de escritura de este worker llaman a `invalidar()`.
+
+La revisión hace E/S y toma un lock: las rutas `async` reciben el catálogo
+con `Depends(obtener_catalogo)`, que FastAPI ejecuta en el threadpool.
+"""
+import json
+import sqlite3
+import threading
+from typing import Optional
+
+from app.database.database import DB_PATH
+from app.routes.etag import etag_de
+
+
+class Catalogo:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._data_version = None
+        self.version = None
+        self.recargas = 0
+
+        self.categorias = []          # list[dict] ordenadas por id
+        self.categorias_por_id = {}
+        self.modos = []
+        self.modos_por_id = {}
+        self.categorias_json = b"[]"
+        self.categorias_etag = etag_de(b"[]")
+        self.modos_json = b"[]"
+        self.modos_etag = etag_de(b"[]")
+
+    def _conexion(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    def _recargar(self, conn: sqlite3.Connection, version: int):
+        categorias = [dict(f) for f in conn.execute(
+            'SELECT id_categoria, nombre, descripcion, color_default FROM "Tipos_de_tareas" ORDER BY id_categoria'
+        )]
+        modos = [dict(f) for f in conn.execute(
+            'SELECT id_modo, nombre, descripcion FROM "Modos_de_tareas" ORDER BY id_modo'
+        )]
+        categorias_json = json.dumps(categorias, ensure_ascii=False, separators=(",", ":")).encode()
+        modos_json = json.dumps(modos, ensure_ascii=False, separators=(",", ":")).encode()
+
+        self.categorias = categorias
+        self.categorias_por_id = {c["id_categoria"]: c for c in categorias}
+        self.categorias_json = categorias_json
+        self.categorias_etag = etag_de(categorias_json)
+        self.modos = modos
+        self.modos_por_id = {m["id_modo"]: m for m in modos}
+        self.modos_json = modos_json
+        self.modos_etag = etag_de(modos_json)
+        self.version = version
+        self.recargas += 1
+
+    def asegurar_vigente(self) -> "Catalogo":
+        """Recarga si otro proceso (o este) cambió el catálogo. Barato si no hubo commits."""
+        with self._lock:
+            conn = self._conexion()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version and self.version is not None:
+                return self
+            self._data_version = data_version
+            # Una sola transacción de lectura: versión y tablas del mismo snapshot
+            conn.execute("BEGIN")
+            try:
+                version = conn.execute('SELECT version FROM "Catalogo_version" WHERE id = 1').fetchone()[0]
+                if version != self.version:
+                    self._recargar(conn, version)
+            finally:
+                conn.execute("COMMIT")
+        return self
+
+    def cargar(self):
+        self.invalidar()
+        self.asegurar_vigente()
+
+    def invalidar(self):
+        with self._lock:
+            self.version = None
+
+    def estadisticas(self) -> dict:
+        return {
+            "version": self.version,
+            "recargas": self.recargas,
+            "categorias": len(self.categorias),
+            "modos": len(self.modos),
+        }
+
+
+catalogo = Catalogo(DB_PATH)
+
+
+def obtener_catalogo() -> Catalogo:
+    """Catálogo vigente. Bloqueante: llamar desde rutas `def` o usar como dependencia."""
+    return catalogo.asegurar_vigente()
@@ -1,11 +1,13 @@
 # app/routes/categorias.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, validator
 from typing import List, Optional
 from app.database.database import get_db
 from app.routes.models import TipoTarea
 from app.routes.auth_utils import validar_id, validar_string, validar_color_hex
+from app.routes.catalogo import obtener_catalogo, catalogo
+from app.routes.etag import responder_json
 
 router = APIRouter(prefix="/categorias", tags=["Categorías"])
 
@@ -79,18 +81,20 @@ class CategoriaUpdate(BaseModel):
 # GET - Todas las categorías
 # -----------------------------
 @router.get("/", response_model=List[CategoriaOut])
-def obtener_categorias(db: Session = Depends(get_db)):
-    return db.query(TipoTarea).all()
+def obtener_categorias(request: Request):
+    # JSON precalculado en la caché del catálogo (304 si el cliente ya lo tiene)
+    cat = obtener_catalogo()
+    return responder_json(request, cat.categorias_json, cat.categorias_etag)
 
 
 # -----------------------------
 # GET - Una categoría por ID
 # -----------------------------
 @router.get("/{id_categoria}", response_model=CategoriaOut)
-def obtener_categoria(id_categoria: int, db: Session = Depends(get_db)):
+def obtener_categoria(id_categoria: int):
     if not validar_id(id_categoria):
         raise HTTPException(400, "ID de categoría inválido")
-    cat = db.query(TipoTarea).filter(TipoTarea.id_categoria == id_categoria).first()
+    cat = obtener_catalogo().categorias_por_id.get(id_categoria)
     if not cat:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return cat
@@ -115,6 +119,7 @@ def crear_categoria(data: CategoriaCreate, db: Session = Depends(get_db)):
 
     db.add(nueva)
     db.commit()
+    catalogo.invalidar()
     db.refresh(nueva)
 
     return nueva
@@ -153,6 +158,7 @@ def actualizar_categoria(
         categoria.color_default = data.color_default
 
     db.commit()
+    catalogo.invalidar()
     db.refresh(categoria)
 
     return categoria
@@ -172,3 +178,4 @@ def eliminar_categoria(id_categoria: int, db: Session = Depends(get_db)):
 
     db.delete(categoria)
     db.commit()
+    catalogo.invalidar()
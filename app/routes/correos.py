@@ -0,0 +1,245 @@
+# app/routes/correos.py
+"""
+Bandeja de salida de correos (tabla Correos_salida, migración 009).
+
+Los endpoints no hablan con el servidor SMTP: `encolar()` agrega la fila en
+la misma transacción que el resto de su trabajo y responden apenas hacen
+commit. El repartidor, en segundo plano:
+  - reclama lotes con UPDATE ... RETURNING (cada correo queda "arrendado" por
+    ARRENDAMIENTO segundos, así varios workers no envían el mismo y uno caído
+    no lo deja bloqueado para siempre);
+  - envía por un pool de CONEXIONES conexiones SMTP que se reutilizan entre
+    lotes y se cierran tras INACTIVIDAD segundos sin uso;
+  - reintenta los errores transitorios con espera exponencial y marca como
+    'fallido' los rechazos permanentes (5xx) o al agotar MAX_INTENTOS.
+
+Usa la configuración de FastMail de auth.py (MAIL_SERVER, MAIL_PORT, ...).
+Para probarlo contra un servidor SMTP local (aiosmtpd, MailHog...) basta con
+MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_TLS=False MAIL_USE_CREDENTIALS=False
+y llamar `await repartidor.entregar_pendientes()`.
+"""
+import asyncio
+import os
+import random
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from typing import List, Optional, Tuple
+
+import aiosmtplib
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.routes.models import CorreoSalida
+from app.routes.servicio_fondo import ServicioFondo
+
+CORREOS_ACTIVOS = os.getenv("CORREOS_ACTIVOS", "true").lower() == "true"
+CONEXIONES = int(os.getenv("CORREOS_CONEXIONES", "2"))
+LOTE = int(os.getenv("CORREOS_LOTE", "50"))
+INTERVALO = float(os.getenv("CORREOS_INTERVALO", "5"))
+INACTIVIDAD = 60          # segundos antes de cerrar una conexión sin uso
+ARRENDAMIENTO = 300       # segundos que un correo reclamado queda reservado
+MAX_INTENTOS = 6
+ESPERA_BASE = 30          # segundos; se duplica en cada intento
+ESPERA_MAXIMA = 3600
+
+_SQL_RECLAMAR = text("""
+    UPDATE "Correos_salida"
+    SET estado = 'enviando', intentos = intentos + 1, bloqueado_hasta = datetime('now', :arrendamiento)
+    WHERE id_correo IN (
+        SELECT id_correo FROM "Correos_salida"
+        WHERE (estado = 'pendiente' AND proximo_intento <= datetime('now'))
+           OR (estado = 'enviando' AND bloqueado_hasta < datetime('now'))
+        ORDER BY id_correo LIMIT :lote
+    )
+    RETURNING id_correo, destinatario, asunto, cuerpo, subtipo, intentos
+""")
+_SQL_ENVIADO = text("""
+    UPDATE "Correos_salida"
+    SET estado = 'enviado', fecha_envio = datetime('now'), bloqueado_hasta = NULL, ultimo_error = NULL
+    WHERE id_correo = :id_correo
+""")
+_SQL_REINTENTO = text("""
+    UPDATE "Correos_salida"
+    SET estado = 'pendiente', proximo_intento = datetime('now', :espera), bloqueado_hasta = NULL, ultimo_error = :error
+    WHERE id_correo = :id_correo
+""")
+_SQL_FALLIDO = text("""
+    UPDATE "Correos_salida"
+    SET estado = 'fallido', bloqueado_hasta = NULL, ultimo_error = :error
+    WHERE id_correo = :id_correo
+""")
+
+# (fila reclamada, error o None, permanente)
+Resultado = Tuple[object, Optional[str], bool]
+
+
+def encolar(db: Session, destinatario: str, asunto: str, cuerpo: str, subtipo: str = "html") -> CorreoSalida:
+    """Agrega el correo a la bandeja. Lo envía el repartidor cuando el llamador hace commit."""
+    correo = CorreoSalida(destinatario=destinatario, asunto=asunto, cuerpo=cuerpo, subtipo=subtipo)
+    db.add(correo)
+    return correo
+
+
+def _es_permanente(error: Exception) -> bool:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(500 <= rechazo.code < 600 for rechazo in error.recipients)
+    # 535 (credenciales) es un problema de configuración: se reintenta
+    return (isinstance(error, aiosmtplib.SMTPResponseException)
+            and not isinstance(error, aiosmtplib.SMTPAuthenticationError)
+            and 500 <= error.code < 600)
+
+
+def _espera(intentos: int) -> int:
+    segundos = min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA)
+    return int(segundos * random.uniform(0.8, 1.2))
+
+
+class RepartidorCorreos(ServicioFondo):
+    NOMBRE = "el repartidor de correos"
+
+    def __init__(self):
+        super().__init__(enviados=0, reintentos=0, fallidos=0, conexiones_abiertas=0)
+        self._conexiones: List[Optional[aiosmtplib.SMTP]] = [None] * max(1, CONEXIONES)
+        self._ultimo_uso = [0.0] * len(self._conexiones)
+
+    # --- Base de datos (en hilo aparte) ---
+    def _reclamar_lote(self) -> list:
+        db = SessionLocal()
+        try:
+            filas = db.execute(_SQL_RECLAMAR, {"arrendamiento": f"+{ARRENDAMIENTO} seconds", "lote": LOTE}).all()
+            db.commit()
+            return filas
+        finally:
+            db.close()
+
+    def _registrar(self, resultados: List[Resultado]):
+        enviados, reintentos, fallidos = [], [], []
+        for correo, error, permanente in resultados:
+            if error is None:
+                enviados.append({"id_correo": correo.id_correo})
+            elif permanente or correo.intentos >= MAX_INTENTOS:
+                fallidos.append({"id_correo": correo.id_correo, "error": error[:500]})
+            else:
+                reintentos.append({"id_correo": correo.id_correo, "error": error[:500],
+                                   "espera": f"+{_espera(correo.intentos)} seconds"})
+        db = SessionLocal()
+        try:
+            for sql, parametros in ((_SQL_ENVIADO, enviados), (_SQL_REINTENTO, reintentos), (_SQL_FALLIDO, fallidos)):
+                if parametros:
+                    db.execute(sql, parametros)
+            db.commit()
+        finally:
+            db.close()
+        self._contadores["enviados"] += len(enviados)
+        self._contadores["reintentos"] += len(reintentos)
+        self._contadores["fallidos"] += len(fallidos)
+
+    # --- SMTP ---
+    def _mensaje(self, correo) -> EmailMessage:
+        from app.routes.auth import conf
+
+        mensaje = EmailMessage()
+        mensaje["From"] = formataddr((conf.MAIL_FROM_NAME or "", conf.MAIL_FROM))
+        mensaje["To"] = correo.destinatario
+        mensaje["Subject"] = correo.asunto
+        mensaje["Date"] = formatdate(localtime=True)
+        mensaje["Message-ID"] = make_msgid(domain=conf.MAIL_FROM.split("@")[-1])
+        mensaje.set_content(correo.cuerpo, subtype=correo.subtipo)
+        return mensaje
+
+    async def _conexion(self, i: int) -> aiosmtplib.SMTP:
+        smtp = self._conexiones[i]
+        if smtp is None or not smtp.is_connected:
+            from app.routes.auth import conf
+
+            smtp = aiosmtplib.SMTP(
+                hostname=conf.MAIL_SERVER,
+                port=conf.MAIL_PORT,
+                username=conf.MAIL_USERNAME if conf.USE_CREDENTIALS else None,
+                password=conf.MAIL_PASSWORD.get_secret_value() if conf.USE_CREDENTIALS else None,
+                use_tls=conf.MAIL_SSL_TLS,
+                start_tls=conf.MAIL_STARTTLS,
+                validate_certs=conf.VALIDATE_CERTS,
+                timeout=conf.TIMEOUT,
+            )
+            await smtp.connect()   # con usuario, también hace login
+            self._conexiones[i] = smtp
+            self._contadores["conexiones_abiertas"] += 1
+        self._ultimo_uso[i] = time.monotonic()
+        return smtp
+
+    async def _cerrar(self, i: int):
+        smtp, self._conexiones[i] = self._conexiones[i], None
+        if smtp is None:
+            return
+        self._contadores["conexiones_abiertas"] -= 1
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _cerrar_inactivas(self):
+        for i, smtp in enumerate(self._conexiones):
+            if smtp is not None and time.monotonic() - self._ultimo_uso[i] > INACTIVIDAD:
+                await self._cerrar(i)
+
+    async def _enviar_por(self, i: int, correos: list) -> List[Resultado]:
+        resultados = []
+        for correo in correos:
+            mensaje = self._mensaje(correo)
+            error, permanente = None, False
+            for reintento_conexion in (True, False):
+                reutilizada = self._conexiones[i] is not None
+                try:
+                    smtp = await self._conexion(i)
+                    await smtp.send_message(mensaje)
+                    error = None
+                    break
+                except Exception as e:
+                    error, permanente = f"{type(e).__name__}: {e}", _es_permanente(e)
+                    if not isinstance(e, OSError):   # respuesta SMTP: la conexión sigue sirviendo
+                        break
+                    await self._cerrar(i)
+                    # El servidor pudo haber cerrado una conexión ociosa: se reintenta una vez con otra
+                    if not (reintento_conexion and reutilizada):
+                        break
+            resultados.append((correo, error, permanente))
+        return resultados
+
+    async def _enviar_lote(self, correos: list) -> List[Resultado]:
+        porciones = [correos[i::len(self._conexiones)] for i in range(len(self._conexiones))]
+        partes = await asyncio.gather(*(self._enviar_por(i, p) for i, p in enumerate(porciones) if p))
+        return [r for parte in partes for r in parte]
+
+    # --- Bucle ---
+    async def entregar_pendientes(self) -> int:
+        """Envía todo lo que ya toca. Retorna cuántos correos procesó (enviados o no)."""
+        procesados = 0
+        while True:
+            correos = await asyncio.to_thread(self._reclamar_lote)
+            if not correos:
+                return procesados
+            resultados = await self._enviar_lote(correos)
+            await asyncio.to_thread(self._registrar, resultados)
+            procesados += len(correos)
+
+    # --- Servicio de fondo (avisar() lo despierta tras encolar) ---
+    def _activo(self) -> bool:
+        return CORREOS_ACTIVOS
+
+    async def _ciclo(self):
+        await self.entregar_pendientes()
+        await self._cerrar_inactivas()
+
+    def _espera(self) -> float:
+        return INTERVALO
+
+    async def _al_detener(self):
+        for i in range(len(self._conexiones)):
+            await self._cerrar(i)
+
+
+repartidor = RepartidorCorreos()
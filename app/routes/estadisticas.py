@@ -1,13 +1,15 @@
 # app/routes/estadisticas.py → VERSIÓN FINAL 100% FUNCIONAL (SIN ERRORES)
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database.database import get_db
-from app.routes.models import Tarea, TipoTarea, Usuario
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_db
+from app.database.estadisticas_rollup import PERIODOS, inicio_bucket
+from app.routes.models import Estadistica, Usuario
+from app.routes.catalogo import Catalogo, obtener_catalogo
 from app.routes.auth import get_current_user
 from pydantic import BaseModel  # ¡AQUÍ ESTABA EL ERROR!
 from typing import List
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, date
 
 router = APIRouter(prefix="/estadisticas", tags=["Estadísticas"])
 
@@ -29,82 +31,91 @@ class ResumenEstadisticas(BaseModel):
     categorias: List[EstadisticaCategoria]
     periodo: str
 
-@router.get("/", response_model=ResumenEstadisticas)
-def obtener_estadisticas(
-    periodo: str = Query("semanal", description="semanal, mensual, anual, todo"),
-    user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    hoy = datetime.now().date()
-    inicio = None
-
-    if periodo == "semanal":
-        inicio = hoy - timedelta(days=hoy.weekday())
-    elif periodo == "mensual":
-        inicio = hoy.replace(day=1)
-    elif periodo == "anual":
-        inicio = hoy.replace(month=1, day=1)
-    elif periodo != "todo":
+SIN_CATEGORIA = {"nombre": "Sin categoría", "color_default": "#95a5a6"}
+
+
+def inicio_periodo(periodo: str) -> date:
+    if periodo not in PERIODOS:
         raise HTTPException(400, "Período inválido")
+    return inicio_bucket(periodo, datetime.now().date())
 
-    query = db.query(Tarea).filter(
-        Tarea.id_usuario == user.id_usuario,
-        Tarea.estado == "completada"
-    )
-    if inicio:
-        query = query.filter(Tarea.fecha >= inicio)
-    tareas = query.all()
-
-    stats = defaultdict(lambda: {"tiempo": 0, "completadas": 0})
-    for t in tareas:
-        cat_id = t.id_categoria or 0
-        duracion = t.duracion_estimada or 0
-        stats[cat_id]["tiempo"] += duracion
-        stats[cat_id]["completadas"] += 1
-
-    categorias_db = {c.id_categoria: c for c in db.query(TipoTarea).all()}
-    categorias_db[0] = type('obj', (), {
-        'nombre': 'Sin categoría',
-        'color_default': '#95a5a6'
-    })()
 
-    categorias_finales = []
-    total_tiempo = total_tareas = 0
+def productividad(completadas: int, minutos: int) -> float:
+    if minutos <= 0:
+        return 0.0
+    return min(round((completadas * 60 / minutos) * 100, 1), 100)
 
-    for cat_id, datos in stats.items():
-        cat = categorias_db.get(cat_id)
-        prod = 0.0
-        if datos["tiempo"] > 0:
-            prod = min(round((datos["completadas"] * 60 / datos["tiempo"]) * 100, 1), 100)
 
+def armar_resumen(filas, periodo: str, cat: Catalogo) -> ResumenEstadisticas:
+    """filas: (categoria_id, tareas_completadas, minutos) por categoría."""
+    categorias_db = cat.categorias_por_id
+    categorias_finales = []
+    for cat_id, completadas, minutos in filas:
+        cat = categorias_db.get(cat_id, SIN_CATEGORIA)
         categorias_finales.append(EstadisticaCategoria(
             categoria_id=cat_id,
-            nombre=cat.nombre,
-            color=cat.color_default,
-            tiempo_invertido=datos["tiempo"],
-            tareas_completadas=datos["completadas"],
-            productividad=prod
+            nombre=cat["nombre"],
+            color=cat["color_default"] or SIN_CATEGORIA["color_default"],
+            tiempo_invertido=minutos,
+            tareas_completadas=completadas,
+            productividad=productividad(completadas, minutos),
         ))
-        total_tiempo += datos["tiempo"]
-        total_tareas += datos["completadas"]
-
     prom = round(sum(c.productividad for c in categorias_finales) / len(categorias_finales), 1) if categorias_finales else 0
 
     return ResumenEstadisticas(
-        total_tiempo_invertido=total_tiempo,
-        total_tareas_completadas=total_tareas,
+        total_tiempo_invertido=sum(c.tiempo_invertido for c in categorias_finales),
+        total_tareas_completadas=sum(c.tareas_completadas for c in categorias_finales),
         productividad_promedio=prom,
         categorias=categorias_finales,
         periodo=periodo.capitalize()
     )
 
+
+async def calcular_resumen(db: AsyncSession, id_usuario: int, periodo: str, cat: Catalogo) -> ResumenEstadisticas:
+    """
+    Totales por categoría leídos de los rollups de `Estadisticas`
+    (O(categorías), sin recorrer las tareas). tiempo_invertido se guarda en
+    segundos de Cronometros y se devuelve en minutos.
+    """
+    inicio = inicio_periodo(periodo)
+
+    query = (
+        select(
+            Estadistica.id_categoria,
+            func.sum(Estadistica.tareas_completadas),
+            func.sum(Estadistica.tiempo_invertido) / 60,
+        )
+        .where(
+            Estadistica.id_usuario == id_usuario,
+            Estadistica.periodo == periodo,
+            Estadistica.fecha_inicio >= inicio,
+        )
+        .group_by(Estadistica.id_categoria)
+        .having(func.sum(Estadistica.tareas_completadas) > 0)
+        .order_by(Estadistica.id_categoria)
+    )
+
+    filas = (await db.execute(query)).all()
+    return armar_resumen(filas, periodo, cat)
+
+
+@router.get("/", response_model=ResumenEstadisticas)
+async def obtener_estadisticas(
+    periodo: str = Query("semanal", description="semanal, mensual, anual, todo"),
+    user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cat: Catalogo = Depends(obtener_catalogo),
+):
+    return await calcular_resumen(db, user.id_usuario, periodo, cat)
+
 @router.get("/grafico")
-def grafico(user: Usuario = Depends(get_current_user), db: Session = Depends(get_db), periodo: str = "semanal"):
-    data = obtener_estadisticas(periodo, user, db)
+async def grafico(user: Usuario = Depends(get_current_user), db: AsyncSession = Depends(get_async_db), periodo: str = "semanal",
+                  cat: Catalogo = Depends(obtener_catalogo)):
+    data = await calcular_resumen(db, user.id_usuario, periodo, cat)
     return {
         "labels": [c.nombre for c in data.categorias],
         "tiempo": [c.tiempo_invertido for c in data.categorias],
         "tareas": [c.tareas_completadas for c in data.categorias],
-        "colores": [c.color for c in data.categoria],
+        "colores": [c.color for c in data.categorias],
         "productividad": [c.productividad for c in data.categorias]
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,35 @@
+# app/routes/etag.py
+"""Respuestas JSON precalculadas con ETag y GET condicional (304)."""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_de(contenido: bytes) -> str:
+    return '"' + hashlib.blake2b(contenido, digest_size=12).hexdigest() + '"'
+
+
+def coincide_etag(request: Request, etag: str) -> bool:
+    """True si el cliente ya tiene esta versión (If-None-Match)."""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    etiquetas = [e.strip().removeprefix("W/") for e in cabecera.split(",")]
+    return etag.removeprefix("W/") in etiquetas
+
+
+def no_modificado(etag: str, cache_control: str = "no-cache") -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def responder_json(request: Request, contenido: bytes, etag: str) -> Response:
+    """Devuelve `contenido` (JSON ya serializado) o 304 si el ETag coincide."""
+    if coincide_etag(request, etag):
+        return no_modificado(etag)
+    return Response(
+        content=contenido,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,105 @@
+# app/routes/eventos.py
+"""
+Bus de eventos de dominio dentro del proceso.
+
+Los endpoints llaman `bus.emitir(...)` después de su commit: solo se agrega
+el evento a una cola (seguro desde cualquier hilo) y la petición sigue. Una
+tarea de fondo vacía la cola por lotes y entrega a cada suscriptor los
+eventos de sus tipos, en un hilo aparte, para que pueda agruparlos en una
+sola transacción.
+
+Es un bus en memoria: si el proceso cae, los eventos aún en cola se pierden
+(nunca antes de que el cambio que los origina esté confirmado).
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, List
+
+from app.routes.servicio_fondo import ServicioFondo
+
+logger = logging.getLogger(__name__)
+
+LOTE = 500
+
+# Tipos emitidos hoy
+TAREA_COMPLETADA = "tarea_completada"
+TAREA_REABIERTA = "tarea_reabierta"
+# Solo para el progreso de metas (no son logros): una tarea ya completada que
+# se borra, que cambia de fecha/categoría/prioridad, o que llega importada
+TAREA_ELIMINADA = "tarea_eliminada"
+TAREA_MOVIDA = "tarea_movida"
+TAREAS_IMPORTADAS = "tareas_importadas"
+META_CUMPLIDA = "meta_cumplida"
+META_REABIERTA = "meta_reabierta"
+RACHA = "racha"
+
+
+@dataclass
+class Evento:
+    tipo: str
+    id_usuario: int
+    datos: dict = field(default_factory=dict)
+    momento: datetime = field(default_factory=datetime.now)
+
+
+Manejador = Callable[[List[Evento]], None]
+
+
+class BusEventos(ServicioFondo):
+    NOMBRE = "el bus de eventos"
+    DRENAR_AL_DETENER = True   # al detener, entrega lo que quedó en cola
+
+    def __init__(self):
+        super().__init__(emitidos=0, entregados=0)
+        self._cola: Deque[Evento] = deque()
+        self._suscriptores: Dict[str, List[Manejador]] = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, tipos, manejador: Manejador):
+        """`manejador(eventos)` recibe lotes (en un hilo) con los eventos de `tipos`."""
+        for tipo in tipos:
+            self._suscriptores.setdefault(tipo, []).append(manejador)
+
+    def emitir(self, tipo: str, id_usuario: int, **datos):
+        self._cola.append(Evento(tipo, id_usuario, datos))   # deque.append es atómico
+        with self._lock:
+            self._contadores["emitidos"] += 1
+        self.avisar()
+
+    def _tomar_lote(self) -> List[Evento]:
+        lote = []
+        while self._cola and len(lote) < LOTE:
+            lote.append(self._cola.popleft())
+        return lote
+
+    async def procesar_pendientes(self) -> int:
+        """Entrega todo lo encolado (incluye lo que emitan los propios suscriptores)."""
+        procesados = 0
+        while self._cola:
+            lote = self._tomar_lote()
+            por_manejador: Dict[Manejador, List[Evento]] = {}
+            for evento in lote:
+                for manejador in self._suscriptores.get(evento.tipo, ()):
+                    por_manejador.setdefault(manejador, []).append(evento)
+            for manejador, eventos in por_manejador.items():
+                try:
+                    await asyncio.to_thread(manejador, eventos)
+                    self._contadores["entregados"] += len(eventos)
+                except Exception:
+                    self._contadores["errores"] += 1
+                    logger.exception("Error en el suscriptor %s (%d eventos)", manejador.__name__, len(eventos))
+            procesados += len(lote)
+        return procesados
+
+    async def _ciclo(self):
+        await self.procesar_pendientes()
+
+    def estadisticas(self) -> dict:
+        return {"en_cola": len(self._cola), **self._contadores}
+
+
+bus = BusEventos()
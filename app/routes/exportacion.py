@@ -0,0 +1,83 @@
+# app/routes/exportacion.py
+"""
+Exportaciones completas en NDJSON o CSV con StreamingResponse.
+
+El generador abre su propia sesión (la de `get_db` se cierra antes de que
+empiece a enviarse el cuerpo) y lee con un cursor del lado del servidor
+(`stream_results` + `yield_per`): en memoria solo vive un bloque de filas,
+sin importar cuántas tenga la exportación, y el primer bloque sale en
+cuanto la base devuelve las primeras filas.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.database.database import SessionLocal
+
+FILAS_POR_BLOQUE = 1000
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def id_usuario_exportacion(user, usuario: Optional[int]) -> int:
+    """El usuario exporta lo suyo; un admin puede indicar otro con ?usuario=."""
+    if usuario is None or usuario == user.id_usuario:
+        return user.id_usuario
+    if user.id_rol != 1:
+        raise HTTPException(403, "Solo un administrador puede exportar datos de otro usuario")
+    return usuario
+
+
+def _bloques(consulta):
+    db = SessionLocal()
+    try:
+        resultado = db.execute(consulta.execution_options(stream_results=True, yield_per=FILAS_POR_BLOQUE))
+        for bloque in resultado.partitions():
+            yield bloque
+    finally:
+        db.close()
+
+
+def _celda(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def generar_ndjson(consulta):
+    for bloque in _bloques(consulta):
+        yield b"".join(orjson.dumps(fila._asdict()) + b"\n" for fila in bloque)
+
+
+def generar_csv(consulta):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([c.name for c in consulta.selected_columns])
+    for bloque in _bloques(consulta):
+        escritor.writerows([_celda(v) for v in fila] for fila in bloque)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Exportación vacía: solo el encabezado
+        yield buffer.getvalue().encode()
+
+
+def respuesta_exportacion(consulta, formato: str, nombre: str) -> StreamingResponse:
+    """`consulta` es un select() de columnas, ya filtrado y ordenado."""
+    if formato not in FORMATOS:
+        raise HTTPException(400, "Formato inválido. Usa: ndjson o csv")
+    generador = generar_ndjson(consulta) if formato == "ndjson" else generar_csv(consulta)
+    return StreamingResponse(
+        generador,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
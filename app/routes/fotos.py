@@ -0,0 +1,399 @@
+# app/routes/fotos.py
+"""
+Almacenamiento de fotos de perfil por contenido.
+
+La subida se lee del cuerpo de la petición a medida que llega (multipart en
+streaming): cada bloque se escribe a un temporal desde un hilo y se va
+calculando el SHA-256, y se corta apenas se pasa de MAX_BYTES o los primeros
+bytes no son de una imagen. Al terminar, el temporal se renombra
+atómicamente a `uploads/fotos/<sha256>.<ext>`: dos subidas iguales comparten
+archivo y un lector nunca ve uno a medio escribir.
+
+Como el nombre es el hash del contenido, GET /uploads/fotos/<sha256>.<ext>
+nunca cambia: se sirve con caché inmutable de un año, ETag = hash, soporte de
+peticiones condicionales y Range, y `?ancho=` para miniaturas (miniaturas.py).
+
+Los archivos que ya no usa ningún usuario se borran con `recolectar()`
+(pasada una gracia, por si otra subida los está reutilizando):
+
+    python -m app.routes.fotos recolectar
+"""
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from app.routes.miniaturas import DIRECTORIO_MINIATURAS, obtener_miniatura
+from app.routes.models import Usuario
+
+DIRECTORIO_UPLOADS = "uploads"
+DIRECTORIO_FOTOS = os.path.join(DIRECTORIO_UPLOADS, "fotos")
+DIRECTORIO_TEMPORAL = os.path.join(DIRECTORIO_UPLOADS, "tmp")   # mismo disco: el rename es atómico
+MAX_BYTES = 5 * 1024 * 1024
+CAMPO = "foto"
+# Un archivo sin referencias se conserva al menos esto (segundos) antes de borrarlo
+GRACIA_RECOLECCION = 10 * 60
+
+# Firma (bytes iniciales) → extensión. WebP: "RIFF" + tamaño + "WEBP".
+_FIRMAS = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+BYTES_FIRMA = 12
+
+
+def detectar_tipo(cabecera: bytes) -> Optional[str]:
+    """Extensión según los primeros bytes, o None si no es JPEG, PNG, GIF ni WebP."""
+    for firma, extension in _FIRMAS:
+        if cabecera.startswith(firma):
+            return extension
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _tipo_o_error(cabecera: bytes) -> str:
+    extension = detectar_tipo(cabecera)
+    if extension is None:
+        raise HTTPException(400, "Solo se permiten imágenes (JPEG, PNG, GIF, WebP)")
+    return extension
+
+
+def ruta_foto(nombre: str) -> str:
+    return os.path.join(DIRECTORIO_FOTOS, nombre)
+
+
+class _ReceptorFoto:
+    """Callbacks del parser multipart: solo guarda el cuerpo de la parte CAMPO."""
+
+    def __init__(self):
+        self.pendiente = bytearray()   # datos del bloque actual, aún sin escribir
+        self.encontrada = False
+        self._en_foto = False
+        self._cabecera = b""
+        self._valor = b""
+        self._disposicion = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._inicio_parte,
+            "on_header_field": lambda d, i, f: setattr(self, "_cabecera", self._cabecera + d[i:f]),
+            "on_header_value": lambda d, i, f: setattr(self, "_valor", self._valor + d[i:f]),
+            "on_header_end": self._fin_cabecera,
+            "on_headers_finished": self._fin_cabeceras,
+            "on_part_data": self._datos,
+            "on_part_end": self._fin_parte,
+        }
+
+    def _inicio_parte(self):
+        self._disposicion = b""
+
+    def _fin_cabecera(self):
+        if self._cabecera.lower() == b"content-disposition":
+            self._disposicion = self._valor
+        self._cabecera = self._valor = b""
+
+    def _fin_cabeceras(self):
+        _, opciones = parse_options_header(self._disposicion)
+        self._en_foto = opciones.get(b"name") == CAMPO.encode() and not self.encontrada
+
+    def _datos(self, datos, inicio, fin):
+        if self._en_foto:
+            self.pendiente += datos[inicio:fin]
+
+    def _fin_parte(self):
+        if self._en_foto:
+            self.encontrada = True
+        self._en_foto = False
+
+
+async def recibir_foto(request: Request) -> Tuple[str, str]:
+    """
+    Lee el campo `foto` del multipart sin cargarlo en memoria.
+    Retorna (ruta del temporal, nombre definitivo '<sha256>.<ext>').
+    """
+    tipo, opciones = parse_options_header(request.headers.get("content-type", ""))
+    if tipo != b"multipart/form-data" or b"boundary" not in opciones:
+        raise HTTPException(400, "Envía la imagen como multipart/form-data en el campo 'foto'")
+    # ✅ Validación: tamaño declarado (el multipart agrega unos pocos KB)
+    largo = request.headers.get("content-length")
+    if largo and largo.isdigit() and int(largo) > MAX_BYTES + 64 * 1024:
+        raise HTTPException(400, "La imagen no puede exceder 5MB")
+
+    os.makedirs(DIRECTORIO_TEMPORAL, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=DIRECTORIO_TEMPORAL, suffix=".part")
+    archivo = os.fdopen(descriptor, "wb")
+    receptor = _ReceptorFoto()
+    parser = MultipartParser(opciones[b"boundary"], receptor.callbacks())
+    sha = hashlib.sha256()
+    total = 0
+    cabecera = b""
+    extension = None
+    try:
+        async for bloque in request.stream():
+            parser.write(bloque)
+            if not receptor.pendiente:
+                continue
+            datos, receptor.pendiente = bytes(receptor.pendiente), bytearray()
+            if extension is None:
+                # ✅ Validación: contenido real de imagen (no se confía en content_type)
+                cabecera = (cabecera + datos)[:BYTES_FIRMA]
+                if len(cabecera) == BYTES_FIRMA:
+                    extension = _tipo_o_error(cabecera)
+            total += len(datos)
+            # ✅ Validación: tamaño máximo, cortando la subida apenas se supera
+            if total > MAX_BYTES:
+                raise HTTPException(400, "La imagen no puede exceder 5MB")
+            sha.update(datos)
+            await run_in_threadpool(archivo.write, datos)
+        parser.finalize()
+        if not receptor.encontrada or total == 0:
+            raise HTTPException(400, "Falta el archivo en el campo 'foto'")
+        if extension is None:
+            extension = _tipo_o_error(cabecera)
+        await run_in_threadpool(_cerrar_sincronizado, archivo)
+    except BaseException:
+        archivo.close()
+        os.unlink(temporal)
+        raise
+    return temporal, f"{sha.hexdigest()}.{extension}"
+
+
+def _cerrar_sincronizado(archivo):
+    archivo.flush()
+    os.fsync(archivo.fileno())
+    archivo.close()
+
+
+def guardar_foto(temporal: str, nombre: str) -> str:
+    """Mueve el temporal a su ruta por contenido (o lo descarta si ya existe). Retorna la ruta."""
+    os.makedirs(DIRECTORIO_FOTOS, exist_ok=True)
+    destino = ruta_foto(nombre)
+    try:
+        os.utime(destino)   # ya existe: renueva la gracia frente a recolectar()
+        os.unlink(temporal)
+    except FileNotFoundError:
+        os.replace(temporal, destino)
+    return destino
+
+
+def _sin_referencias(db: Session, ruta: str) -> bool:
+    return db.execute(select(Usuario.id_usuario).where(Usuario.foto_perfil == ruta).limit(1)).first() is None
+
+
+def _viejo(ruta: str, ahora: float, gracia: float) -> bool:
+    try:
+        return ahora - os.stat(ruta).st_mtime > gracia
+    except FileNotFoundError:
+        return False
+
+
+def descartar_foto(db: Session, ruta: Optional[str], gracia: float = GRACIA_RECOLECCION) -> bool:
+    """Borra la foto anterior de un usuario si nadie más la usa. Las recientes quedan para recolectar()."""
+    if not ruta or not ruta.startswith(DIRECTORIO_UPLOADS + "/") or not os.path.isfile(ruta):
+        return False
+    if not _sin_referencias(db, ruta) or not _viejo(ruta, time.time(), gracia):
+        return False
+    os.unlink(ruta)
+    _borrar_miniaturas(os.path.basename(ruta).split(".")[0])
+    return True
+
+
+def _borrar_miniaturas(sha: str):
+    if not os.path.isdir(DIRECTORIO_MINIATURAS):
+        return
+    for entrada in os.scandir(DIRECTORIO_MINIATURAS):
+        if entrada.name.startswith(sha + "_"):
+            os.unlink(entrada.path)
+
+
+def recolectar(db: Session, gracia: float = GRACIA_RECOLECCION) -> int:
+    """Borra fotos sin referencias y temporales abandonados. Retorna cuántos archivos borró."""
+    en_uso = {r for (r,) in db.execute(select(Usuario.foto_perfil).where(Usuario.foto_perfil.isnot(None)))}
+    ahora = time.time()
+    borrados = 0
+    for directorio in (DIRECTORIO_FOTOS, DIRECTORIO_TEMPORAL, DIRECTORIO_UPLOADS):
+        if not os.path.isdir(directorio):
+            continue
+        for entrada in os.scandir(directorio):
+            ruta = os.path.join(directorio, entrada.name)
+            if entrada.is_file() and ruta not in en_uso and _viejo(ruta, ahora, gracia):
+                os.unlink(ruta)
+                borrados += 1
+    # Miniaturas cuyo original ya no existe (y temporales abandonados)
+    if os.path.isdir(DIRECTORIO_MINIATURAS):
+        originales = {n.split(".")[0] for n in os.listdir(DIRECTORIO_FOTOS)} if os.path.isdir(DIRECTORIO_FOTOS) else set()
+        for entrada in os.scandir(DIRECTORIO_MINIATURAS):
+            huerfana = entrada.name.split("_")[0] not in originales or entrada.name.endswith(".part")
+            if huerfana and _viejo(entrada.path, ahora, gracia):
+                os.unlink(entrada.path)
+                borrados += 1
+    return borrados
+
+
+# ======================= SERVIR =======================
+router = APIRouter(prefix="/uploads", tags=["Fotos"])
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "public, no-cache"
+BLOQUE_ENVIO = 256 * 1024
+_NOMBRE_FOTO = re.compile(r"^[0-9a-f]{64}\.(jpg|png|gif|webp)$")
+_TIPOS = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RespuestaArchivo(Response):
+    """
+    Envía `count` bytes de un archivo desde `offset`. Si el servidor ASGI
+    ofrece la extensión http.response.zerocopysend se usa sendfile; si no,
+    se lee por bloques desde un hilo (nunca el archivo entero en memoria).
+    """
+
+    def __init__(self, ruta: str, offset: int, count: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(status_code=status_code, headers={**headers, "content-length": str(count)}, media_type=media_type)
+        self.ruta, self.offset, self.count = ruta, offset, count
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        descriptor = await anyio.to_thread.run_sync(os.open, self.ruta, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": descriptor,
+                            "offset": self.offset, "count": self.count})
+                return
+            posicion, fin = self.offset, self.offset + self.count
+            while posicion < fin:
+                datos = await anyio.to_thread.run_sync(os.pread, descriptor, min(BLOQUE_ENVIO, fin - posicion), posicion)
+                if not datos:
+                    break
+                posicion += len(datos)
+                await send({"type": "http.response.body", "body": datos, "more_body": posicion < fin})
+        finally:
+            os.close(descriptor)
+
+
+def _etag_coincide(cabecera: str, etag: str) -> bool:
+    # Comparación débil (RFC 9110 §13.1.2): W/"x" equivale a "x"
+    etiquetas = [e.strip().removeprefix("W/") for e in cabecera.split(",")]
+    return "*" in etiquetas or etag.removeprefix("W/") in etiquetas
+
+
+def _sin_cambios(request: Request, etag: str, modificado: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_coincide(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modificado) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _rango(request: Request, etag: str, tamano: int):
+    """(inicio, fin inclusive) pedido por Range; None = archivo completo; False = insatisfacible."""
+    cabecera = request.headers.get("range")
+    if not cabecera:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:   # el cliente tiene otra versión: va completo
+        return None
+    coincidencia = _RANGO.match(cabecera.strip())
+    if not coincidencia or coincidencia.groups() == ("", ""):
+        return None   # varios rangos o sintaxis desconocida: se ignora (RFC 9110 §14.2)
+    desde, hasta = coincidencia.groups()
+    if desde == "":
+        inicio, fin = max(0, tamano - int(hasta)), tamano - 1
+    else:
+        inicio, fin = int(desde), min(int(hasta), tamano - 1) if hasta else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
+
+
+async def servir_archivo(request: Request, ruta: str, etag: str, cache_control: str) -> Response:
+    try:
+        estado = await anyio.to_thread.run_sync(os.stat, ruta)
+    except FileNotFoundError:
+        raise HTTPException(404, "Foto no encontrada")
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(estado.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+    if _sin_cambios(request, etag, estado.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    tipo = _TIPOS.get(ruta.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+    rango = _rango(request, etag, estado.st_size)
+    if rango is False:
+        return Response(status_code=416, headers={**headers, "content-range": f"bytes */{estado.st_size}"})
+    if rango is None:
+        return RespuestaArchivo(ruta, 0, estado.st_size, 200, headers, tipo)
+    inicio, fin = rango
+    headers["content-range"] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    return RespuestaArchivo(ruta, inicio, fin - inicio + 1, 206, headers, tipo)
+
+
+@router.api_route("/fotos/{nombre}", methods=["GET", "HEAD"])
+async def ver_foto(
+    nombre: str,
+    request: Request,
+    ancho: Optional[int] = Query(None, description="Miniatura de este ancho máximo (64, 128, 256 o 512)"),
+):
+    # ✅ Validación: solo nombres por contenido (evita recorrer rutas)
+    if not _NOMBRE_FOTO.match(nombre):
+        raise HTTPException(404, "Foto no encontrada")
+    ruta = ruta_foto(nombre)
+    sha = nombre.split(".")[0]
+    if ancho is None:
+        return await servir_archivo(request, ruta, f'"{sha}"', CACHE_INMUTABLE)
+    if not os.path.exists(ruta):
+        raise HTTPException(404, "Foto no encontrada")
+    miniatura = await obtener_miniatura(ruta, nombre, ancho)
+    return await servir_archivo(request, miniatura, f'"{sha}-{ancho}"', CACHE_INMUTABLE)
+
+
+@router.api_route("/{nombre}", methods=["GET", "HEAD"])
+async def ver_foto_anterior(nombre: str, request: Request):
+    """Fotos subidas antes del almacenamiento por contenido (`uploads/<id>_<archivo>`)."""
+    ruta = os.path.join(DIRECTORIO_UPLOADS, nombre)
+    if os.path.basename(nombre) != nombre or nombre.startswith(".") or not os.path.isfile(ruta):
+        raise HTTPException(404, "Foto no encontrada")
+    estado = await anyio.to_thread.run_sync(os.stat, ruta)
+    # El nombre no identifica el contenido: se revalida siempre
+    etag = f'W/"{int(estado.st_mtime)}-{estado.st_size}"'
+    return await servir_archivo(request, ruta, etag, CACHE_REVALIDAR)
+
+
+if __name__ == "__main__":
+    from app.database.database import SessionLocal
+
+    comando = sys.argv[1] if len(sys.argv) > 1 else ""
+    if comando != "recolectar":
+        print("Uso: python -m app.routes.fotos recolectar")
+        sys.exit(2)
+    db = SessionLocal()
+    try:
+        print(f"{recolectar(db)} archivos borrados")
+    finally:
+        db.close()
@@ -0,0 +1,153 @@
+# app/routes/importacion.py
+"""
+Lectores incrementales para importar tareas desde CSV o iCalendar (.ics).
+
+Ambos recorren el archivo subido línea a línea (nunca lo cargan entero) y
+producen `(numero_de_fila, dict)` con las claves de TareaCreate; la
+validación y la inserción por bloques quedan en tareas.py.
+"""
+import csv
+import io
+import re
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+
+FORMATOS_IMPORTACION = ("csv", "ics")
+
+# Columnas aceptadas en el CSV (las mismas que /tareas/export; id_tarea se ignora)
+COLUMNAS_CSV = (
+    "titulo", "descripcion", "fecha", "hora", "id_categoria",
+    "prioridad", "estado", "etiqueta_color", "recordatorio_minutos",
+)
+
+Fila = Tuple[int, dict]
+
+
+def detectar_formato(formato: Optional[str], nombre_archivo: Optional[str]) -> str:
+    if formato:
+        formato = formato.strip().lower()
+    elif nombre_archivo and "." in nombre_archivo:
+        formato = nombre_archivo.rsplit(".", 1)[1].lower()
+    if formato not in FORMATOS_IMPORTACION:
+        raise HTTPException(400, "Formato inválido. Usa un archivo .csv o .ics (o ?format=csv|ics)")
+    return formato
+
+
+def _texto(archivo: BinaryIO) -> io.TextIOWrapper:
+    return io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="replace", newline="")
+
+
+# ======================= CSV =======================
+def leer_csv(archivo: BinaryIO) -> Iterator[Fila]:
+    lector = csv.DictReader(_texto(archivo))
+    if not lector.fieldnames or "titulo" not in [c.strip().lower() for c in lector.fieldnames]:
+        raise HTTPException(400, "El CSV debe tener encabezado con al menos la columna 'titulo'")
+    for registro in lector:
+        datos = {}
+        for clave, valor in registro.items():
+            if clave is None:
+                continue  # columnas sobrantes en la fila
+            clave = clave.strip().lower()
+            if clave == "categoria":
+                clave = "id_categoria"
+            if clave in COLUMNAS_CSV and valor is not None and valor.strip() != "":
+                datos[clave] = valor.strip()
+        # line_num cuenta líneas físicas (incluye el encabezado)
+        yield lector.line_num, datos
+
+
+# ======================= iCalendar =======================
+_PRIORIDAD_ICS = {**{n: "alta" for n in range(1, 5)}, 5: "media", **{n: "baja" for n in range(6, 10)}}
+_DURACION_ALARMA = re.compile(r"^-?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$")
+
+
+def _lineas_desplegadas(archivo: BinaryIO) -> Iterator[str]:
+    """Une las líneas continuadas (RFC 5545 §3.1: empiezan con espacio o tab)."""
+    actual = None
+    for linea in _texto(archivo):
+        linea = linea.rstrip("\r\n")
+        if linea[:1] in (" ", "\t") and actual is not None:
+            actual += linea[1:]
+            continue
+        if actual is not None:
+            yield actual
+        actual = linea
+    if actual:
+        yield actual
+
+
+def _desescapar(valor: str) -> str:
+    return (valor.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _fecha_hora_ics(valor: str) -> Tuple[Optional[str], Optional[str]]:
+    """'20250115' o '20250115T093000[Z]' → ('2025-01-15', '09:30'). Sin conversión de zona."""
+    valor = valor.strip()
+    if len(valor) < 8 or not valor[:8].isdigit():
+        return None, None
+    fecha = f"{valor[:4]}-{valor[4:6]}-{valor[6:8]}"
+    hora = f"{valor[9:11]}:{valor[11:13]}" if len(valor) >= 13 and valor[8] == "T" else None
+    return fecha, hora
+
+
+def _minutos_alarma(valor: str) -> Optional[int]:
+    """TRIGGER relativo ('-PT15M', '-P1D') → minutos antes del inicio."""
+    coincidencia = _DURACION_ALARMA.match(valor.strip())
+    if not coincidencia or not valor.strip().startswith("-"):
+        return None
+    semanas, dias, horas, minutos = (int(g or 0) for g in coincidencia.groups())
+    return ((semanas * 7 + dias) * 24 + horas) * 60 + minutos
+
+
+def leer_ics(archivo: BinaryIO) -> Iterator[Fila]:
+    """Cada VEVENT o VTODO es una fila, numerada por orden de aparición."""
+    numero = 0
+    componente = None   # dict del VEVENT/VTODO en curso
+    en_alarma = False
+    for linea in _lineas_desplegadas(archivo):
+        nombre, _, valor = linea.partition(":")
+        nombre, _, _parametros = nombre.partition(";")
+        nombre = nombre.upper()
+
+        if nombre == "BEGIN" and valor.upper() in ("VEVENT", "VTODO"):
+            componente = {}
+        elif componente is None:
+            continue
+        elif nombre == "BEGIN" and valor.upper() == "VALARM":
+            en_alarma = True
+        elif nombre == "END" and valor.upper() == "VALARM":
+            en_alarma = False
+        elif en_alarma:
+            if nombre == "TRIGGER" and "recordatorio_minutos" not in componente:
+                minutos = _minutos_alarma(valor)
+                if minutos is not None:
+                    componente["recordatorio_minutos"] = minutos
+        elif nombre == "END" and valor.upper() in ("VEVENT", "VTODO"):
+            numero += 1
+            yield numero, componente
+            componente = None
+        elif nombre == "SUMMARY":
+            componente["titulo"] = _desescapar(valor).strip()
+        elif nombre == "DESCRIPTION":
+            componente["descripcion"] = _desescapar(valor).strip() or None
+        elif nombre == "DTSTART" or (nombre == "DUE" and "fecha" not in componente):
+            fecha, hora = _fecha_hora_ics(valor)
+            if fecha:
+                componente["fecha"] = fecha
+                if hora:
+                    componente["hora"] = hora
+        elif nombre == "PRIORITY" and valor.strip().isdigit():
+            prioridad = _PRIORIDAD_ICS.get(int(valor))
+            if prioridad:
+                componente["prioridad"] = prioridad
+        elif nombre == "STATUS" and valor.strip().upper() == "COMPLETED":
+            componente["estado"] = "completada"
+        elif nombre == "COLOR" and valor.strip().startswith("#"):
+            # RFC 7986 usa nombres CSS; solo se conservan los hexadecimales
+            componente["etiqueta_color"] = valor.strip()
+
+
+def leer_filas(archivo: BinaryIO, formato: str) -> Iterator[Fila]:
+    return leer_csv(archivo) if formato == "csv" else leer_ics(archivo)
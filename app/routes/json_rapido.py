@@ -0,0 +1,45 @@
+# app/routes/json_rapido.py
+"""
+Camino rápido de serialización para listados grandes.
+
+Los listados seleccionan solo las columnas del modelo de salida (filas Core,
+sin instanciar objetos ORM) y las serializan en una sola pasada con orjson.
+Se devuelve una Response ya armada, así FastAPI no re-valida cada fila con
+el `response_model`; el `response_model` se mantiene para el esquema OpenAPI.
+"""
+from typing import Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def columnas_de(modelo, esquema: Type[BaseModel], **reemplazos) -> list:
+    """
+    Columnas de `modelo` (ORM) con los campos de `esquema`, en el mismo orden.
+    `reemplazos` permite dar una expresión SQL propia a un campo (con su label).
+    """
+    return [
+        reemplazos[campo].label(campo) if campo in reemplazos else getattr(modelo, campo)
+        for campo in esquema.model_fields
+    ]
+
+
+def filas_a_dicts(filas) -> list:
+    return [fila._asdict() for fila in filas]
+
+
+def respuesta_json(contenido, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """
+    JSON serializado con orjson. Si se pasa la `response` inyectada en la
+    ruta, se copian sus cabeceras (ETag, Cache-Control...).
+    """
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(
+        content=orjson.dumps(contenido),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
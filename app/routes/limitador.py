@@ -0,0 +1,191 @@
+# app/routes/limitador.py
+"""
+Límite de peticiones (token bucket) para los endpoints de auth sin sesión.
+
+Cada regla tiene una cubeta por IP y, si aplica, otra por cuenta (correo):
+la cubeta admite una ráfaga de `capacidad` peticiones y se recarga a
+`por_minuto`. Los endpoints llaman `limitador.comprobar(...)` antes de tocar
+la base o bcrypt, así un ataque de credential stuffing se corta con un 429
+que cuesta un diccionario en memoria, no un hash.
+
+El estado vive en memoria del proceso (LRU acotada a MAX_CLAVES). Con varios
+workers de uvicorn cada uno tendría sus propias cubetas; LIMITES_SQLITE=ruta
+las comparte en un archivo SQLite aparte (no la base de la app, para no
+competir por su lock de escritura): un UPSERT ... RETURNING por comprobación.
+
+La IP es `request.client.host`: detrás de un proxy hay que arrancar uvicorn
+con --forwarded-allow-ips para que tome la de X-Forwarded-For.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+LIMITES_ACTIVOS = os.getenv("LIMITES_ACTIVOS", "true").lower() == "true"
+LIMITES_SQLITE = os.getenv("LIMITES_SQLITE", "")   # vacío = solo memoria
+MAX_CLAVES = int(os.getenv("LIMITES_MAX_CLAVES", "100000"))
+LIMPIEZA_CADA = 1000   # comprobaciones entre limpiezas de cubetas llenas en SQLite
+
+
+@dataclass(frozen=True)
+class Limite:
+    capacidad: int      # ráfaga máxima
+    por_minuto: float   # fichas que se recuperan por minuto
+
+    @property
+    def por_segundo(self) -> float:
+        return self.por_minuto / 60
+
+
+# (regla, alcance) → límite
+LIMITES = {
+    ("login", "ip"): Limite(20, 10),
+    ("login", "cuenta"): Limite(5, 1),
+    ("recover-password", "ip"): Limite(5, 1),
+    ("recover-password", "cuenta"): Limite(2, 1 / 15),
+    ("reset-password", "ip"): Limite(10, 2),
+}
+# Tiempo que tarda en llenarse la cubeta más lenta: pasado eso, una cubeta equivale a no tenerla
+_RECARGA_MAXIMA = max(l.capacidad / l.por_segundo for l in LIMITES.values())
+
+_SQL_CREAR = """
+    CREATE TABLE IF NOT EXISTS "Limites_peticion" (
+        clave TEXT PRIMARY KEY,
+        fichas REAL NOT NULL,
+        actualizado REAL NOT NULL
+    ) WITHOUT ROWID
+"""
+# Sin fila de vuelta = no alcanzó la ficha (el WHERE descarta el UPDATE)
+_SQL_CONSUMIR = """
+    INSERT INTO "Limites_peticion" (clave, fichas, actualizado) VALUES (:clave, :capacidad - 1, :ahora)
+    ON CONFLICT (clave) DO UPDATE SET
+        fichas = MIN(:capacidad, fichas + (:ahora - actualizado) * :ritmo) - 1,
+        actualizado = :ahora
+    WHERE MIN(:capacidad, fichas + (:ahora - actualizado) * :ritmo) >= 1
+    RETURNING fichas
+"""
+_SQL_FICHAS = """
+    SELECT MIN(:capacidad, fichas + (:ahora - actualizado) * :ritmo) FROM "Limites_peticion" WHERE clave = :clave
+"""
+
+
+class Limitador:
+    def __init__(self, ruta_sqlite: str = ""):
+        self.ruta_sqlite = ruta_sqlite
+        self._cubetas: "OrderedDict[str, list]" = OrderedDict()   # clave → [fichas, actualizado]
+        self._lock = threading.Lock()
+        self._local = threading.local()   # una conexión SQLite por hilo
+        self._llamadas = 0
+        self._contadores = {
+            f"{regla}:{alcance}": {"admitidas": 0, "rechazadas": 0} for regla, alcance in LIMITES
+        }
+        self._errores = 0
+
+    # --- Cubetas ---
+    def _consumir_memoria(self, clave: str, limite: Limite) -> Tuple[bool, float]:
+        ahora = time.monotonic()
+        with self._lock:
+            cubeta = self._cubetas.get(clave)
+            if cubeta is None:
+                cubeta = self._cubetas[clave] = [float(limite.capacidad), ahora]
+                if len(self._cubetas) > MAX_CLAVES:
+                    self._cubetas.popitem(last=False)
+            else:
+                self._cubetas.move_to_end(clave)
+                cubeta[0] = min(limite.capacidad, cubeta[0] + (ahora - cubeta[1]) * limite.por_segundo)
+                cubeta[1] = ahora
+            if cubeta[0] >= 1:
+                cubeta[0] -= 1
+                return True, 0.0
+            return False, cubeta[0]
+
+    def _conexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta_sqlite, isolation_level=None, timeout=0.05, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SQL_CREAR)
+            self._local.conn = conn
+        return conn
+
+    def _consumir_sqlite(self, clave: str, limite: Limite) -> Tuple[bool, float]:
+        # Reloj de pared: lo comparten todos los procesos
+        parametros = {"clave": clave, "capacidad": limite.capacidad, "ritmo": limite.por_segundo, "ahora": time.time()}
+        conn = self._conexion()
+        if conn.execute(_SQL_CONSUMIR, parametros).fetchone() is not None:
+            return True, 0.0
+        fila = conn.execute(_SQL_FICHAS, parametros).fetchone()
+        return False, fila[0] if fila else 0.0
+
+    def _limpiar_sqlite(self):
+        self._conexion().execute(
+            'DELETE FROM "Limites_peticion" WHERE actualizado < ?', (time.time() - _RECARGA_MAXIMA,)
+        )
+
+    def _consumir(self, clave: str, limite: Limite) -> Tuple[bool, float]:
+        if not self.ruta_sqlite:
+            return self._consumir_memoria(clave, limite)
+        try:
+            self._llamadas += 1
+            if self._llamadas % LIMPIEZA_CADA == 0:
+                self._limpiar_sqlite()
+            return self._consumir_sqlite(clave, limite)
+        except sqlite3.Error:
+            # Archivo bloqueado o inaccesible: se cae a las cubetas del proceso, no se deja pasar todo
+            self._errores += 1
+            logger.warning("Límite de peticiones: SQLite no disponible, usando memoria", exc_info=True)
+            return self._consumir_memoria(clave, limite)
+
+    # --- API ---
+    def comprobar(self, request: Request, regla: str, cuenta: Optional[str] = None):
+        """Consume una ficha de la IP y, si se indica, de la cuenta. Lanza 429 si alguna está vacía."""
+        if not LIMITES_ACTIVOS:
+            return
+        ip = request.client.host if request.client else "desconocida"
+        alcances = [("ip", ip)]
+        if cuenta and (regla, "cuenta") in LIMITES:
+            alcances.append(("cuenta", cuenta.strip().lower()))
+        for alcance, valor in alcances:
+            limite = LIMITES[(regla, alcance)]
+            admitida, fichas = self._consumir(f"{regla}:{alcance}:{valor}", limite)
+            with self._lock:
+                self._contadores[f"{regla}:{alcance}"]["admitidas" if admitida else "rechazadas"] += 1
+            if not admitida:
+                espera = math.ceil((1 - fichas) / limite.por_segundo)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Demasiados intentos, espera un momento antes de volver a intentarlo",
+                    headers={"Retry-After": str(max(1, espera))},
+                )
+
+    async def comprobar_async(self, request: Request, regla: str, cuenta: Optional[str] = None):
+        """Igual que `comprobar`, para endpoints async: con SQLite la consulta va al threadpool."""
+        if self.ruta_sqlite:
+            await run_in_threadpool(self.comprobar, request, regla, cuenta)
+        else:
+            self.comprobar(request, regla, cuenta)   # solo memoria: microsegundos, sin E/S
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            reglas = {regla: dict(c) for regla, c in self._contadores.items()}
+        return {
+            "activo": LIMITES_ACTIVOS,
+            "almacen": "sqlite" if self.ruta_sqlite else "memoria",
+            "claves_en_memoria": len(self._cubetas),
+            "errores_sqlite": self._errores,
+            "reglas": reglas,
+        }
+
+
+limitador = Limitador(LIMITES_SQLITE)
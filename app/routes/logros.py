@@ -1,11 +1,15 @@
 # app/routes/logros.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.database import get_db
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_db
 from app.routes.models import Logro, Usuario
 from app.routes.auth import get_current_user
+from app.routes.versiones import etag_coleccion, respuesta_304, marcar_etag
+from app.routes.json_rapido import columnas_de, filas_a_dicts, respuesta_json
+from app.routes.exportacion import id_usuario_exportacion, respuesta_exportacion
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import random
 
@@ -41,6 +45,27 @@ class LogroOut(BaseModel):
     class Config:
         from_attributes = True
 
+COLUMNAS_LOGRO_OUT = columnas_de(Logro, LogroOut)
+
 @router.get("/", response_model=List[LogroOut])
-def mis_logros(user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Logro).filter(Logro.id_usuario == user.id_usuario).order_by(Logro.fecha_creacion.desc()).all()
\ No newline at end of file
+async def mis_logros(request: Request, response: Response, user: Usuario = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    etag = await etag_coleccion(db, request, user.id_usuario, "logros")
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    resultado = await db.execute(
+        select(*COLUMNAS_LOGRO_OUT).where(Logro.id_usuario == user.id_usuario).order_by(Logro.fecha_creacion.desc())
+    )
+    return respuesta_json(filas_a_dicts(resultado), response)
+
+@router.get("/export")
+def exportar_logros(
+    formato: str = Query("ndjson", alias="format", description="ndjson o csv"),
+    usuario: Optional[int] = Query(None, description="Solo administradores: exportar otro usuario"),
+    user: Usuario = Depends(get_current_user),
+):
+    id_usuario = id_usuario_exportacion(user, usuario)
+    q = select(*COLUMNAS_LOGRO_OUT).where(Logro.id_usuario == id_usuario).order_by(Logro.fecha_creacion, Logro.id_logro)
+    return respuesta_exportacion(q, formato, f"logros_{id_usuario}")
\ No newline at end of file
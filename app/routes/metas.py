@@ -1,21 +1,41 @@
 # app/routes/metas.py → VERSIÓN FINAL, LIMPIA Y SIN 422
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_db, get_async_db
 from app.routes.models import Meta, Usuario
 from app.routes.auth import get_current_user
 from app.routes.auth_utils import validar_id, validar_string
+from app.routes.versiones import etag_coleccion, respuesta_304, marcar_etag
+from app.routes.json_rapido import columnas_de, filas_a_dicts, respuesta_json
+from app.routes.exportacion import id_usuario_exportacion, respuesta_exportacion
+from app.routes.eventos import bus, META_CUMPLIDA, META_REABIERTA
+from app.routes.catalogo import obtener_catalogo
+from app.routes.progreso_metas import ventana, contar_tareas
 from pydantic import BaseModel, validator
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 router = APIRouter(prefix="/metas", tags=["Metas"])
 
 # === Modelos ===
+def _validar_prioridad(v):
+    if v is None:
+        return v
+    v = v.strip().lower()
+    if v not in ['baja', 'media', 'alta']:
+        raise ValueError("Prioridad inválida. Válidas: baja, media, alta")
+    return v
+
 class MetaCreate(BaseModel):
     descripcion: str
     frecuencia: str
     objetivo: int
+    # Metas automáticas: el progreso lo llevan las tareas completadas (con estos filtros)
+    automatica: bool = False
+    id_categoria: Optional[int] = None
+    prioridad: Optional[str] = None
 
     @validator('descripcion')
     def validar_descripcion(cls, v):
@@ -40,10 +60,17 @@ class MetaCreate(BaseModel):
             raise ValueError("Objetivo no puede exceder 10000")
         return v
 
+    @validator('prioridad')
+    def validar_prioridad(cls, v):
+        return _validar_prioridad(v)
+
 class MetaUpdate(BaseModel):
     descripcion: Optional[str] = None
     frecuencia: Optional[str] = None
     objetivo: Optional[int] = None
+    automatica: Optional[bool] = None
+    id_categoria: Optional[int] = None
+    prioridad: Optional[str] = None
 
     @validator('descripcion')
     def validar_descripcion(cls, v):
@@ -74,6 +101,10 @@ class MetaUpdate(BaseModel):
             raise ValueError("Objetivo no puede exceder 10000")
         return v
 
+    @validator('prioridad')
+    def validar_prioridad(cls, v):
+        return _validar_prioridad(v)
+
 class ProgresoUpdate(BaseModel):
     progreso: int
     
@@ -93,30 +124,83 @@ class MetaOut(BaseModel):
     progreso: int
     fecha_inicio: datetime
     completada: bool
+    automatica: bool = False
+    id_categoria: Optional[int] = None
+    prioridad: Optional[str] = None
+    fin_ventana: Optional[date] = None
 
     class Config:
         from_attributes = True
 
+# Listado: fecha_inicio se guarda como fecha pero MetaOut la expone como datetime
+COLUMNAS_META_OUT = columnas_de(
+    Meta, MetaOut, fecha_inicio=func.strftime("%Y-%m-%dT%H:%M:%S", Meta.fecha_inicio)
+)
+
+def _validar_categoria(id_categoria: Optional[int]):
+    # ✅ Validación: la categoría del filtro debe existir
+    if id_categoria is not None and id_categoria not in obtener_catalogo().categorias_por_id:
+        raise HTTPException(400, f"La categoría {id_categoria} no existe")
+
+def _recalcular(db: Session, meta: Meta, nueva_ventana: bool):
+    """Ventana actual y progreso de una meta automática tras crearla o cambiar su definición."""
+    if nueva_ventana:
+        meta.fecha_inicio, meta.fin_ventana = ventana(meta.frecuencia, datetime.now().date())
+    if meta.automatica:
+        meta.progreso = contar_tareas(db, meta)
+    meta.completada = meta.progreso >= meta.objetivo
+
+def _emitir_transicion(meta: Meta, estaba_completada: bool):
+    # Eventos de dominio (logros): solo en la transición
+    if meta.completada and not estaba_completada:
+        bus.emitir(META_CUMPLIDA, meta.id_usuario, id_meta=meta.id_meta,
+                   fecha_inicio=str(meta.fecha_inicio), descripcion=meta.descripcion)
+    elif estaba_completada and not meta.completada:
+        bus.emitir(META_REABIERTA, meta.id_usuario, id_meta=meta.id_meta)
+
 # === Endpoints ===
 @router.post("/", response_model=MetaOut, status_code=status.HTTP_201_CREATED)
 def crear_meta(meta: MetaCreate, user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+    _validar_categoria(meta.id_categoria)
     nueva = Meta(
         id_usuario=user.id_usuario,
         descripcion=meta.descripcion,
         frecuencia=meta.frecuencia,
         objetivo=meta.objetivo,
         progreso=0,
-        fecha_inicio=datetime.now().date(),
-        completada=False
+        completada=False,
+        # Con filtros, la meta es automática aunque no se indique
+        automatica=meta.automatica or meta.id_categoria is not None or meta.prioridad is not None,
+        id_categoria=meta.id_categoria,
+        prioridad=meta.prioridad,
     )
+    _recalcular(db, nueva, nueva_ventana=True)
     db.add(nueva)
     db.commit()
+    _emitir_transicion(nueva, False)
     db.refresh(nueva)
     return nueva
 
 @router.get("/", response_model=List[MetaOut])
-def listar_metas(user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Meta).filter(Meta.id_usuario == user.id_usuario).all()
+async def listar_metas(request: Request, response: Response, user: Usuario = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    etag = await etag_coleccion(db, request, user.id_usuario, "metas")
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    resultado = await db.execute(select(*COLUMNAS_META_OUT).where(Meta.id_usuario == user.id_usuario))
+    return respuesta_json(filas_a_dicts(resultado), response)
+
+@router.get("/export")
+def exportar_metas(
+    formato: str = Query("ndjson", alias="format", description="ndjson o csv"),
+    usuario: Optional[int] = Query(None, description="Solo administradores: exportar otro usuario"),
+    user: Usuario = Depends(get_current_user),
+):
+    id_usuario = id_usuario_exportacion(user, usuario)
+    q = select(*COLUMNAS_META_OUT).where(Meta.id_usuario == id_usuario).order_by(Meta.id_meta)
+    return respuesta_exportacion(q, formato, f"metas_{id_usuario}")
 
 @router.get("/{id_meta}", response_model=MetaOut)
 def obtener_meta(id_meta: int, user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -136,10 +220,21 @@ def actualizar_meta(id_meta: int, datos: MetaUpdate, user: Usuario = Depends(get
         raise HTTPException(404, f"Meta con ID {id_meta} no encontrada")
 
     update_data = datos.dict(exclude_unset=True)
+    _validar_categoria(update_data.get("id_categoria"))
+    if update_data.get("automatica") is None:
+        update_data.pop("automatica", None)
+    if update_data.get("id_categoria") is not None or update_data.get("prioridad") is not None:
+        update_data.setdefault("automatica", True)
+
+    estaba_completada = bool(meta.completada)
     for key, value in update_data.items():
         setattr(meta, key, value)
+    # Cambió lo que se cuenta o cómo: nueva ventana y/o recuento
+    if update_data.keys() & {"frecuencia", "objetivo", "automatica", "id_categoria", "prioridad"}:
+        _recalcular(db, meta, nueva_ventana="frecuencia" in update_data)
 
     db.commit()
+    _emitir_transicion(meta, estaba_completada)
     db.refresh(meta)
     return meta
 
@@ -161,9 +256,13 @@ def actualizar_progreso(id_meta: int, datos: ProgresoUpdate, user: Usuario = Dep
     meta = db.query(Meta).filter(Meta.id_meta == id_meta, Meta.id_usuario == user.id_usuario).first()
     if not meta:
         raise HTTPException(404, f"Meta con ID {id_meta} no encontrada")
+    if meta.automatica:
+        raise HTTPException(400, "El progreso de esta meta se actualiza solo con tus tareas completadas")
 
+    estaba_completada = bool(meta.completada)
     meta.progreso = datos.progreso
     meta.completada = meta.progreso >= meta.objetivo
     db.commit()
+    _emitir_transicion(meta, estaba_completada)
     db.refresh(meta)
     return meta
\ No newline at end of file
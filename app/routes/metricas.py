@@ -0,0 +1,219 @@
+# app/routes/metricas.py
+"""
+Métricas de ejecución en formato de texto de Prometheus (GET /metrics).
+
+MiddlewareMetricas es ASGI puro (sin BaseHTTPMiddleware, que agrega una
+tarea y una cola por petición) y registra por método + ruta plantilla
+(`/tareas/{id_tarea}`, no la URL concreta, para acotar las series):
+  - peticiones por código de estado (contador)
+  - latencia en histograma de cubetas fijas
+  - peticiones en curso (gauge)
+Además, `instrumentar_threadpool()` mide cuánto espera cada llamada síncrona
+(endpoints def, dependencias, archivos) a que se libere un hilo del pool de
+AnyIO, y /metrics agrega el uso del pool y las estadisticas() de los
+servicios de fondo registrados con `registrar_servicio`.
+
+Todo se actualiza y se lee desde el hilo del event loop: no hacen falta
+locks y el costo por petición es un par de sumas y un bisect. Cada worker de
+uvicorn expone sus propias métricas.
+
+METRICAS_TOKEN=... exige `Authorization: Bearer <token>` para leerlas.
+"""
+import os
+import secrets
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+import anyio.to_thread
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+
+CUBETAS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_ESPERA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METODOS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+SIN_RUTA = "sin_ruta"   # 404 y rutas no declaradas: una sola serie
+
+router = APIRouter(tags=["Métricas"])
+
+
+class Histograma:
+    __slots__ = ("cubetas", "conteos", "suma")
+
+    def __init__(self, cubetas: Tuple[float, ...]):
+        self.cubetas = cubetas
+        self.conteos = [0] * (len(cubetas) + 1)   # la última es +Inf
+        self.suma = 0.0
+
+    def observar(self, valor: float):
+        self.conteos[bisect_left(self.cubetas, valor)] += 1
+        self.suma += valor
+
+    def lineas(self, nombre: str, etiquetas: str) -> List[str]:
+        separador = "," if etiquetas else ""
+        acumulado, lineas = 0, []
+        for limite, conteo in zip((*self.cubetas, "+Inf"), self.conteos):
+            acumulado += conteo
+            lineas.append(f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}')
+        llaves = f"{{{etiquetas}}}" if etiquetas else ""
+        lineas.append(f"{nombre}_sum{llaves} {self.suma}")
+        lineas.append(f"{nombre}_count{llaves} {acumulado}")
+        return lineas
+
+
+class Metricas:
+    def __init__(self):
+        self.peticiones: Dict[Tuple[str, str, int], int] = {}
+        self.latencias: Dict[Tuple[str, str], Histograma] = {}
+        self.en_curso = 0
+        self.espera_threadpool = Histograma(CUBETAS_ESPERA)
+        self.servicios: Dict[str, Callable[[], dict]] = {}
+
+    def registrar(self, metodo: str, ruta: str, estado: int, segundos: float):
+        clave = (metodo, ruta, estado)
+        self.peticiones[clave] = self.peticiones.get(clave, 0) + 1
+        histograma = self.latencias.get((metodo, ruta))
+        if histograma is None:
+            histograma = self.latencias[(metodo, ruta)] = Histograma(CUBETAS_LATENCIA)
+        histograma.observar(segundos)
+
+
+metricas = Metricas()
+
+
+def registrar_servicio(nombre: str, estadisticas: Callable[[], dict]):
+    """Exporta los valores numéricos de `estadisticas()` como timewise_<nombre>_<clave>."""
+    metricas.servicios[nombre] = estadisticas
+
+
+# ======================= MIDDLEWARE =======================
+def _ruta(scope) -> str:
+    # El router de Starlette deja la ruta que coincidió en el scope (FastAPI: scope["route"])
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or SIN_RUTA
+
+
+class MiddlewareMetricas:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = 500   # si la app falla antes de responder
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        metricas.en_curso += 1
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            metricas.en_curso -= 1
+            metodo = scope["method"] if scope["method"] in METODOS else "OTRO"
+            metricas.registrar(metodo, _ruta(scope), estado, time.perf_counter() - inicio)
+
+
+# ======================= THREADPOOL =======================
+_run_sync_original = None
+
+
+async def _run_sync_medido(func, *args, **kwargs):
+    encolado = time.perf_counter()
+    inicio: List[float] = []
+
+    def medido(*a):
+        inicio.append(time.perf_counter())
+        return func(*a)
+
+    try:
+        return await _run_sync_original(medido, *args, **kwargs)
+    finally:
+        # De vuelta en el hilo del loop: se observa aquí, no en el hilo del pool
+        if inicio:
+            metricas.espera_threadpool.observar(inicio[0] - encolado)
+
+
+def instrumentar_threadpool():
+    """Envuelve anyio.to_thread.run_sync (lo usan Starlette y FastAPI para todo lo síncrono)."""
+    global _run_sync_original
+    if _run_sync_original is None:
+        _run_sync_original = anyio.to_thread.run_sync
+        anyio.to_thread.run_sync = _run_sync_medido
+
+
+# ======================= EXPOSICIÓN =======================
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(**valores) -> str:
+    return ",".join(f'{k}="{_escapar(v)}"' for k, v in valores.items())
+
+
+def _nombre(*partes: str) -> str:
+    return "_".join(p.replace("-", "_").replace(":", "_").replace(".", "_") for p in partes)
+
+
+def _aplanar(prefijo: str, datos: dict, lineas: List[str]):
+    for clave, valor in datos.items():
+        if isinstance(valor, dict):
+            _aplanar(_nombre(prefijo, clave), valor, lineas)
+        elif isinstance(valor, (int, float)):   # bool incluido; textos y None no
+            lineas.append(f"{_nombre(prefijo, clave)} {float(valor)}")
+
+
+def exponer() -> str:
+    lineas = [
+        "# HELP timewise_http_requests_total Peticiones HTTP atendidas.",
+        "# TYPE timewise_http_requests_total counter",
+    ]
+    for (metodo, ruta, estado), n in sorted(metricas.peticiones.items()):
+        lineas.append(f"timewise_http_requests_total{{{_etiquetas(method=metodo, route=ruta, status=estado)}}} {n}")
+
+    lineas += [
+        "# HELP timewise_http_request_duration_seconds Latencia de las peticiones HTTP.",
+        "# TYPE timewise_http_request_duration_seconds histogram",
+    ]
+    for (metodo, ruta), histograma in sorted(metricas.latencias.items()):
+        lineas += histograma.lineas("timewise_http_request_duration_seconds", _etiquetas(method=metodo, route=ruta))
+
+    lineas += [
+        "# HELP timewise_http_requests_in_flight Peticiones HTTP en curso.",
+        "# TYPE timewise_http_requests_in_flight gauge",
+        f"timewise_http_requests_in_flight {metricas.en_curso}",
+        "# HELP timewise_threadpool_queue_wait_seconds Espera por un hilo libre del pool de AnyIO.",
+        "# TYPE timewise_threadpool_queue_wait_seconds histogram",
+        *metricas.espera_threadpool.lineas("timewise_threadpool_queue_wait_seconds", ""),
+    ]
+    limitador = anyio.to_thread.current_default_thread_limiter()
+    lineas += [
+        "# TYPE timewise_threadpool_workers gauge",
+        f"timewise_threadpool_workers {limitador.total_tokens}",
+        "# TYPE timewise_threadpool_busy gauge",
+        f"timewise_threadpool_busy {limitador.borrowed_tokens}",
+        "# TYPE timewise_threadpool_waiting gauge",
+        f"timewise_threadpool_waiting {limitador.statistics().tasks_waiting}",
+    ]
+
+    for nombre, estadisticas in metricas.servicios.items():
+        _aplanar(f"timewise_{nombre}", estadisticas(), lineas)
+    return "\n".join(lineas) + "\n"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def obtener_metricas(request: Request):
+    # async a propósito: se lee en el hilo del loop, el mismo que escribe las métricas
+    if METRICAS_TOKEN:
+        autorizacion = request.headers.get("authorization", "")
+        if not secrets.compare_digest(autorizacion.encode(), f"Bearer {METRICAS_TOKEN}".encode()):
+            raise HTTPException(401, "Token de métricas inválido")
+    return PlainTextResponse(exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,118 @@
+# app/routes/miniaturas.py
+"""
+Miniaturas de fotos de perfil, generadas bajo demanda y guardadas en disco.
+
+La primera petición de `?ancho=N` decodifica el original en un pool propio de
+hilos (Pillow suelta el GIL al decodificar y redimensionar) y escribe
+`uploads/miniaturas/<sha256>_<N>.<ext>` con rename atómico; las siguientes
+salen directo del disco. Peticiones simultáneas de la misma miniatura
+comparten un solo trabajo.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+DIRECTORIO_MINIATURAS = os.path.join("uploads", "miniaturas")
+ANCHOS = (64, 128, 256, 512)
+MINIATURAS_WORKERS = int(os.getenv("MINIATURAS_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+# Formato del original → (extensión, formato Pillow, opciones de guardado). GIF → PNG (primer cuadro).
+_SALIDA = {
+    "jpg": ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("png", "PNG", {"optimize": True}),
+    "gif": ("png", "PNG", {"optimize": True}),
+    "webp": ("webp", "WEBP", {"quality": 80}),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_en_curso: Dict[str, asyncio.Future] = {}
+_contadores = {"generadas": 0, "desde_disco": 0, "compartidas": 0, "errores": 0}
+
+
+def ruta_miniatura(nombre: str, ancho: int) -> str:
+    sha, extension = nombre.rsplit(".", 1)
+    return os.path.join(DIRECTORIO_MINIATURAS, f"{sha}_{ancho}.{_SALIDA[extension][0]}")
+
+
+def _generar(original: str, destino: str, ancho: int, extension: str):
+    from PIL import Image, ImageOps
+
+    _, formato, opciones = _SALIDA[extension]
+    with Image.open(original) as imagen:
+        if formato == "JPEG":
+            imagen.draft("RGB", (ancho, ancho))   # el decodificador JPEG escala en origen
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.thumbnail((ancho, ancho))
+        if formato == "JPEG" and imagen.mode not in ("RGB", "L"):
+            imagen = imagen.convert("RGB")
+        os.makedirs(DIRECTORIO_MINIATURAS, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=DIRECTORIO_MINIATURAS, suffix=".part")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                imagen.save(archivo, formato, **opciones)
+            os.replace(temporal, destino)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MINIATURAS_WORKERS, thread_name_prefix="miniaturas")
+    return _executor
+
+
+async def obtener_miniatura(original: str, nombre: str, ancho: int) -> str:
+    """Ruta de la miniatura de `nombre` ('<sha256>.<ext>'), generándola si hace falta."""
+    # ✅ Validación: solo tamaños precalculables (evita llenar el disco con anchos arbitrarios)
+    if ancho not in ANCHOS:
+        raise HTTPException(400, f"ancho debe ser uno de {', '.join(map(str, ANCHOS))}")
+    destino = ruta_miniatura(nombre, ancho)
+    if os.path.exists(destino):
+        _contadores["desde_disco"] += 1
+        return destino
+
+    futuro = _en_curso.get(destino)
+    if futuro is not None:
+        _contadores["compartidas"] += 1
+        await _esperar(futuro)
+        return destino
+
+    loop = asyncio.get_running_loop()
+    futuro = loop.run_in_executor(_obtener_executor(), _generar, original, destino, ancho, nombre.rsplit(".", 1)[1])
+    _en_curso[destino] = futuro
+    futuro.add_done_callback(lambda _: _en_curso.pop(destino, None))
+    await _esperar(futuro)
+    _contadores["generadas"] += 1
+    return destino
+
+
+async def _esperar(futuro: asyncio.Future):
+    # shield: si el cliente se desconecta, la miniatura se termina igual para los demás
+    try:
+        await asyncio.shield(futuro)
+    except FileNotFoundError:
+        raise HTTPException(404, "Foto no encontrada")
+    except Exception:
+        _contadores["errores"] += 1
+        raise HTTPException(422, "No se pudo generar la miniatura de esta imagen")
+
+
+def cerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def estadisticas() -> dict:
+    return {"workers": MINIATURAS_WORKERS, "en_curso": len(_en_curso), **_contadores}
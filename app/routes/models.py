@@ -1,5 +1,5 @@
 # app/routes/models.py → VERSIÓN FINAL LIMPIA Y FUNCIONAL (2025)
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Time, Boolean, Text, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Time, Boolean, Text, Float, DateTime, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -53,6 +53,18 @@ class Usuario(Base):
     tareas = relationship("Tarea", back_populates="usuario", cascade="all, delete-orphan")
     logros = relationship("Logro", back_populates="usuario", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_usuario_token_reset", "token_reset"),
+        # Listado y búsqueda de /admin/usuarios (migración 006)
+        Index("ix_usuario_fecha_registro", "fecha_registro", "id_usuario"),
+        Index("ix_usuario_ultimo_login", "ultimo_login", "id_usuario"),
+        Index("ix_usuario_rol_fecha_registro", "id_rol", "fecha_registro", "id_usuario"),
+        Index("ix_usuario_rol_ultimo_login", "id_rol", "ultimo_login", "id_usuario"),
+        Index("ix_usuario_nombre_nocase", text("nombre COLLATE NOCASE")),
+        Index("ix_usuario_apellido_nocase", text("apellido COLLATE NOCASE")),
+        Index("ix_usuario_correo_nocase", text("correo COLLATE NOCASE")),
+    )
+
 
 class UsuarioModo(Base):
     __tablename__ = "Usuario_Modos"
@@ -60,6 +72,9 @@ class UsuarioModo(Base):
     id_usuario = Column(Integer, ForeignKey("Usuario.id_usuario"), nullable=False)
     id_modo = Column(Integer, ForeignKey("Modos_de_tareas.id_modo"), nullable=False)
     fecha_activacion = Column(DateTime, default=datetime.utcnow)
+    seq = Column(Integer, nullable=False, server_default="1")   # lo asignan triggers (migración 005)
+
+    __table_args__ = (Index("ix_usuario_modos_usuario_seq", "id_usuario", "seq"),)
 
 
 # ==================== TAREA → SIN CAMPOS FANTASMA ====================
@@ -78,11 +93,22 @@ class Tarea(Base):
     estado = Column(String, default="pendiente")
     etiqueta_color = Column(String, nullable=True)
     recordatorio_minutos = Column(Integer, nullable=True)
+    seq = Column(Integer, nullable=False, server_default="1")   # lo asignan triggers (migración 005)
 
     # relaciones...
     usuario = relationship("Usuario", back_populates="tareas")
     categoria = relationship("TipoTarea", back_populates="tareas")
 
+    # Índices creados por app/database/migraciones.py (001)
+    __table_args__ = (
+        Index("ix_tareas_usuario_fecha_hora", "id_usuario", "fecha", "hora"),
+        Index("ix_tareas_usuario_estado_fecha", "id_usuario", "estado", "fecha"),
+        Index("ix_tareas_usuario_categoria_fecha", "id_usuario", "id_categoria", "fecha", "hora"),
+        Index("ix_tareas_usuario_seq", "id_usuario", "seq"),
+        Index("ix_tareas_seq", "seq"),
+        Index("ix_tareas_recordatorio", "fecha", sqlite_where=text("recordatorio_minutos IS NOT NULL")),
+    )
+
 
 class Meta(Base):
     __tablename__ = "Metas"
@@ -94,6 +120,19 @@ class Meta(Base):
     progreso = Column(Integer, default=0)
     fecha_inicio = Column(Date)
     completada = Column(Boolean, default=False)
+    seq = Column(Integer, nullable=False, server_default="1")   # lo asignan triggers (migración 005)
+    # Metas automáticas (migración 011): progreso mantenido desde las tareas completadas
+    automatica = Column(Boolean, nullable=False, server_default="0")
+    id_categoria = Column(Integer)
+    prioridad = Column(String)
+    fin_ventana = Column(Date)   # fin (exclusivo) de la ventana que empieza en fecha_inicio
+
+    __table_args__ = (
+        Index("ix_metas_usuario", "id_usuario"),
+        Index("ix_metas_usuario_seq", "id_usuario", "seq"),
+        Index("ix_metas_fin_ventana", "fin_ventana"),
+        Index("ix_metas_automaticas", "id_usuario", "fin_ventana", sqlite_where=text("automatica = 1")),
+    )
 
 
 class Estadistica(Base):
@@ -107,6 +146,12 @@ class Estadistica(Base):
     fecha_inicio = Column(Date)
     productividad = Column(Float, default=0.0)
 
+    # Rollups por (usuario, categoría, periodo, fecha_inicio) → app/database/estadisticas_rollup.py
+    __table_args__ = (
+        Index("ix_estadisticas_usuario_periodo", "id_usuario", "periodo", "fecha_inicio"),
+        Index("ux_estadisticas_bucket", "id_usuario", "id_categoria", "periodo", "fecha_inicio", unique=True),
+    )
+
 
 class Cronometro(Base):
     __tablename__ = "Cronometros"
@@ -116,7 +161,12 @@ class Cronometro(Base):
     inicio = Column(DateTime, nullable=False)
     fin = Column(DateTime)
     duracion_segundos = Column(Integer)
-    
+
+    __table_args__ = (
+        Index("ix_cronometros_tarea", "id_tarea"),
+        Index("ix_cronometros_usuario_inicio", "id_usuario", "inicio"),
+    )
+
 
 class Logro(Base):
     __tablename__ = "logros"
@@ -125,5 +175,50 @@ class Logro(Base):
     mensaje = Column(Text, nullable=False)
     tipo = Column(String, nullable=False)
     fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    seq = Column(Integer, nullable=False, server_default="1")   # lo asignan triggers (migración 005)
+    regla = Column(String, nullable=True)   # regla que lo otorgó (motor_logros.py)
 
-    usuario = relationship("Usuario", back_populates="logros")
\ No newline at end of file
+    usuario = relationship("Usuario", back_populates="logros")
+
+    __table_args__ = (
+        Index("ix_logros_usuario_fecha", "id_usuario", "fecha_creacion"),
+        Index("ix_logros_usuario_seq", "id_usuario", "seq"),
+        Index("ux_logros_usuario_regla", "id_usuario", "regla", unique=True, sqlite_where=text("regla IS NOT NULL")),
+    )
+
+class Notificacion(Base):
+    __tablename__ = "Notificaciones"
+    id_notificacion = Column(Integer, primary_key=True, index=True)
+    id_usuario = Column(Integer, ForeignKey("Usuario.id_usuario"), nullable=False)
+    id_tarea = Column(Integer, ForeignKey("Tareas.id_tarea"), nullable=True)
+    tipo = Column(String, nullable=False)
+    mensaje = Column(Text, nullable=False)
+    momento = Column(DateTime, nullable=False)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    leida = Column(Boolean, default=False)
+
+    # Creada por app/database/migraciones.py (008)
+    __table_args__ = (
+        UniqueConstraint("id_tarea", "tipo", "momento"),
+        Index("ix_notificaciones_usuario", "id_usuario", "leida", "id_notificacion"),
+    )
+
+class CorreoSalida(Base):
+    __tablename__ = "Correos_salida"
+    id_correo = Column(Integer, primary_key=True, index=True)
+    destinatario = Column(String, nullable=False)
+    asunto = Column(String, nullable=False)
+    cuerpo = Column(Text, nullable=False)
+    subtipo = Column(String, nullable=False, server_default="html")
+    estado = Column(String, nullable=False, server_default="pendiente")
+    intentos = Column(Integer, nullable=False, server_default="0")
+    proximo_intento = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    bloqueado_hasta = Column(DateTime, nullable=True)
+    ultimo_error = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    fecha_envio = Column(DateTime, nullable=True)
+
+    # Creada por app/database/migraciones.py (009)
+    __table_args__ = (
+        Index("ix_correos_salida_estado", "estado", "proximo_intento"),
+    )
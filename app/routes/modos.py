@@ -1,10 +1,15 @@
 # app/routes/modos.py → 100% compatible con tu proyecto actual
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_db, get_async_db
 from app.routes.models import ModoTarea, UsuarioModo, Usuario
 from app.routes.auth import get_current_user
 from app.routes.auth_utils import validar_id
+from app.routes.catalogo import Catalogo, obtener_catalogo
+from app.routes.etag import responder_json
+from app.routes.versiones import etag_coleccion, respuesta_304, marcar_etag
 from pydantic import BaseModel
 from typing import List
 
@@ -19,21 +24,37 @@ class ModoActivar(BaseModel):
     id_modo: int
 
 @router.get("/", response_model=List[ModoOut])
-def obtener_todos_los_modos(db: Session = Depends(get_db)):
+def obtener_todos_los_modos(request: Request):
     """Devuelve todos los modos disponibles (predefinidos)"""
-    return db.query(ModoTarea).all()
+    cat = obtener_catalogo()
+    return responder_json(request, cat.modos_json, cat.modos_etag)
 
 @router.get("/mis-modos")
-def mis_modos_activos(db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
+async def mis_modos_activos(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Usuario = Depends(get_current_user),
+    cat: Catalogo = Depends(obtener_catalogo),
+):
     """Devuelve los modos que el usuario tiene activados"""
-    modos = db.query(ModoTarea).join(UsuarioModo).filter(UsuarioModo.id_usuario == user.id_usuario).all()
-    return [{"id_modo": m.id_modo, "nombre": m.nombre, "descripcion": m.descripcion} for m in modos]
+    # Los nombres salen del catálogo: su versión también forma parte del ETag
+    etag = await etag_coleccion(db, request, user.id_usuario, "modos", extra=str(cat.version))
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    resultado = await db.execute(
+        select(UsuarioModo.id_modo).where(UsuarioModo.id_usuario == user.id_usuario).order_by(UsuarioModo.id_modo)
+    )
+    return [cat.modos_por_id[id_modo] for id_modo in resultado.scalars() if id_modo in cat.modos_por_id]
 
 @router.post("/activar")
 def activar_modo(modo: ModoActivar, db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
     if not validar_id(modo.id_modo):
         raise HTTPException(400, "ID de modo inválido")
-    existe = db.query(ModoTarea).filter(ModoTarea.id_modo == modo.id_modo).first()
+    existe = obtener_catalogo().modos_por_id.get(modo.id_modo)
     if not existe:
         raise HTTPException(404, "Modo no encontrado")
     
@@ -47,7 +68,7 @@ def activar_modo(modo: ModoActivar, db: Session = Depends(get_db), user: Usuario
     nuevo = UsuarioModo(id_usuario=user.id_usuario, id_modo=modo.id_modo)
     db.add(nuevo)
     db.commit()
-    return {"msg": f"Modo '{existe.nombre}' activado correctamente"}
+    return {"msg": f"Modo '{existe['nombre']}' activado correctamente"}
 
 @router.delete("/desactivar/{id_modo}")
 def desactivar_modo(id_modo: int, db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
@@ -0,0 +1,159 @@
+# app/routes/motor_logros.py
+"""
+Motor de logros: reglas declarativas sobre los eventos del bus (eventos.py).
+
+Cada evento suma o resta a un contador por usuario (Contadores_usuario) con
+un UPSERT ... RETURNING que devuelve el valor anterior y el nuevo, y las
+reglas comparan ambos: otorgar un logro cuesta O(1) por evento, nunca se recuenta el
+historial. La racha (días seguidos con tareas completadas) vive en la tabla
+Rachas y, cuando crece, emite a su vez un evento `racha`.
+
+Los logros de un lote se insertan juntos con INSERT OR IGNORE: el índice
+único (id_usuario, regla) evita duplicados aunque un evento se repita o
+dos workers lleguen al mismo umbral.
+"""
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+
+from app.database.database import SessionLocal
+from app.routes.eventos import (
+    Evento, bus, TAREA_COMPLETADA, TAREA_REABIERTA, META_CUMPLIDA, META_REABIERTA, RACHA,
+)
+from app.routes.logros import MENSAJES_TAREA, MENSAJES_META
+from app.routes.models import Logro
+
+MENSAJES_RACHA = [
+    "¡Racha encendida! No la sueltes",
+    "¡Constancia de campeón!",
+    "¡Día tras día, imparable!",
+    "¡Tu disciplina está on fire!",
+]
+
+
+@dataclass(frozen=True)
+class Regla:
+    clave: str                          # prefijo de logros.regla
+    evento: str
+    tipo: str                           # logros.tipo
+    mensajes: tuple
+    detalle: str                        # se agrega al mensaje; admite {n} y los datos del evento
+    contador: Optional[str] = None      # valor medido: un contador incremental...
+    dato: Optional[str] = None          # ...o un dato del propio evento (p. ej. dias de la racha)
+    umbrales: Tuple[int, ...] = ()      # un logro al alcanzar cada umbral
+    por_registro: Tuple[str, ...] = ()  # o un logro por cada combinación distinta de estos datos
+
+
+REGLAS = (
+    Regla("tareas", TAREA_COMPLETADA, "tarea", tuple(MENSAJES_TAREA), "tareas completadas: {n}",
+          contador="tareas_completadas", umbrales=(1, 10, 25, 50, 100, 250, 500, 1000)),
+    Regla("meta", META_CUMPLIDA, "meta", tuple(MENSAJES_META), "{descripcion}",
+          por_registro=("id_meta", "fecha_inicio")),   # una vez por ventana de la meta
+    Regla("metas", META_CUMPLIDA, "meta", tuple(MENSAJES_META), "metas cumplidas: {n}",
+          contador="metas_cumplidas", umbrales=(5, 10, 25, 50, 100)),
+    Regla("racha", RACHA, "racha", tuple(MENSAJES_RACHA), "días seguidos: {n}",
+          dato="dias", umbrales=(3, 7, 14, 30, 60, 100, 365)),
+)
+
+# evento → (contador, delta)
+CONTADORES = {
+    TAREA_COMPLETADA: ("tareas_completadas", 1),
+    TAREA_REABIERTA: ("tareas_completadas", -1),
+    META_CUMPLIDA: ("metas_cumplidas", 1),
+    META_REABIERTA: ("metas_cumplidas", -1),
+}
+
+_REGLAS_POR_EVENTO: Dict[str, List[Regla]] = defaultdict(list)
+for _regla in REGLAS:
+    _REGLAS_POR_EVENTO[_regla.evento].append(_regla)
+
+# En el SET, `valor` es el de antes del UPDATE: `anterior` lo conserva para el RETURNING
+_SQL_CONTADOR = text("""
+    INSERT INTO "Contadores_usuario" (id_usuario, clave, valor, anterior) VALUES (:id_usuario, :clave, MAX(0, :delta), 0)
+    ON CONFLICT (id_usuario, clave) DO UPDATE SET anterior = valor, valor = MAX(0, valor + :delta)
+    RETURNING anterior, valor
+""")
+# Sin fila de vuelta = ese día ya estaba contado (el WHERE descarta el UPDATE)
+_SQL_RACHA = text("""
+    INSERT INTO "Rachas" (id_usuario, dias, maxima, ultimo_dia) VALUES (:id_usuario, 1, 1, :dia)
+    ON CONFLICT (id_usuario) DO UPDATE SET
+        dias = CASE WHEN ultimo_dia = :dia - 1 THEN dias + 1 ELSE 1 END,
+        maxima = MAX(maxima, CASE WHEN ultimo_dia = :dia - 1 THEN dias + 1 ELSE 1 END),
+        ultimo_dia = :dia
+    WHERE ultimo_dia < :dia
+    RETURNING dias
+""")
+
+
+def _mensaje(regla: Regla, n: int, datos: dict) -> str:
+    return f"{random.choice(regla.mensajes)} ({regla.detalle.format(n=n, **datos)})"
+
+
+def _fila(regla: Regla, id_usuario: int, sufijo, n: int, datos: dict) -> dict:
+    return {
+        "id_usuario": id_usuario,
+        "mensaje": _mensaje(regla, n, datos),
+        "tipo": regla.tipo,
+        "regla": f"{regla.clave}:{sufijo}",
+    }
+
+
+def procesar_eventos(eventos: List[Evento]):
+    """Suscriptor del bus: actualiza contadores y rachas y otorga logros en una transacción."""
+    db = SessionLocal()
+    try:
+        logros = []
+        # El lote se agrupa por (usuario, contador): un UPSERT por par, no por evento
+        deltas: Dict[Tuple[int, str], int] = defaultdict(int)
+        ultimo_evento: Dict[Tuple[int, str], Evento] = {}
+        for evento in eventos:
+            if evento.tipo in CONTADORES:
+                clave, delta = CONTADORES[evento.tipo]
+                deltas[(evento.id_usuario, clave)] += delta
+                if delta > 0:
+                    ultimo_evento[(evento.id_usuario, clave)] = evento
+
+        valores: Dict[Tuple[int, str], Tuple[int, int]] = {}   # (anterior, nuevo)
+        for (id_usuario, clave), delta in deltas.items():
+            fila = db.execute(_SQL_CONTADOR, {"id_usuario": id_usuario, "clave": clave, "delta": delta}).one()
+            valores[(id_usuario, clave)] = (fila.anterior, fila.valor)
+
+        # Rachas: un UPSERT por (usuario, día) con tareas completadas
+        rachas = []
+        dias = sorted({(e.id_usuario, e.momento.date().toordinal()) for e in eventos if e.tipo == TAREA_COMPLETADA})
+        for id_usuario, dia in dias:
+            racha = db.execute(_SQL_RACHA, {"id_usuario": id_usuario, "dia": dia}).scalar()
+            if racha is not None:
+                rachas.append((id_usuario, racha))
+
+        for evento in eventos:
+            for regla in _REGLAS_POR_EVENTO.get(evento.tipo, ()):
+                if regla.por_registro:
+                    sufijo = ":".join(str(evento.datos[dato]) for dato in regla.por_registro)
+                    logros.append(_fila(regla, evento.id_usuario, sufijo, 1, evento.datos))
+                    continue
+                if regla.contador:
+                    par = (evento.id_usuario, regla.contador)
+                    if ultimo_evento.get(par) is not evento:
+                        continue   # el contador del par se evalúa una vez por lote
+                    anterior, nuevo = valores[par]
+                else:
+                    nuevo = evento.datos[regla.dato]
+                    anterior = nuevo - 1
+                for umbral in regla.umbrales:
+                    if anterior < umbral <= nuevo:
+                        logros.append(_fila(regla, evento.id_usuario, umbral, umbral, evento.datos))
+
+        if logros:
+            db.execute(insert(Logro).prefix_with("OR IGNORE"), logros)
+        db.commit()
+    finally:
+        db.close()
+    for id_usuario, dias_racha in rachas:
+        bus.emitir(RACHA, id_usuario, dias=dias_racha)
+
+
+bus.suscribir([*CONTADORES, RACHA], procesar_eventos)
@@ -0,0 +1,76 @@
+# app/routes/notificaciones.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_db
+from app.routes.models import Notificacion, Usuario
+from app.routes.auth import get_current_user
+from app.routes.json_rapido import columnas_de, filas_a_dicts, respuesta_json
+from app.routes.paginacion import preparar_pagina, cerrar_pagina
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+router = APIRouter(prefix="/notificaciones", tags=["Notificaciones"])
+
+
+class NotificacionOut(BaseModel):
+    id_notificacion: int
+    id_tarea: Optional[int]
+    tipo: str
+    mensaje: str
+    momento: datetime
+    leida: bool
+
+    class Config:
+        from_attributes = True
+
+
+class NotificacionPagina(BaseModel):
+    items: List[NotificacionOut]
+    next_cursor: Optional[str] = None
+
+
+COLUMNAS_NOTIFICACION_OUT = columnas_de(Notificacion, NotificacionOut)
+ORDEN_NOTIFICACIONES = [(Notificacion.id_notificacion, True)]
+
+
+@router.get("/", response_model=NotificacionPagina)
+async def mis_notificaciones(
+    no_leidas: bool = Query(False, description="Solo las que no se han leído"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    q = select(*COLUMNAS_NOTIFICACION_OUT).where(Notificacion.id_usuario == user.id_usuario)
+    if no_leidas:
+        q = q.where(Notificacion.leida == False)  # noqa: E712
+    filas = (await db.execute(preparar_pagina(q, ORDEN_NOTIFICACIONES, limit, cursor))).all()
+    filas, siguiente = cerrar_pagina(filas, ORDEN_NOTIFICACIONES, limit)
+    return respuesta_json({"items": filas_a_dicts(filas), "next_cursor": siguiente})
+
+
+@router.put("/{id_notificacion}/leida")
+async def marcar_leida(id_notificacion: int, user: Usuario = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    resultado = await db.execute(
+        update(Notificacion)
+        .where(Notificacion.id_notificacion == id_notificacion, Notificacion.id_usuario == user.id_usuario)
+        .values(leida=True)
+    )
+    # ✅ Validación: solo sus propias notificaciones
+    if resultado.rowcount == 0:
+        raise HTTPException(404, "Notificación no encontrada")
+    await db.commit()
+    return {"msg": "Notificación marcada como leída"}
+
+
+@router.put("/leidas")
+async def marcar_todas_leidas(user: Usuario = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    resultado = await db.execute(
+        update(Notificacion)
+        .where(Notificacion.id_usuario == user.id_usuario, Notificacion.leida == False)  # noqa: E712
+        .values(leida=True)
+    )
+    await db.commit()
+    return {"msg": f"{resultado.rowcount} notificaciones marcadas como leídas"}
@@ -0,0 +1,140 @@
+# app/routes/paginacion.py
+"""
+Paginación por keyset (cursor opaco).
+
+En vez de OFFSET (cuyo coste crece con la profundidad) se recuerda la clave de
+ordenación de la última fila devuelta y la siguiente página empieza justo
+después. Con un índice que cubra el orden, cada página cuesta lo mismo.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import String, and_, false, or_, type_coerce
+
+# (columna, descendente)
+Orden = Sequence[Tuple[Any, bool]]
+
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {"$dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$d": valor.isoformat()}
+    return valor
+
+
+def _desde_json(valor):
+    """Solo escalares o las formas de fecha de `_a_json`: lo demás no llega a la consulta."""
+    if isinstance(valor, dict):
+        if len(valor) == 1 and isinstance(valor.get("$dt"), str):
+            return datetime.fromisoformat(valor["$dt"])
+        if len(valor) == 1 and isinstance(valor.get("$d"), str):
+            return date.fromisoformat(valor["$d"])
+        raise ValueError
+    if valor is None or isinstance(valor, (str, int, float)):
+        return valor
+    raise ValueError
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    crudo = json.dumps([_a_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, n_columnas: int) -> List[Any]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != n_columnas:
+            raise ValueError
+        return [_desde_json(v) for v in valores]
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Cursor inválido")
+
+
+def _formas_texto(valor: datetime) -> List[str]:
+    """
+    Textos con los que SQLite puede tener guardado `valor`: CURRENT_TIMESTAMP
+    lo guarda sin microsegundos y SQLAlchemy con '.ffffff'. Se comparan como
+    texto para que un empate en el cursor se reconozca en ambos formatos.
+    """
+    base = valor.strftime("%Y-%m-%d %H:%M:%S")
+    if valor.microsecond:
+        return [f"{base}.{valor.microsecond:06d}"]
+    return [base, f"{base}.000000"]
+
+
+def _igual(columna, valor):
+    if valor is None:
+        return columna.is_(None)
+    if isinstance(valor, datetime):
+        return type_coerce(columna, String).in_(_formas_texto(valor))
+    return columna == valor
+
+
+def _despues(columna, valor, descendente: bool):
+    # SQLite ordena los NULL como el valor más pequeño:
+    # primero en orden ascendente y al final en descendente.
+    if descendente:
+        if valor is None:
+            return false()
+        if isinstance(valor, datetime):
+            # el menor de los textos equivalentes deja fuera a ambos
+            columna, valor = type_coerce(columna, String), _formas_texto(valor)[0]
+        return or_(columna < valor, columna.is_(None))
+    if valor is None:
+        return columna.is_not(None)
+    if isinstance(valor, datetime):
+        columna, valor = type_coerce(columna, String), _formas_texto(valor)[-1]
+    return columna > valor
+
+
+def condicion_despues(orden: Orden, valores: Sequence[Any]):
+    """Condición WHERE para las filas que van después de `valores` según `orden`."""
+    ramas = []
+    for i, (columna, descendente) in enumerate(orden):
+        iguales = [_igual(c, v) for (c, _), v in zip(orden[:i], valores[:i])]
+        ramas.append(and_(*iguales, _despues(columna, valores[i], descendente)))
+    condicion = or_(*ramas)
+
+    # Acota el rango por la primera columna para que el índice haga un seek
+    primera, descendente = orden[0]
+    if valores[0] is not None:
+        if isinstance(valores[0], datetime):
+            primera = type_coerce(primera, String)
+            valores = [_formas_texto(valores[0])[-1 if descendente else 0]]
+        if descendente:
+            condicion = and_(or_(primera <= valores[0], primera.is_(None)), condicion)
+        else:
+            condicion = and_(primera >= valores[0], condicion)
+    return condicion
+
+
+def preparar_pagina(consulta, orden: Orden, limit: int, cursor: str = None):
+    """
+    Aplica cursor, orden y límite (+1 para saber si hay más) a una consulta.
+    Sirve tanto para `db.query(...)` como para `select(...)`.
+    """
+    if cursor:
+        consulta = consulta.filter(condicion_despues(orden, decodificar_cursor(cursor, len(orden))))
+    consulta = consulta.order_by(*[c.desc() if desc else c.asc() for c, desc in orden])
+    return consulta.limit(limit + 1)
+
+
+def cerrar_pagina(filas: list, orden: Orden, limit: int):
+    """Recorta la fila extra. Retorna (filas, next_cursor); next_cursor es None en la última página."""
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor([getattr(ultima, c.key) for c, _ in orden])
+    return filas, siguiente
+
+
+def paginar(query, orden: Orden, limit: int, cursor: str = None):
+    """Versión síncrona para `db.query(...)`. Retorna (filas, next_cursor)."""
+    filas = preparar_pagina(query, orden, limit, cursor).all()
+    return cerrar_pagina(filas, orden, limit)
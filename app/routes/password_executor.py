@@ -0,0 +1,128 @@
+# app/routes/password_executor.py
+"""
+Ejecutor dedicado para el hash y la verificación de contraseñas (bcrypt).
+
+bcrypt consume CPU a propósito; si corre en el threadpool compartido de AnyIO,
+una ráfaga de logins deja sin hilos al resto de endpoints síncronos. Aquí el
+trabajo va a un pool propio de tamaño fijo (hilos o procesos) con una cola
+acotada: cuando está saturado se responde 503 al instante en vez de encolar.
+
+Las funciones públicas son corrutinas: el endpoint (async def) espera el
+resultado con asyncio.wrap_future, así mientras corre bcrypt no queda
+ocupado ningún hilo de AnyIO ni se bloquea el event loop.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.routes.auth_utils import pwd_context
+
+PASSWORD_EXECUTOR = os.getenv("PASSWORD_EXECUTOR", "thread").lower()   # thread | process
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_MAX = int(os.getenv("PASSWORD_QUEUE_MAX", "32"))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+# Trabajos admitidos = en ejecución + en cola
+_cupos = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_QUEUE_MAX)
+_contadores_lock = threading.Lock()
+_contadores = {"admitidas": 0, "rechazadas": 0, "en_curso": 0, "rehash": 0}
+
+
+# --- Trabajo real (funciones de módulo para poder enviarlas a otro proceso) ---
+
+def _hash(contrasena: str) -> str:
+    return pwd_context.hash(contrasena)
+
+
+def _verificar_y_actualizar(contrasena: str, hash_actual: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(contrasena, hash_actual)
+
+
+# --- Pool ---
+
+def _obtener_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if PASSWORD_EXECUTOR == "process":
+                    _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+async def _ejecutar(fn, *args):
+    if not _cupos.acquire(blocking=False):
+        with _contadores_lock:
+            _contadores["rechazadas"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intenta de nuevo en unos segundos",
+            headers={"Retry-After": "1"},
+        )
+    with _contadores_lock:
+        _contadores["admitidas"] += 1
+        _contadores["en_curso"] += 1
+    try:
+        futuro = _obtener_executor().submit(fn, *args)
+    except BaseException:
+        _liberar(None)
+        raise
+    # El cupo se libera cuando termina el trabajo, no cuando deja de esperarlo
+    # el endpoint (si el cliente se desconecta, bcrypt sigue ocupando el pool)
+    futuro.add_done_callback(_liberar)
+    return await asyncio.wrap_future(futuro)
+
+
+def _liberar(_futuro):
+    with _contadores_lock:
+        _contadores["en_curso"] -= 1
+    _cupos.release()
+
+
+async def hash_contrasena(contrasena: str) -> str:
+    """Genera el hash bcrypt en el pool dedicado."""
+    return await _ejecutar(_hash, contrasena)
+
+
+async def verificar_contrasena(contrasena: str, hash_actual: str) -> bool:
+    """Verifica una contraseña en el pool dedicado."""
+    valida, _ = await _ejecutar(_verificar_y_actualizar, contrasena, hash_actual)
+    return valida
+
+
+async def verificar_y_actualizar(contrasena: str, hash_actual: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica y, si el hash usa un coste distinto al configurado (BCRYPT_ROUNDS),
+    devuelve también el nuevo hash para guardarlo. Retorna (es_valida, nuevo_hash|None)
+    """
+    valida, nuevo_hash = await _ejecutar(_verificar_y_actualizar, contrasena, hash_actual)
+    if nuevo_hash:
+        with _contadores_lock:
+            _contadores["rehash"] += 1
+    return valida, nuevo_hash
+
+
+def estadisticas() -> dict:
+    with _contadores_lock:
+        datos = dict(_contadores)
+    datos.update({
+        "tipo": PASSWORD_EXECUTOR,
+        "workers": PASSWORD_WORKERS,
+        "cola_max": PASSWORD_QUEUE_MAX,
+    })
+    return datos
+
+
+def cerrar():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -1,13 +1,18 @@
 # app/routes/perfil.py → VERSIÓN FINAL CON CAMBIO DE CONTRASEÑA Y CORREO
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_db, get_async_db
 from app.routes.models import Usuario
-from app.routes.auth import get_current_user, pwd_context
+from app.routes.auth import get_current_user, get_current_user_db
+from app.routes.password_executor import hash_contrasena, verificar_contrasena
+from app.routes.auth_cache import cache_usuarios
 from app.routes.auth_utils import validar_email, validar_contrasena, validar_string, validar_edad
+from app.routes.fotos import recibir_foto, guardar_foto, descartar_foto
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-import os
 
 router = APIRouter(prefix="/perfil", tags=["Perfil"])
 
@@ -31,8 +36,8 @@ class CambiarCorreo(BaseModel):
 @router.get("/")
 def ver_perfil(user: Usuario = Depends(get_current_user)):
     return {
-        "nombres": user.nombres,
-        "apellidos": user.apellidos,
+        "nombres": user.nombre,
+        "apellidos": user.apellido,
         "edad": user.edad,
         "correo": user.correo,
         "foto_perfil": user.foto_perfil
@@ -41,7 +46,7 @@ def ver_perfil(user: Usuario = Depends(get_current_user)):
 @router.put("/")
 def actualizar_perfil(
     update: PerfilUpdate,
-    user: Usuario = Depends(get_current_user),
+    user: Usuario = Depends(get_current_user_db),
     db: Session = Depends(get_db)
 ):
     # ✅ Validación: Nombres válidos
@@ -73,56 +78,61 @@ def actualizar_perfil(
         setattr(user, key, value)
     
     db.commit()
+    cache_usuarios.invalidar_usuario(user.id_usuario)
     db.refresh(user)
     return {"msg": "Perfil actualizado correctamente"}
 
 @router.put("/cambiar-contrasena")
-def cambiar_contrasena(
+async def cambiar_contrasena(
     datos: CambiarContrasena,
     user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # ✅ Validación 1: Contraseña actual correcta
-    if not pwd_context.verify(datos.contrasena_actual, user.contrasena):
-        raise HTTPException(400, detail="Contraseña actual incorrecta")
-
-    # ✅ Validación 2: Nuevas coinciden
+    # ✅ Validación 1: Nuevas coinciden
     if datos.nueva_contrasena != datos.confirmar_contrasena:
         raise HTTPException(400, detail="Las nuevas contraseñas no coinciden")
 
-    # ✅ Validación 3: No usar contraseña anterior
-    if pwd_context.verify(datos.nueva_contrasena, user.contrasena):
+    # ✅ Validación 2: No usar contraseña anterior
+    # (la actual se verifica contra el hash abajo, así que basta comparar en texto)
+    if datos.nueva_contrasena == datos.contrasena_actual:
         raise HTTPException(400, detail="La nueva contraseña debe ser diferente a la actual")
 
-    # ✅ Validación 4: Fortaleza de contraseña
+    # ✅ Validación 3: Fortaleza de contraseña
     es_valida, mensaje = validar_contrasena(datos.nueva_contrasena)
     if not es_valida:
         raise HTTPException(400, detail=mensaje)
 
-    user.contrasena = pwd_context.hash(datos.nueva_contrasena)
-    db.commit()
+    # ✅ Validación 4: Contraseña actual correcta (único bcrypt de verificación)
+    usuario = await db.get(Usuario, user.id_usuario)
+    if not await verificar_contrasena(datos.contrasena_actual, usuario.contrasena):
+        raise HTTPException(400, detail="Contraseña actual incorrecta")
+
+    usuario.contrasena = await hash_contrasena(datos.nueva_contrasena)
+    await db.commit()
+    cache_usuarios.invalidar_usuario(user.id_usuario)
     
     return {"msg": "Contraseña cambiada exitosamente"}
 
 @router.put("/cambiar-correo")
-def cambiar_correo(
+async def cambiar_correo(
     datos: CambiarCorreo,
     user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # ✅ Validación 1: Email válido
     if not validar_email(datos.nuevo_correo):
         raise HTTPException(400, detail="Email inválido")
     
     # ✅ Validación 2: Contraseña correcta
-    if not pwd_context.verify(datos.contrasena_actual, user.contrasena):
+    usuario = await db.get(Usuario, user.id_usuario)
+    if not await verificar_contrasena(datos.contrasena_actual, usuario.contrasena):
         raise HTTPException(400, detail="Contraseña incorrecta")
 
     # ✅ Validación 3: Email no duplicado
-    existe = db.query(Usuario).filter(
+    existe = (await db.execute(select(Usuario.id_usuario).where(
         Usuario.correo == datos.nuevo_correo,
         Usuario.id_usuario != user.id_usuario
-    ).first()
+    ))).first()
     if existe:
         raise HTTPException(400, detail="Este correo ya está registrado")
 
@@ -130,33 +140,32 @@ def cambiar_correo(
     if datos.nuevo_correo == user.correo:
         raise HTTPException(400, detail="El nuevo correo debe ser diferente al actual")
 
-    user.correo = datos.nuevo_correo
-    db.commit()
+    usuario.correo = datos.nuevo_correo
+    await db.commit()
+    cache_usuarios.invalidar_usuario(user.id_usuario)
     
     return {"msg": "Correo actualizado correctamente", "nuevo_correo": datos.nuevo_correo}
 
-@router.post("/foto")
-def subir_foto(
-    foto: UploadFile = File(...),
+def _asignar_foto(db: Session, id_usuario: int, temporal: str, nombre: str) -> str:
+    ruta = guardar_foto(temporal, nombre)
+    user = db.get(Usuario, id_usuario)
+    anterior = user.foto_perfil
+    user.foto_perfil = ruta
+    db.commit()
+    cache_usuarios.invalidar_usuario(id_usuario)
+    if anterior != ruta:
+        descartar_foto(db, anterior)
+    return ruta
+
+@router.post("/foto", openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {
+    "schema": {"type": "object", "required": ["foto"], "properties": {"foto": {"type": "string", "format": "binary"}}},
+}}}})
+async def subir_foto(
+    request: Request,
     user: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # ✅ Validación: Tipo de archivo
-    tipos_permitidos = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    if foto.content_type not in tipos_permitidos:
-        raise HTTPException(400, "Solo se permiten imágenes (JPEG, PNG, GIF, WebP)")
-    
-    # ✅ Validación: Tamaño máximo (5MB)
-    MAX_SIZE = 5 * 1024 * 1024
-    contenido = foto.file.read()
-    if len(contenido) > MAX_SIZE:
-        raise HTTPException(400, "La imagen no puede exceder 5MB")
-    
-    os.makedirs("uploads", exist_ok=True)
-    file_path = f"uploads/{user.id_usuario}_{foto.filename}"
-    with open(file_path, "wb") as f:
-        f.write(contenido)
-    
-    user.foto_perfil = file_path
-    db.commit()
-    return {"msg": "Foto de perfil actualizada", "ruta": f"/uploads/{user.id_usuario}_{foto.filename}"}
\ No newline at end of file
+    # ✅ Validación: tipo (por contenido) y tamaño máximo (5MB), leyendo la subida en streaming
+    temporal, nombre = await recibir_foto(request)
+    ruta = await run_in_threadpool(_asignar_foto, db, user.id_usuario, temporal, nombre)
+    return {"msg": "Foto de perfil actualizada", "ruta": f"/{ruta}"}
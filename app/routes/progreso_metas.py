@@ -0,0 +1,228 @@
+# app/routes/progreso_metas.py
+"""
+Progreso automático de metas y renovación de sus ventanas.
+
+Una meta `automatica` cuenta las tareas completadas del usuario cuya fecha
+cae en su ventana actual [fecha_inicio, fin_ventana), opcionalmente solo
+las de una categoría y/o prioridad. El progreso se mantiene de forma
+incremental con los eventos del bus (eventos.py), sin recontar tareas:
+tarea_completada suma 1, tarea_reabierta y tarea_eliminada restan 1,
+tarea_movida resta en su clave vieja y suma en la nueva, y
+tareas_importadas suma n, cada uno con un UPDATE sobre las metas que
+coinciden. Las transiciones netas del lote emiten meta_cumplida /
+meta_reabierta (logros).
+
+La ventana es el día, la semana (de lunes a domingo) o el mes calendario.
+El renovador pasa, al arrancar y cada medianoche, las metas con la ventana
+vencida a la que contiene hoy: UPDATE ... FROM por lotes de LOTE filas, con
+el conteo inicial de la ventana nueva calculado en SQL (nunca se cargan las
+metas en Python). Para correrlo a mano:
+
+    python -m app.routes.progreso_metas renovar
+"""
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.routes.eventos import (
+    Evento, bus, TAREA_COMPLETADA, TAREA_REABIERTA, TAREA_ELIMINADA, TAREA_MOVIDA, TAREAS_IMPORTADAS,
+    META_CUMPLIDA, META_REABIERTA,
+)
+from app.routes.models import Meta, Tarea
+from app.routes.servicio_fondo import ServicioFondo
+
+RENOVACION_ACTIVA = os.getenv("METAS_RENOVACION_ACTIVA", "true").lower() == "true"
+LOTE = int(os.getenv("METAS_RENOVACION_LOTE", "1000"))
+
+# Mismas expresiones que usan los rollups de estadísticas (semana = lunes)
+_SQL_INICIO = """CASE {frecuencia}
+    WHEN 'diaria'  THEN {dia}
+    WHEN 'semanal' THEN date({dia}, 'weekday 0', '-6 days')
+    ELSE date({dia}, 'start of month') END"""
+_SQL_FIN = """CASE {frecuencia}
+    WHEN 'diaria'  THEN date({inicio}, '+1 day')
+    WHEN 'semanal' THEN date({inicio}, '+7 days')
+    ELSE date({inicio}, '+1 month') END"""
+
+# Las restas son siempre de 1 y saltan las metas en 0: así progreso - delta
+# es siempre el valor anterior y las transiciones se deducen del RETURNING.
+_SQL_PROGRESO = text("""
+    UPDATE "Metas" SET progreso = progreso + :delta, completada = (progreso + :delta >= objetivo)
+    WHERE id_usuario = :id_usuario AND automatica = 1
+      AND fecha_inicio <= :fecha AND fin_ventana > :fecha
+      AND (id_categoria IS NULL OR id_categoria = :id_categoria)
+      AND (prioridad IS NULL OR prioridad = :prioridad)
+      AND (:delta > 0 OR progreso > 0)
+    RETURNING id_meta, descripcion, fecha_inicio, progreso, objetivo
+""")
+
+_SQL_RENOVAR = text(f"""
+    WITH vencidas AS (
+        SELECT id_meta, frecuencia, {_SQL_INICIO.format(frecuencia="frecuencia", dia=":hoy")} AS inicio
+        FROM "Metas"
+        WHERE fin_ventana <= :hoy
+        ORDER BY fin_ventana LIMIT :lote
+    ), nuevas AS (
+        SELECT v.id_meta, v.inicio,
+               {_SQL_FIN.format(frecuencia="v.frecuencia", inicio="v.inicio")} AS fin,
+               m.automatica, m.id_usuario, m.id_categoria, m.prioridad
+        FROM vencidas v JOIN "Metas" m ON m.id_meta = v.id_meta
+    ), conteos AS (
+        SELECT n.id_meta, n.inicio, n.fin,
+               CASE WHEN n.automatica THEN (
+                   SELECT COUNT(*) FROM "Tareas" t
+                   WHERE t.id_usuario = n.id_usuario AND t.estado = 'completada'
+                     AND t.fecha >= n.inicio AND t.fecha < n.fin
+                     AND (n.id_categoria IS NULL OR t.id_categoria = n.id_categoria)
+                     AND (n.prioridad IS NULL OR t.prioridad = n.prioridad)
+               ) ELSE 0 END AS progreso
+        FROM nuevas n
+    )
+    UPDATE "Metas" SET
+        fecha_inicio = c.inicio,
+        fin_ventana = c.fin,
+        progreso = c.progreso,
+        completada = (c.progreso >= "Metas".objetivo)
+    FROM conteos c
+    WHERE "Metas".id_meta = c.id_meta
+    RETURNING "Metas".id_meta, "Metas".id_usuario, "Metas".descripcion, "Metas".fecha_inicio, "Metas".completada
+""")
+
+
+def ventana(frecuencia: str, dia: date) -> Tuple[date, date]:
+    """(inicio, fin exclusivo) de la ventana de `frecuencia` que contiene `dia`."""
+    if frecuencia == "diaria":
+        return dia, dia + timedelta(days=1)
+    if frecuencia == "semanal":
+        inicio = dia - timedelta(days=dia.weekday())
+        return inicio, inicio + timedelta(days=7)
+    inicio = dia.replace(day=1)
+    return inicio, (inicio + timedelta(days=32)).replace(day=1)
+
+
+def contar_tareas(db: Session, meta: Meta) -> int:
+    """Tareas completadas que cuentan para `meta` en su ventana actual."""
+    q = select(func.count()).select_from(Tarea).where(
+        Tarea.id_usuario == meta.id_usuario,
+        Tarea.estado == "completada",
+        Tarea.fecha >= meta.fecha_inicio,
+        Tarea.fecha < meta.fin_ventana,
+    )
+    if meta.id_categoria is not None:
+        q = q.where(Tarea.id_categoria == meta.id_categoria)
+    if meta.prioridad is not None:
+        q = q.where(Tarea.prioridad == meta.prioridad)
+    return db.execute(q).scalar()
+
+
+# ======================= PROGRESO INCREMENTAL =======================
+def _ajustes(evento: Evento) -> List[Tuple[int, dict]]:
+    """(delta, datos de la tarea) que aplica cada evento."""
+    if evento.tipo == TAREA_COMPLETADA:
+        return [(1, evento.datos)]
+    if evento.tipo in (TAREA_REABIERTA, TAREA_ELIMINADA):
+        return [(-1, evento.datos)]
+    if evento.tipo == TAREA_MOVIDA:
+        return [(-1, evento.datos["antes"]), (1, evento.datos["despues"])]
+    return [(evento.datos["n"], evento.datos)]   # tareas_importadas
+
+
+def procesar_eventos(eventos: List[Evento]):
+    """Suscriptor del bus: suma o resta las tareas a las metas automáticas que coinciden."""
+    # id_meta → [id_usuario, descripcion, fecha_inicio, objetivo, progreso inicial, progreso final]
+    tocadas: Dict[int, list] = {}
+    db = SessionLocal()
+    try:
+        for evento in eventos:
+            for delta, datos in _ajustes(evento):
+                if datos.get("fecha") is None:
+                    continue
+                filas = db.execute(_SQL_PROGRESO, {
+                    "delta": delta,
+                    "id_usuario": evento.id_usuario,
+                    "fecha": datos["fecha"].isoformat(),
+                    "id_categoria": datos.get("id_categoria"),
+                    "prioridad": datos.get("prioridad"),
+                }).all()
+                for f in filas:
+                    meta = tocadas.setdefault(f.id_meta, [evento.id_usuario, f.descripcion, f.fecha_inicio,
+                                                          f.objetivo, f.progreso - delta, 0])
+                    meta[5] = f.progreso
+        db.commit()
+    finally:
+        db.close()
+    # Transiciones netas del lote: mover una tarea dentro de la misma meta no la reabre y la vuelve a cumplir
+    for id_meta, (id_usuario, descripcion, fecha_inicio, objetivo, inicial, final) in tocadas.items():
+        if inicial < objetivo <= final:
+            bus.emitir(META_CUMPLIDA, id_usuario, id_meta=id_meta, fecha_inicio=fecha_inicio, descripcion=descripcion)
+        elif final < objetivo <= inicial:
+            bus.emitir(META_REABIERTA, id_usuario, id_meta=id_meta)
+
+
+bus.suscribir([TAREA_COMPLETADA, TAREA_REABIERTA, TAREA_ELIMINADA, TAREA_MOVIDA, TAREAS_IMPORTADAS], procesar_eventos)
+
+
+# ======================= RENOVACIÓN DE VENTANAS =======================
+def renovar_ventanas(hoy: Optional[date] = None, lote: int = LOTE) -> int:
+    """Pasa las metas con ventana vencida a la ventana de `hoy`. Un commit por lote; retorna cuántas renovó."""
+    hoy = (hoy or date.today()).isoformat()
+    total = 0
+    while True:
+        db = SessionLocal()
+        try:
+            filas = db.execute(_SQL_RENOVAR, {"hoy": hoy, "lote": lote}).all()
+            db.commit()
+        finally:
+            db.close()
+        # Cumplida ya al empezar la ventana (tareas adelantadas): cuenta como meta cumplida
+        for f in filas:
+            if f.completada:
+                bus.emitir(META_CUMPLIDA, f.id_usuario, id_meta=f.id_meta, fecha_inicio=f.fecha_inicio,
+                           descripcion=f.descripcion)
+        total += len(filas)
+        if len(filas) < lote:
+            return total
+
+
+class RenovadorMetas(ServicioFondo):
+    NOMBRE = "la renovación de ventanas de metas"
+
+    def __init__(self):
+        super().__init__(renovadas=0, ejecuciones=0)
+        self._ultima: Optional[datetime] = None
+
+    def _activo(self) -> bool:
+        return RENOVACION_ACTIVA
+
+    async def _ciclo(self):
+        self._contadores["renovadas"] += await asyncio.to_thread(renovar_ventanas)
+        self._contadores["ejecuciones"] += 1
+        self._ultima = datetime.now()
+
+    def _espera(self) -> float:
+        # Hasta la próxima medianoche (con un margen para no quedar en el día anterior)
+        manana = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        return (manana - datetime.now()).total_seconds() + 1
+
+    def estadisticas(self) -> dict:
+        return {"ultima": self._ultima.isoformat() if self._ultima else None, **self._contadores}
+
+
+renovador = RenovadorMetas()
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else ""
+    if comando != "renovar":
+        print("Uso: python -m app.routes.progreso_metas renovar")
+        sys.exit(2)
+    from app.routes import motor_logros  # noqa: F401  (logros de las metas que arrancan cumplidas)
+
+    print(f"{renovar_ventanas()} metas renovadas")
+    asyncio.run(bus.procesar_pendientes())
@@ -0,0 +1,237 @@
+# app/routes/recordatorios.py
+"""
+Programador de recordatorios de tareas (recordatorio_minutos antes de fecha + hora).
+
+Cada worker mantiene en memoria un min-heap con el próximo aviso de cada
+tarea pendiente:
+  - al arrancar se rehidrata desde la base;
+  - cada INTERVALO segundos sigue la secuencia de cambios de Tareas (seq y
+    lápidas de /sync, migración 005), así ve altas, ediciones y borrados
+    hechos por cualquier worker, lote o importación;
+  - actualizar o borrar es O(log n): se empuja la entrada nueva y la vieja
+    queda obsoleta (se descarta al salir del heap; compactación periódica).
+
+Al vencer un aviso se revalida la tarea y se "reclama" con INSERT OR IGNORE
+en Notificaciones (UNIQUE id_tarea, tipo, momento): si varios workers
+disparan el mismo aviso, solo uno crea la notificación y encola el correo
+(app/routes/correos.py).
+"""
+import asyncio
+import heapq
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.routes.correos import encolar, repartidor
+from app.routes.servicio_fondo import ServicioFondo
+
+logger = logging.getLogger(__name__)
+
+RECORDATORIOS_ACTIVOS = os.getenv("RECORDATORIOS_ACTIVOS", "true").lower() == "true"
+RECORDATORIOS_EMAIL = os.getenv("RECORDATORIOS_EMAIL", "false").lower() == "true"
+INTERVALO = float(os.getenv("RECORDATORIOS_INTERVALO", "5"))
+# Avisos vencidos mientras el servidor estaba caído: se envían si no pasó más que esto
+GRACIA = timedelta(minutes=int(os.getenv("RECORDATORIOS_GRACIA_MINUTOS", "60")))
+# Tareas sin hora: el aviso se calcula sobre esta hora del día
+HORA_POR_DEFECTO = time.fromisoformat(os.getenv("RECORDATORIOS_HORA_DEFECTO", "09:00"))
+LOTE_CAMBIOS = 5000
+
+TIPO = "recordatorio"
+
+_SQL_CAMPOS = "id_tarea, id_usuario, titulo, fecha, hora, recordatorio_minutos, estado"
+
+Entrada = Tuple[datetime, int]   # (momento del aviso, id_tarea)
+
+
+def momento_aviso(fecha, hora, minutos, estado) -> Optional[datetime]:
+    """Cuándo avisar, o None si la tarea no tiene recordatorio activo."""
+    if minutos is None or fecha is None or estado == "completada":
+        return None
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    try:
+        hora = time.fromisoformat(hora) if hora else HORA_POR_DEFECTO
+    except ValueError:
+        hora = HORA_POR_DEFECTO
+    return datetime.combine(fecha, hora) - timedelta(minutes=minutos)
+
+
+def _texto_momento(momento: datetime) -> str:
+    # Formato fijo: forma parte de la clave única del reclamo
+    return momento.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ProgramadorRecordatorios(ServicioFondo):
+    NOMBRE = "el programador de recordatorios"
+
+    def __init__(self):
+        super().__init__(disparados=0, reclamados_por_otro=0, descartados=0)
+        self._heap: List[Entrada] = []
+        self._vigentes: Dict[int, datetime] = {}
+        self._ultimo_seq = 0
+
+    # --- Heap ---
+    def programar(self, id_tarea: int, momento: Optional[datetime]):
+        """Alta, cambio o baja (momento None) del aviso de una tarea. O(log n)."""
+        if momento is None or momento < datetime.now() - GRACIA:
+            self._vigentes.pop(id_tarea, None)
+            return
+        if self._vigentes.get(id_tarea) == momento:
+            return
+        self._vigentes[id_tarea] = momento
+        heapq.heappush(self._heap, (momento, id_tarea))
+        if self._despertar is not None and self._heap[0] == (momento, id_tarea):
+            self._despertar.set()   # es el más próximo: recalcular la espera
+
+    def _compactar(self):
+        if len(self._heap) > 2 * len(self._vigentes) + 1000:
+            self._heap = [(m, i) for i, m in self._vigentes.items()]
+            heapq.heapify(self._heap)
+
+    def _sacar_vencidos(self, ahora: datetime) -> List[Entrada]:
+        vencidos = []
+        while self._heap and self._heap[0][0] <= ahora:
+            momento, id_tarea = heapq.heappop(self._heap)
+            if self._vigentes.get(id_tarea) == momento:   # si no, entrada obsoleta
+                del self._vigentes[id_tarea]
+                vencidos.append((momento, id_tarea))
+        return vencidos
+
+    # --- Base de datos (en hilo aparte) ---
+    def _rehidratar(self) -> Tuple[int, list]:
+        db = SessionLocal()
+        try:
+            seq = db.execute(text('SELECT seq FROM "Sync_secuencia" WHERE id = 1')).scalar() or 0
+            filas = db.execute(text(
+                f'SELECT {_SQL_CAMPOS} FROM "Tareas" '
+                "WHERE recordatorio_minutos IS NOT NULL AND fecha >= :desde"
+            ), {"desde": (date.today() - timedelta(days=1)).isoformat()}).all()
+            return seq, filas
+        finally:
+            db.close()
+
+    def _leer_cambios(self, desde_seq: int) -> Tuple[int, list, list]:
+        db = SessionLocal()
+        try:
+            # Como /sync: primero el tope de la secuencia y ambas lecturas acotadas
+            # por él. Todo seq <= tope ya está confirmado, así Tareas y las lápidas
+            # ven el mismo corte aunque cada SELECT lea su propio snapshot; lo que
+            # se escriba después queda por encima del tope y llega en la próxima.
+            tope = db.execute(text('SELECT seq FROM "Sync_secuencia" WHERE id = 1')).scalar() or 0
+            filas = db.execute(text(
+                f'SELECT {_SQL_CAMPOS}, seq FROM "Tareas" '
+                "WHERE seq > :seq AND seq <= :tope ORDER BY seq LIMIT :lote"
+            ), {"seq": desde_seq, "tope": tope, "lote": LOTE_CAMBIOS}).all()
+            if len(filas) == LOTE_CAMBIOS:
+                tope = filas[-1].seq   # lote lleno: el resto de los cambios en la próxima vuelta
+            borradas = db.execute(text(
+                'SELECT id_registro, seq FROM "Sync_eliminados" '
+                "WHERE coleccion = 'tareas' AND seq > :seq AND seq <= :tope"
+            ), {"seq": desde_seq, "tope": tope}).all()
+            return max(desde_seq, tope), filas, [b.id_registro for b in borradas]
+        finally:
+            db.close()
+
+    def _reclamar(self, id_tarea: int, momento: datetime) -> Optional[dict]:
+        """Revalida la tarea y crea la notificación. None si ya no aplica o la reclamó otro."""
+        db = SessionLocal()
+        try:
+            tarea = db.execute(
+                text(f'SELECT {_SQL_CAMPOS} FROM "Tareas" WHERE id_tarea = :id'), {"id": id_tarea}
+            ).first()
+            if tarea is None or momento_aviso(tarea.fecha, tarea.hora, tarea.recordatorio_minutos, tarea.estado) != momento:
+                return None
+            cuando = f"a las {tarea.hora}" if tarea.hora else "hoy"
+            if tarea.recordatorio_minutos:
+                cuando = f"en {tarea.recordatorio_minutos} minutos"
+            mensaje = f"Recordatorio: «{tarea.titulo}» empieza {cuando}"
+            insertada = db.execute(text(
+                'INSERT OR IGNORE INTO "Notificaciones" (id_usuario, id_tarea, tipo, mensaje, momento) '
+                "VALUES (:id_usuario, :id_tarea, :tipo, :mensaje, :momento)"
+            ), {
+                "id_usuario": tarea.id_usuario, "id_tarea": id_tarea, "tipo": TIPO,
+                "mensaje": mensaje, "momento": _texto_momento(momento),
+            }).rowcount
+            if not insertada:
+                db.commit()
+                return {}
+            if RECORDATORIOS_EMAIL:
+                usuario = db.execute(
+                    text('SELECT correo, nombre FROM "Usuario" WHERE id_usuario = :id'), {"id": tarea.id_usuario}
+                ).first()
+                if usuario and usuario.correo:
+                    # Misma transacción que la notificación: el correo sale una sola vez
+                    encolar(
+                        db,
+                        destinatario=usuario.correo,
+                        asunto=f"Recordatorio: {tarea.titulo} - TimeWise",
+                        cuerpo=f"<p>Hola <strong>{usuario.nombre}</strong>,</p><p>{mensaje}.</p>",
+                    )
+            db.commit()
+            return {"mensaje": mensaje}
+        finally:
+            db.close()
+
+    # --- Bucle ---
+    async def _sincronizar(self):
+        ultimo, filas, borradas = await asyncio.to_thread(self._leer_cambios, self._ultimo_seq)
+        for f in filas:
+            self.programar(f.id_tarea, momento_aviso(f.fecha, f.hora, f.recordatorio_minutos, f.estado))
+        for id_tarea in borradas:
+            self.programar(id_tarea, None)
+        self._ultimo_seq = ultimo
+        self._compactar()
+
+    async def _disparar(self, momento: datetime, id_tarea: int):
+        try:
+            aviso = await asyncio.to_thread(self._reclamar, id_tarea, momento)
+        except Exception:
+            self._contadores["errores"] += 1
+            logger.exception("Error disparando el recordatorio de la tarea %s", id_tarea)
+            return
+        if aviso is None:
+            self._contadores["descartados"] += 1
+        elif not aviso:
+            self._contadores["reclamados_por_otro"] += 1
+        else:
+            self._contadores["disparados"] += 1
+            if RECORDATORIOS_EMAIL:
+                repartidor.avisar()
+
+    # --- Servicio de fondo ---
+    def _activo(self) -> bool:
+        return RECORDATORIOS_ACTIVOS
+
+    async def _preparar(self):
+        seq, filas = await asyncio.to_thread(self._rehidratar)
+        for f in filas:
+            self.programar(f.id_tarea, momento_aviso(f.fecha, f.hora, f.recordatorio_minutos, f.estado))
+        self._ultimo_seq = seq
+        logger.info("Recordatorios rehidratados: %d pendientes", len(self._vigentes))
+
+    async def _ciclo(self):
+        await self._sincronizar()
+        for momento, id_tarea in self._sacar_vencidos(datetime.now()):
+            await self._disparar(momento, id_tarea)
+
+    def _espera(self) -> float:
+        # Hasta el aviso más próximo, como mucho INTERVALO (para sincronizar)
+        if self._heap:
+            return min(INTERVALO, max(0.0, (self._heap[0][0] - datetime.now()).total_seconds()))
+        return INTERVALO
+
+    def estadisticas(self) -> dict:
+        return {
+            "pendientes": len(self._vigentes),
+            "heap": len(self._heap),
+            "proximo": self._heap[0][0].isoformat() if self._heap else None,
+            "ultimo_seq": self._ultimo_seq,
+            **self._contadores,
+        }
+
+
+programador = ProgramadorRecordatorios()
@@ -0,0 +1,98 @@
+# app/routes/servicio_fondo.py
+"""
+Base de los servicios de fondo (correos, recordatorios, bus de eventos,
+renovación de metas): una tarea en el loop que repite `_ciclo()` y duerme
+hasta `_espera()` segundos o hasta que alguien la despierte con `avisar()`.
+
+Lo común vive aquí: arrancar con el loop corriendo, contar y registrar los
+errores de cada ciclo sin matar la tarea, y detenerla cancelando y
+esperando (o, con DRENAR_AL_DETENER, dejando terminar el ciclo en curso
+más uno final). Las subclases solo implementan `_ciclo`, y si lo necesitan
+`_preparar`, `_espera`, `_activo` y `_al_detener`.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+
+class ServicioFondo:
+    NOMBRE = "servicio de fondo"   # para los logs: "Error en <NOMBRE>"
+    DRENAR_AL_DETENER = False      # True: detener() no cancela, espera el último ciclo
+
+    def __init__(self, **contadores: int):
+        self._tarea: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._despertar: Optional[asyncio.Event] = None
+        self._parar = False
+        self._contadores = {**contadores, "errores": 0}
+        self._logger = logging.getLogger(type(self).__module__)
+
+    # --- Para las subclases ---
+    def _activo(self) -> bool:
+        return True
+
+    async def _preparar(self):
+        """Una vez, al arrancar la tarea."""
+
+    async def _ciclo(self):
+        raise NotImplementedError
+
+    def _espera(self) -> Optional[float]:
+        """Segundos hasta el próximo ciclo si nadie avisa antes (None = solo con aviso)."""
+        return None
+
+    async def _al_detener(self):
+        """Limpieza tras detener la tarea (p. ej. cerrar conexiones)."""
+
+    # --- Ciclo de vida ---
+    async def _bucle(self):
+        await self._preparar()
+        while True:
+            # Se limpia antes del ciclo: un aviso que llega durante el ciclo no se pierde
+            self._despertar.clear()
+            try:
+                await self._ciclo()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._contadores["errores"] += 1
+                self._logger.exception("Error en %s", self.NOMBRE)
+            if self._parar:
+                return
+            try:
+                await asyncio.wait_for(self._despertar.wait(), timeout=self._espera())
+            except asyncio.TimeoutError:
+                pass
+
+    def avisar(self):
+        """Adelanta el próximo ciclo (se puede llamar desde cualquier hilo)."""
+        if self._loop is not None and not self._loop.is_closed() and self._despertar is not None:
+            self._loop.call_soon_threadsafe(self._despertar.set)
+
+    def iniciar(self):
+        """Llamar desde el evento startup (con el loop corriendo)."""
+        if not self._activo() or self._tarea is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._despertar = asyncio.Event()
+        self._parar = False
+        self._tarea = self._loop.create_task(self._bucle())
+
+    async def detener(self):
+        if self._tarea is not None:
+            if self.DRENAR_AL_DETENER:
+                self._parar = True
+                self._despertar.set()
+                await self._tarea
+            else:
+                self._tarea.cancel()
+                try:
+                    await self._tarea
+                except asyncio.CancelledError:
+                    pass
+            self._tarea = None
+            self._loop = None
+        await self._al_detener()
+
+    def estadisticas(self) -> dict:
+        return dict(self._contadores)
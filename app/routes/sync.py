@@ -0,0 +1,122 @@
+# app/routes/sync.py
+"""
+Sincronización incremental: GET /sync?since=<seq>.
+
+Devuelve solo lo que cambió después de `since` (altas, modificaciones y
+lápidas de borrados) en orden de seq, paginado con cursor. El cliente pide
+páginas mientras haya `next_cursor` y al final guarda `seq` para la
+siguiente reconexión. Ver app/database/sync_cambios.py.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import get_async_db
+from app.database.sync_cambios import SQL_CAMBIOS, SQL_ELIMINADOS, SQL_ESTADO, cursor_valido, parametros_cambios
+from app.routes.auth import get_current_user
+from app.routes.json_rapido import filas_a_dicts, respuesta_json
+from app.routes.logros import LogroOut, COLUMNAS_LOGRO_OUT
+from app.routes.metas import MetaOut, COLUMNAS_META_OUT
+from app.routes.models import Logro, Meta, Tarea, Usuario, UsuarioModo
+from app.routes.paginacion import codificar_cursor, decodificar_cursor
+from app.routes.tareas import TareaOut, COLUMNAS_TAREA_OUT
+
+router = APIRouter(prefix="/sync", tags=["Sincronización"])
+
+
+# === Modelos (solo documentan la respuesta; se serializa con json_rapido) ===
+class TareaSync(TareaOut):
+    seq: int
+
+
+class MetaSync(MetaOut):
+    seq: int
+
+
+class LogroSync(LogroOut):
+    seq: int
+
+
+class ModoSync(BaseModel):
+    id_modo: int
+    fecha_activacion: Optional[datetime]
+    seq: int
+
+
+class Eliminado(BaseModel):
+    coleccion: str
+    id: int
+    seq: int
+
+
+class RespuestaSync(BaseModel):
+    tareas: List[TareaSync]
+    metas: List[MetaSync]
+    logros: List[LogroSync]
+    modos: List[ModoSync]
+    eliminados: List[Eliminado]
+    seq: int
+    next_cursor: Optional[str] = None
+
+
+# coleccion → (columnas de salida, columna id)
+FUENTES = {
+    "tareas": ([*COLUMNAS_TAREA_OUT, Tarea.seq], Tarea.id_tarea),
+    "metas": ([*COLUMNAS_META_OUT, Meta.seq], Meta.id_meta),
+    "logros": ([*COLUMNAS_LOGRO_OUT, Logro.seq], Logro.id_logro),
+    "modos": ([UsuarioModo.id_modo, UsuarioModo.fecha_activacion, UsuarioModo.seq], UsuarioModo.id_modo),
+}
+
+
+@router.get("", response_model=RespuestaSync)
+async def cambios_desde(
+    since: int = Query(0, ge=0, description="Último seq recibido (0 = todo)"),
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: Usuario = Depends(get_current_user),
+):
+    seq_actual, purgado_hasta = (await db.execute(SQL_ESTADO)).one()
+    # ✅ Validación: las lápidas anteriores a `purgado_hasta` ya no existen
+    if 0 < since < purgado_hasta:
+        raise HTTPException(410, "Historial de cambios purgado: sincroniza de nuevo con since=0")
+
+    desde = decodificar_cursor(cursor, 3) if cursor else None
+    # ✅ Validación: (seq, colección, id) con los tipos que genera el propio feed
+    if desde is not None and not cursor_valido(desde):
+        raise HTTPException(400, "Cursor inválido")
+    resultado = await db.execute(SQL_CAMBIOS, parametros_cambios(user.id_usuario, since, desde, limit + 1))
+    cambios = resultado.all()
+    siguiente = None
+    if len(cambios) > limit:
+        cambios = cambios[:limit]
+        siguiente = codificar_cursor(list(cambios[-1]))
+
+    ids = defaultdict(list)
+    for _, coleccion, id_registro in cambios:
+        ids[coleccion].append(id_registro)
+
+    respuesta = {coleccion: [] for coleccion in FUENTES}
+    for coleccion, (columnas, columna_id) in FUENTES.items():
+        if ids[coleccion]:
+            filas = await db.execute(
+                select(*columnas)
+                .where(columna_id.in_(ids[coleccion]), columna_id.table.c.id_usuario == user.id_usuario)
+                .order_by(columnas[-1])
+            )
+            respuesta[coleccion] = filas_a_dicts(filas)
+
+    respuesta["eliminados"] = []
+    if ids["eliminados"]:
+        filas = await db.execute(SQL_ELIMINADOS, {"id_usuario": user.id_usuario, "seqs": ids["eliminados"]})
+        respuesta["eliminados"] = filas_a_dicts(filas)
+
+    # Sin más páginas, el cliente puede guardar el seq global: nada por debajo cambiará
+    respuesta["seq"] = cambios[-1][0] if siguiente else max(seq_actual, since)
+    respuesta["next_cursor"] = siguiente
+    return respuesta_json(respuesta)
@@ -1,12 +1,24 @@
 # app/routes/tareas.py → VERSIÓN ULTRA PROFESIONAL 2025
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, Response, UploadFile, File
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_db, get_async_db
 from app.routes.models import Tarea, Usuario
 from app.routes.auth import get_current_user
 from app.routes.auth_utils import validar_string, validar_hora
-from pydantic import BaseModel, field_validator
-from typing import Optional, List
+from app.routes.paginacion import preparar_pagina, cerrar_pagina
+from app.database import estadisticas_rollup
+from app.routes.versiones import etag_coleccion, respuesta_304, marcar_etag
+from app.routes.json_rapido import columnas_de, filas_a_dicts, respuesta_json
+from app.routes.exportacion import id_usuario_exportacion, respuesta_exportacion
+from app.routes.importacion import detectar_formato, leer_filas
+from app.routes.catalogo import obtener_catalogo
+from app.routes import busqueda
+from app.routes.eventos import bus, TAREA_COMPLETADA, TAREA_REABIERTA, TAREA_ELIMINADA, TAREA_MOVIDA, TAREAS_IMPORTADAS
+from pydantic import BaseModel, ValidationError, field_validator
+from typing import Optional, List, Union
+from collections import Counter
 from datetime import date
 
 router = APIRouter(prefix="/tareas", tags=["Tareas"])
@@ -25,7 +37,7 @@ class TareaCreate(BaseModel):
 
     @field_validator("titulo")
     def validar_titulo(cls, v):
-        if not validar_string(v, min_len=3, max_len=200):
+        if not validar_string(v, min_len=3, max_len=200)[0]:
             raise ValueError("El título debe tener entre 3 y 200 caracteres")
         return v.strip()
 
@@ -71,7 +83,7 @@ class TareaUpdate(BaseModel):
 
     @field_validator("titulo")
     def validar_titulo(cls, v):
-        if v is not None and not validar_string(v, min_len=3, max_len=200):
+        if v is not None and not validar_string(v, min_len=3, max_len=200)[0]:
             raise ValueError("El título debe tener entre 3 y 200 caracteres")
         return v.strip() if v else None
 
@@ -124,6 +136,126 @@ class TareaOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TareaPagina(BaseModel):
+    items: List[TareaOut]
+    next_cursor: Optional[str] = None
+
+
+# --- Operaciones por lote (sincronización offline) ---
+MAX_LOTE = 500
+
+
+class TareaLoteUpdate(TareaUpdate):
+    id_tarea: int
+
+
+class ResultadoLote(BaseModel):
+    indice: int
+    id_tarea: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class RespuestaLote(BaseModel):
+    procesadas: int
+    fallidas: int
+    resultados: List[ResultadoLote]
+
+
+class TareaBusqueda(TareaOut):
+    rango: float
+    fragmento: str
+
+
+class TareaBusquedaPagina(BaseModel):
+    items: List[TareaBusqueda]
+    next_cursor: Optional[str] = None
+
+
+# --- Importación (CSV / iCalendar) ---
+FILAS_POR_TRANSACCION = 2000
+MAX_ERRORES_REPORTE = 200
+
+
+class TareaImport(TareaCreate):
+    """Mismas reglas que TareaCreate, pero admite fechas pasadas (historial) y estado."""
+    estado: str = "pendiente"
+
+    @field_validator("fecha")
+    def fecha_no_pasada(cls, v):
+        return v
+
+    @field_validator("estado")
+    def validar_estado(cls, v):
+        return TareaUpdate.validar_estado(v)
+
+
+class ErrorImportacion(BaseModel):
+    fila: int
+    error: str
+
+
+class ResultadoImportacion(BaseModel):
+    importadas: int
+    con_error: int
+    errores: List[ErrorImportacion]
+    errores_truncados: bool = False
+
+
+# Orden estable de los listados: (fecha, hora, id_tarea)
+ORDEN_TAREAS = [(Tarea.fecha, False), (Tarea.hora, False), (Tarea.id_tarea, False)]
+
+
+def _clave_rollup(tarea: Tarea):
+    """Campos de la tarea que determinan su bucket de estadísticas."""
+    return (tarea.id_usuario, tarea.id_categoria, tarea.fecha, tarea.estado)
+
+
+def _clave_metas(tarea):
+    """Campos de la tarea que deciden a qué metas automáticas cuenta (progreso_metas.py)."""
+    return (tarea.estado, tarea.id_categoria, tarea.prioridad, tarea.fecha)
+
+
+def _datos_metas(clave: tuple) -> dict:
+    _, id_categoria, prioridad, fecha = clave
+    return {"id_categoria": id_categoria, "prioridad": prioridad, "fecha": fecha}
+
+
+def _emitir_cambio_tarea(id_usuario: int, id_tarea: int, antes: tuple, despues: Optional[tuple]):
+    """
+    Eventos de dominio (logros, metas) de una tarea que cambió o se borró.
+    `antes` y `despues` son _clave_metas (`despues` None = eliminada). Igual
+    que los rollups, una completada que cambia de clave resta en la vieja y
+    suma en la nueva; cada evento lleva los datos con los que la tarea
+    contaba. Llamar tras el commit.
+    """
+    contaba = antes[0] == "completada"
+    cuenta = despues is not None and despues[0] == "completada"
+    if not contaba and cuenta:
+        bus.emitir(TAREA_COMPLETADA, id_usuario, id_tarea=id_tarea, **_datos_metas(despues))
+    elif contaba and despues is None:
+        bus.emitir(TAREA_ELIMINADA, id_usuario, id_tarea=id_tarea, **_datos_metas(antes))
+    elif contaba and not cuenta:
+        bus.emitir(TAREA_REABIERTA, id_usuario, id_tarea=id_tarea, **_datos_metas(antes))
+    elif contaba and antes[1:] != despues[1:]:
+        bus.emitir(TAREA_MOVIDA, id_usuario, id_tarea=id_tarea,
+                   antes=_datos_metas(antes), despues=_datos_metas(despues))
+
+
+# Listados: solo las columnas de TareaOut, como filas Core (ver json_rapido.py)
+COLUMNAS_TAREA_OUT = columnas_de(Tarea, TareaOut)
+
+
+async def _responder_listado(db: AsyncSession, response: Response, q, limit: int, cursor: Optional[str], todas: bool):
+    if todas:
+        # Compatibilidad: listado completo sin paginar
+        resultado = await db.execute(q.order_by(Tarea.fecha, Tarea.hora, Tarea.id_tarea))
+        return respuesta_json(filas_a_dicts(resultado), response)
+    resultado = await db.execute(preparar_pagina(q, ORDEN_TAREAS, limit, cursor))
+    filas, siguiente = cerrar_pagina(resultado.all(), ORDEN_TAREAS, limit)
+    return respuesta_json({"items": filas_a_dicts(filas), "next_cursor": siguiente}, response)
+
+
 # ======================= ENDPOINTS =======================
 @router.post("/", response_model=TareaOut, status_code=201)
 def crear_tarea(tarea: TareaCreate, db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
@@ -145,18 +277,260 @@ def crear_tarea(tarea: TareaCreate, db: Session = Depends(get_db), user: Usuario
     return nueva
 
 
-@router.get("/", response_model=List[TareaOut])
-def listar_tareas(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=Union[TareaPagina, List[TareaOut]])
+async def listar_tareas(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     user: Usuario = Depends(get_current_user),
     id_categoria: Optional[int] = Query(None, alias="categoria"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    todas: bool = Query(False, description="Devuelve la lista completa sin paginar (compatibilidad)"),
 ):
-    q = db.query(Tarea).filter(Tarea.id_usuario == user.id_usuario)
+    # GET condicional: si nada cambió, 304 sin ejecutar el listado
+    etag = await etag_coleccion(db, request, user.id_usuario, "tareas")
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    q = select(*COLUMNAS_TAREA_OUT).where(Tarea.id_usuario == user.id_usuario)
     if id_categoria:
-        q = q.filter(Tarea.id_categoria == id_categoria)
-    return q.order_by(Tarea.fecha, Tarea.hora).all()
+        q = q.where(Tarea.id_categoria == id_categoria)
+    return await _responder_listado(db, response, q, limit, cursor, todas)
+
+
+# ======================= LOTES =======================
+# Todo el lote ya viene validado por Pydantic (422 si algún elemento es inválido)
+# y se aplica en UNA transacción con sentencias masivas: un solo commit/fsync.
+
+def _validar_lote(n: int):
+    if n == 0:
+        raise HTTPException(400, "El lote está vacío")
+    if n > MAX_LOTE:
+        raise HTTPException(400, f"Máximo {MAX_LOTE} operaciones por lote")
+
+
+def _tareas_propias(db: Session, id_usuario: int, ids: List[int]) -> dict:
+    """id_tarea → fila con los campos de _clave_rollup y _clave_metas, solo de las tareas del usuario."""
+    filas = db.execute(
+        select(Tarea.id_tarea, Tarea.id_usuario, Tarea.id_categoria, Tarea.fecha, Tarea.estado, Tarea.prioridad)
+        .where(Tarea.id_usuario == id_usuario, Tarea.id_tarea.in_(ids))
+    ).all()
+    return {f.id_tarea: f for f in filas}
+
+
+def _error_categoria(id_categoria: Optional[int], categorias: dict) -> Optional[str]:
+    """Mensaje si la categoría no sirve para una tarea (Tareas.id_categoria es NOT NULL), si no None."""
+    if id_categoria is None:
+        return "La categoría es obligatoria"
+    if id_categoria not in categorias:
+        return f"La categoría {id_categoria} no existe"
+    return None
+
+
+def _respuesta_lote(resultados: List[ResultadoLote]) -> RespuestaLote:
+    fallidas = sum(1 for r in resultados if not r.ok)
+    return RespuestaLote(procesadas=len(resultados) - fallidas, fallidas=fallidas, resultados=resultados)
+
+
+@router.post("/batch", response_model=RespuestaLote, status_code=201)
+def crear_tareas_lote(tareas: List[TareaCreate], db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
+    _validar_lote(len(tareas))
+    categorias = obtener_catalogo().categorias_por_id
+    resultados, validas, filas = [], [], []
+    for i, t in enumerate(tareas):
+        # ✅ Validación: la categoría debe existir (antes de insertar, para no abortar el lote)
+        error = _error_categoria(t.id_categoria, categorias)
+        if error:
+            resultados.append(ResultadoLote(indice=i, ok=False, error=error))
+            continue
+        validas.append(i)
+        filas.append({
+            "id_usuario": user.id_usuario,
+            "titulo": t.titulo,
+            "descripcion": t.descripcion,
+            "fecha": t.fecha,
+            "hora": t.hora,
+            "id_categoria": t.id_categoria,
+            "prioridad": t.prioridad,
+            "estado": "pendiente",
+            "etiqueta_color": t.etiqueta_color,
+            "recordatorio_minutos": t.recordatorio_minutos,
+        })
+    if filas:
+        ids = db.execute(
+            insert(Tarea).returning(Tarea.id_tarea, sort_by_parameter_order=True), filas
+        ).scalars().all()
+        db.commit()
+        resultados += [ResultadoLote(indice=i, id_tarea=id_tarea, ok=True) for i, id_tarea in zip(validas, ids)]
+    return _respuesta_lote(sorted(resultados, key=lambda r: r.indice))
+
+
+@router.put("/batch", response_model=RespuestaLote)
+def actualizar_tareas_lote(cambios: List[TareaLoteUpdate], db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
+    _validar_lote(len(cambios))
+    ids = [c.id_tarea for c in cambios]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(400, "Una misma tarea aparece más de una vez en el lote")
+
+    propias = _tareas_propias(db, user.id_usuario, ids)
+    categorias = obtener_catalogo().categorias_por_id
+    resultados, filas, estados = [], [], []
+    for i, cambio in enumerate(cambios):
+        propia = propias.get(cambio.id_tarea)
+        if propia is None:
+            resultados.append(ResultadoLote(indice=i, id_tarea=cambio.id_tarea, ok=False, error="Tarea no encontrada o no te pertenece"))
+            continue
+        datos = cambio.dict(exclude_unset=True)
+        error = "id_categoria" in datos and _error_categoria(datos["id_categoria"], categorias)
+        if error:
+            resultados.append(ResultadoLote(indice=i, id_tarea=cambio.id_tarea, ok=False, error=error))
+            continue
+        if len(datos) > 1:
+            filas.append(datos)
+            antes = _clave_rollup(propia)
+            despues = (
+                antes[0],
+                datos.get("id_categoria", antes[1]),
+                datos.get("fecha", antes[2]),
+                datos.get("estado", antes[3]),
+            )
+            estadisticas_rollup.registrar_cambio_tarea(db, cambio.id_tarea, antes, despues)
+            metas_antes = _clave_metas(propia)
+            metas_despues = (despues[3], despues[1], datos.get("prioridad", propia.prioridad), despues[2])
+            estados.append((cambio.id_tarea, metas_antes, metas_despues))
+        resultados.append(ResultadoLote(indice=i, id_tarea=cambio.id_tarea, ok=True))
+
+    if filas:
+        # UPDATE masivo por clave primaria (agrupado por conjunto de columnas)
+        db.execute(update(Tarea), filas)
+    db.commit()
+    for id_tarea, metas_antes, metas_despues in estados:
+        _emitir_cambio_tarea(user.id_usuario, id_tarea, metas_antes, metas_despues)
+    return _respuesta_lote(resultados)
+
+
+@router.delete("/batch", response_model=RespuestaLote)
+def eliminar_tareas_lote(ids: List[int] = Body(..., embed=True), db: Session = Depends(get_db), user: Usuario = Depends(get_current_user)):
+    _validar_lote(len(ids))
+    propias = _tareas_propias(db, user.id_usuario, ids)
+
+    resultados, borrar = [], set()
+    for i, id_tarea in enumerate(ids):
+        if id_tarea not in propias:
+            resultados.append(ResultadoLote(indice=i, id_tarea=id_tarea, ok=False, error="Tarea no encontrada"))
+            continue
+        if id_tarea not in borrar:
+            estadisticas_rollup.registrar_cambio_tarea(db, id_tarea, _clave_rollup(propias[id_tarea]), None)
+            borrar.add(id_tarea)
+        resultados.append(ResultadoLote(indice=i, id_tarea=id_tarea, ok=True))
+
+    if borrar:
+        db.execute(
+            delete(Tarea).where(Tarea.id_usuario == user.id_usuario, Tarea.id_tarea.in_(borrar)),
+            execution_options={"synchronize_session": False},
+        )
+    db.commit()
+    for id_tarea in borrar:
+        _emitir_cambio_tarea(user.id_usuario, id_tarea, _clave_metas(propias[id_tarea]), None)
+    return _respuesta_lote(resultados)
+
+
+# ======================= IMPORTACIÓN =======================
+def _mensaje_validacion(error: ValidationError) -> str:
+    detalle = error.errors()[0]
+    campo = ".".join(str(c) for c in detalle["loc"])
+    mensaje = detalle["msg"].removeprefix("Value error, ")
+    return f"{campo}: {mensaje}" if campo else mensaje
+
+
+def _insertar_bloque(db: Session, filas: List[dict]):
+    """Inserta un bloque en una transacción y suma las completadas a los rollups y a las metas."""
+    db.execute(insert(Tarea), filas)
+    completadas = Counter(
+        (f["id_usuario"], f["id_categoria"], f["prioridad"], f["fecha"]) for f in filas if f["estado"] == "completada"
+    )
+    rollups = Counter()
+    for (id_usuario, id_categoria, _, fecha), n in completadas.items():
+        rollups[(id_usuario, id_categoria, fecha)] += n
+    for (id_usuario, id_categoria, fecha), n in rollups.items():
+        estadisticas_rollup.aplicar_delta(db, id_usuario, id_categoria, fecha, n, 0)
+    db.commit()
+    # Un evento por clave de metas, no por fila
+    for (id_usuario, id_categoria, prioridad, fecha), n in completadas.items():
+        bus.emitir(TAREAS_IMPORTADAS, id_usuario, n=n, id_categoria=id_categoria, prioridad=prioridad, fecha=fecha)
+
+
+@router.post("/import", response_model=ResultadoImportacion, status_code=201)
+def importar_tareas(
+    archivo: UploadFile = File(..., description="Archivo .csv (con encabezado) o .ics"),
+    formato: Optional[str] = Query(None, alias="format", description="csv o ics (por defecto, la extensión)"),
+    categoria: Optional[int] = Query(None, description="Categoría para las filas que no indiquen una"),
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(get_current_user),
+):
+    """
+    Importa tareas leyendo el archivo de forma incremental. Las filas válidas
+    se insertan en bloques de FILAS_POR_TRANSACCION; las inválidas se saltan
+    y se informan (hasta MAX_ERRORES_REPORTE) con su número de fila.
+    """
+    formato = detectar_formato(formato, archivo.filename)
+    categorias = obtener_catalogo().categorias_por_id
+    # ✅ Validación: categoría por defecto
+    if categoria is not None and categoria not in categorias:
+        raise HTTPException(400, f"La categoría {categoria} no existe")
+
+    importadas = con_error = 0
+    errores: List[ErrorImportacion] = []
+    bloque: List[dict] = []
+
+    for numero, datos in leer_filas(archivo.file, formato):
+        datos.setdefault("id_categoria", categoria)
+        try:
+            tarea = TareaImport(**datos)
+            if tarea.id_categoria is None:
+                raise ValueError("id_categoria: falta la categoría (columna o parámetro ?categoria=)")
+            if tarea.id_categoria not in categorias:
+                raise ValueError(f"id_categoria: la categoría {tarea.id_categoria} no existe")
+        except (ValidationError, ValueError) as e:
+            con_error += 1
+            if len(errores) < MAX_ERRORES_REPORTE:
+                mensaje = _mensaje_validacion(e) if isinstance(e, ValidationError) else str(e)
+                errores.append(ErrorImportacion(fila=numero, error=mensaje))
+            continue
+
+        bloque.append({
+            "id_usuario": user.id_usuario,
+            "titulo": tarea.titulo,
+            "descripcion": tarea.descripcion,
+            "fecha": tarea.fecha,
+            "hora": tarea.hora,
+            "id_categoria": tarea.id_categoria,
+            "prioridad": tarea.prioridad,
+            "estado": tarea.estado,
+            "etiqueta_color": tarea.etiqueta_color,
+            "recordatorio_minutos": tarea.recordatorio_minutos,
+        })
+        if len(bloque) >= FILAS_POR_TRANSACCION:
+            _insertar_bloque(db, bloque)
+            importadas += len(bloque)
+            bloque = []
+
+    if bloque:
+        _insertar_bloque(db, bloque)
+        importadas += len(bloque)
+
+    return ResultadoImportacion(
+        importadas=importadas,
+        con_error=con_error,
+        errores=errores,
+        errores_truncados=con_error > len(errores),
+    )
 
 
+# ======================= UNA TAREA =======================
 @router.put("/{id_tarea}", response_model=TareaOut)
 def actualizar_tarea(
     id_tarea: int,
@@ -168,13 +542,19 @@ def actualizar_tarea(
     if not tarea:
         raise HTTPException(404, "Tarea no encontrada o no te pertenece")
 
+    antes = _clave_rollup(tarea)
+    metas_antes = _clave_metas(tarea)
+
     # Aplicar solo los campos que vengan
     update_data = datos.dict(exclude_unset=True)
 
     for key, value in update_data.items():
         setattr(tarea, key, value)
 
+    despues = _clave_rollup(tarea)
+    estadisticas_rollup.registrar_cambio_tarea(db, tarea.id_tarea, antes, despues)
     db.commit()
+    _emitir_cambio_tarea(user.id_usuario, id_tarea, metas_antes, _clave_metas(tarea))
     db.refresh(tarea)
     return tarea
 
@@ -185,35 +565,129 @@ def eliminar_tarea(id_tarea: int, db: Session = Depends(get_db), user: Usuario =
     if not tarea:
         raise HTTPException(404, "Tarea no encontrada")
 
+    estadisticas_rollup.registrar_cambio_tarea(db, tarea.id_tarea, _clave_rollup(tarea), None)
+    metas_antes = _clave_metas(tarea)
     db.delete(tarea)
     db.commit()
+    _emitir_cambio_tarea(user.id_usuario, id_tarea, metas_antes, None)
     return {"msg": "Tarea eliminada correctamente"}
 
 
-@router.get("/filtrar", response_model=List[TareaOut])
-def filtrar_tareas(
-    db: Session = Depends(get_db),
-    user: Usuario = Depends(get_current_user),
+def filtros_tareas(
     id_categoria: Optional[int] = Query(None, alias="categoria"),
     fecha: Optional[date] = None,
     desde: Optional[date] = None,
     hasta: Optional[date] = None,
     estado: Optional[str] = None,
     prioridad: Optional[str] = None,
-):
-    q = db.query(Tarea).filter(Tarea.id_usuario == user.id_usuario)
-
+) -> list:
+    """Condiciones WHERE de /tareas/filtrar (las reutiliza /tareas/export)."""
+    condiciones = []
     if id_categoria is not None:
-        q = q.filter(Tarea.id_categoria == id_categoria)
+        condiciones.append(Tarea.id_categoria == id_categoria)
     if fecha:
-        q = q.filter(Tarea.fecha == fecha)
+        condiciones.append(Tarea.fecha == fecha)
     if desde:
-        q = q.filter(Tarea.fecha >= desde)
+        condiciones.append(Tarea.fecha >= desde)
     if hasta:
-        q = q.filter(Tarea.fecha <= hasta)
+        condiciones.append(Tarea.fecha <= hasta)
     if estado:
-        q = q.filter(Tarea.estado == estado.strip().lower())
+        condiciones.append(Tarea.estado == estado.strip().lower())
     if prioridad:
-        q = q.filter(Tarea.prioridad == prioridad.strip().lower())
+        condiciones.append(Tarea.prioridad == prioridad.strip().lower())
+    return condiciones
+
 
-    return q.order_by(Tarea.fecha, Tarea.hora).all()
\ No newline at end of file
+@router.get("/filtrar", response_model=Union[TareaPagina, List[TareaOut]])
+async def filtrar_tareas(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Usuario = Depends(get_current_user),
+    filtros: list = Depends(filtros_tareas),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    todas: bool = Query(False, description="Devuelve la lista completa sin paginar (compatibilidad)"),
+):
+    etag = await etag_coleccion(db, request, user.id_usuario, "tareas")
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    q = select(*COLUMNAS_TAREA_OUT).where(Tarea.id_usuario == user.id_usuario, *filtros)
+    return await _responder_listado(db, response, q, limit, cursor, todas)
+
+
+@router.get("/buscar", response_model=TareaBusquedaPagina)
+async def buscar_tareas(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en título y descripción"),
+    db: AsyncSession = Depends(get_async_db),
+    user: Usuario = Depends(get_current_user),
+    filtros: list = Depends(filtros_tareas),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """
+    Búsqueda de texto completo (sin acentos ni mayúsculas), ordenada por relevancia.
+    Las páginas siguientes siguen el orden de la primera (ver busqueda.py).
+    """
+    consulta = busqueda.consulta_fts(q, user.id_usuario)
+    # ✅ Validación: al menos una palabra
+    if consulta is None:
+        raise HTTPException(400, "La búsqueda debe contener al menos una palabra")
+
+    etag = await etag_coleccion(db, request, user.id_usuario, "tareas")
+    no_modificado = respuesta_304(request, etag)
+    if no_modificado:
+        return no_modificado
+    marcar_etag(response, etag)
+
+    rango = busqueda.rango().label("rango")
+    coincide = (
+        select(Tarea.id_tarea)
+        .select_from(Tarea)
+        .join(busqueda.TABLA_FTS, busqueda.TABLA_FTS.c.rowid == Tarea.id_tarea)
+        .where(busqueda.TAREAS_FTS.match(consulta), Tarea.id_usuario == user.id_usuario, *filtros)
+    )
+    if cursor is None:
+        ranking = coincide.order_by(rango, Tarea.id_tarea).limit(busqueda.MAX_RESULTADOS)
+        ids = (await db.execute(ranking)).scalars().all()
+        token = await busqueda.congelar(db, user.id_usuario, ids) if len(ids) > limit else None
+        pagina = list(enumerate(ids[:limit + 1], 1))
+    else:
+        token, desde = busqueda.leer_cursor(cursor)
+        pagina = await busqueda.pagina_congelada(db, token, user.id_usuario, desde, limit + 1)
+
+    siguiente = None
+    if len(pagina) > limit:
+        pagina = pagina[:limit]
+        siguiente = busqueda.cursor_busqueda(token, pagina[-1][0])
+
+    # Las filas se releen con MATCH y filtros: lo borrado o que ya no coincide no sale
+    posiciones = {id_tarea: posicion for posicion, id_tarea in pagina}
+    sentencia = (
+        coincide.with_only_columns(*COLUMNAS_TAREA_OUT, rango, busqueda.fragmento().label("fragmento"))
+        .where(Tarea.id_tarea.in_(list(posiciones)))
+    )
+    filas = sorted((await db.execute(sentencia)).all(), key=lambda f: posiciones[f.id_tarea])
+    return respuesta_json({"items": filas_a_dicts(filas), "next_cursor": siguiente}, response)
+
+
+@router.get("/export")
+def exportar_tareas(
+    formato: str = Query("ndjson", alias="format", description="ndjson o csv"),
+    usuario: Optional[int] = Query(None, description="Solo administradores: exportar otro usuario"),
+    filtros: list = Depends(filtros_tareas),
+    user: Usuario = Depends(get_current_user),
+):
+    """Exportación completa (sin paginar) en streaming, con los filtros de /tareas/filtrar."""
+    id_usuario = id_usuario_exportacion(user, usuario)
+    q = (
+        select(*COLUMNAS_TAREA_OUT)
+        .where(Tarea.id_usuario == id_usuario, *filtros)
+        .order_by(Tarea.fecha, Tarea.hora, Tarea.id_tarea)
+    )
+    return respuesta_exportacion(q, formato, f"tareas_{id_usuario}")
\ No newline at end of file
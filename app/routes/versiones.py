@@ -0,0 +1,47 @@
+# app/routes/versiones.py
+"""
+Sellos de versión por usuario y colección (tareas, metas, logros, modos).
+
+La tabla `Versiones_coleccion` la mantienen triggers de SQLite en cada
+INSERT/UPDATE/DELETE (migración 004), así que cualquier ruta de escritura,
+incluidos los lotes, la incrementa sin código extra. Los listados arman su
+ETag con ese sello y responden 304 sin ejecutar la consulta del listado.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.routes.etag import coincide_etag, no_modificado
+
+CACHE_CONTROL_PRIVADO = "private, no-cache"
+
+_SQL_VERSION = text(
+    'SELECT version FROM "Versiones_coleccion" WHERE id_usuario = :id_usuario AND coleccion = :coleccion'
+)
+
+
+async def version_coleccion(db: AsyncSession, id_usuario: int, coleccion: str) -> int:
+    resultado = await db.execute(_SQL_VERSION, {"id_usuario": id_usuario, "coleccion": coleccion})
+    return resultado.scalar() or 0
+
+
+async def etag_coleccion(db: AsyncSession, request: Request, id_usuario: int, coleccion: str, extra: str = "") -> str:
+    """ETag débil: colección + usuario + versión + parámetros de la consulta."""
+    version = await version_coleccion(db, id_usuario, coleccion)
+    consulta = f"{request.url.path}?{request.url.query}|{extra}".encode()
+    sufijo = hashlib.blake2b(consulta, digest_size=6).hexdigest()
+    return f'W/"{coleccion}-{id_usuario}-{version}-{sufijo}"'
+
+
+def respuesta_304(request: Request, etag: str):
+    """Respuesta 304 si el cliente ya tiene esta versión, si no None."""
+    if coincide_etag(request, etag):
+        return no_modificado(etag, CACHE_CONTROL_PRIVADO)
+    return None
+
+
+def marcar_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_PRIVADO
@@ -0,0 +1,115 @@
+# scripts/bench_json.py
+"""
+Filas por segundo de los listados grandes (camino rápido de json_rapido.py).
+
+    python -m scripts.bench_json
+    python -m scripts.bench_json --peticiones 50 --tareas 10000
+
+Dos mediciones sobre una base temporal nueva (salvo DB_PATH):
+  - endpoint: GET completo con TestClient (consulta + serialización + ASGI);
+  - serialización: las mismas filas con orjson (filas Core, lo que hacen
+    los listados) frente a validarlas y volcarlas con el response_model de
+    Pydantic (lo que haría FastAPI sin el camino rápido).
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+if not os.getenv("DB_PATH"):
+    os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="timewise-bench-")) / "timewise.db")
+os.environ.setdefault("LIMITES_ACTIVOS", "false")
+
+import orjson  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.database.database import SessionLocal  # noqa: E402
+from app.routes.auth_utils import create_access_token  # noqa: E402
+from app.routes.json_rapido import filas_a_dicts  # noqa: E402
+from app.routes.logros import LogroOut, COLUMNAS_LOGRO_OUT  # noqa: E402
+from app.routes.metas import MetaOut, COLUMNAS_META_OUT  # noqa: E402
+from app.routes.models import Logro, Meta, Tarea, Usuario  # noqa: E402
+from app.routes.tareas import TareaOut, COLUMNAS_TAREA_OUT  # noqa: E402
+
+
+def sembrar(tareas: int, metas: int, logros: int) -> int:
+    db = SessionLocal()
+    try:
+        usuario = Usuario(nombre="Bench", apellido="Json", edad=30, id_rol=2,
+                          correo=f"bench{time.time_ns()}@timewise.com", contrasena="sin-login")
+        db.add(usuario)
+        db.flush()
+        hoy = date.today()
+        db.execute(insert(Tarea), [{
+            "id_usuario": usuario.id_usuario, "id_categoria": 1, "titulo": f"Tarea {i}",
+            "descripcion": "descripción " * 5, "fecha": hoy + timedelta(days=i % 90), "hora": f"{i % 24:02d}:00",
+            "prioridad": "media", "estado": "pendiente", "etiqueta_color": "#ff0000", "recordatorio_minutos": 10,
+        } for i in range(tareas)])
+        db.execute(insert(Meta), [{
+            "id_usuario": usuario.id_usuario, "descripcion": f"Meta número {i}", "frecuencia": "semanal",
+            "objetivo": 10, "progreso": 1, "fecha_inicio": hoy, "completada": False,
+        } for i in range(metas)])
+        db.execute(insert(Logro), [{
+            "id_usuario": usuario.id_usuario, "mensaje": f"Logro {i}", "tipo": "tarea",
+        } for i in range(logros)])
+        db.commit()
+        return usuario.id_usuario
+    finally:
+        db.close()
+
+
+def por_segundo(fn, veces: int) -> float:
+    fn()   # calentamiento
+    inicio = time.perf_counter()
+    for _ in range(veces):
+        fn()
+    return veces / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filas/s de los listados con serialización orjson")
+    parser.add_argument("--tareas", type=int, default=5000)
+    parser.add_argument("--metas", type=int, default=2000)
+    parser.add_argument("--logros", type=int, default=2000)
+    parser.add_argument("--peticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    id_usuario = sembrar(args.tareas, args.metas, args.logros)
+    cliente = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(id_usuario)})}"}
+
+    print(f"Endpoint ({args.peticiones} peticiones cada uno)")
+    for ruta, filas in (("/tareas/?todas=true", args.tareas), ("/tareas/?limit=500", min(500, args.tareas)),
+                        ("/metas/", args.metas), ("/logros/", args.logros)):
+        def pedir():
+            r = cliente.get(ruta, headers=headers)
+            assert r.status_code == 200, r.text
+        n = por_segundo(pedir, args.peticiones)
+        print(f"  {ruta:24s} {n * filas:12,.0f} filas/s  ({1000 / n:6.1f} ms/petición)")
+
+    print(f"Serialización ({args.peticiones} volcados cada uno)")
+    db = SessionLocal()
+    try:
+        for nombre, columnas, modelo, tabla in (("tareas", COLUMNAS_TAREA_OUT, TareaOut, Tarea),
+                                                ("metas", COLUMNAS_META_OUT, MetaOut, Meta),
+                                                ("logros", COLUMNAS_LOGRO_OUT, LogroOut, Logro)):
+            filas = db.execute(select(*columnas).where(tabla.id_usuario == id_usuario)).all()
+            adaptador = TypeAdapter(List[modelo])
+            rapido = por_segundo(lambda: orjson.dumps(filas_a_dicts(filas)), args.peticiones)
+            pydantic = por_segundo(
+                lambda: adaptador.dump_json(adaptador.validate_python(filas, from_attributes=True)), args.peticiones,
+            )
+            print(f"  {nombre:8s} orjson {rapido * len(filas):12,.0f} filas/s   "
+                  f"pydantic {pydantic * len(filas):12,.0f} filas/s   (x{rapido / pydantic:.1f})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# scripts/bench_sqlite.py
+"""
+Lecturas y escrituras por segundo con hilos concurrentes, para comparar los
+perfiles del motor SQLite (app/database/database.py). El perfil se elige con
+DB_PROFILE, igual que en el servidor:
+
+    DB_PROFILE=desarrollo python -m scripts.bench_sqlite
+    DB_PROFILE=produccion python -m scripts.bench_sqlite --segundos 10
+
+Corre sobre una base temporal nueva (create-timewise.sql + migraciones),
+salvo que se indique DB_PATH; nunca toca la base de la app.
+  - lectores: la primera página del listado de tareas (usuario, fecha, hora)
+  - escritores: cambian el estado de una tarea al azar y hacen commit
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+if not os.getenv("DB_PATH"):
+    os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="timewise-bench-")) / "timewise.db")
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.database.database import DB_PATH, DB_PROFILE, PERFIL, SessionLocal  # noqa: E402
+from app.routes.models import Tarea  # noqa: E402
+
+ID_USUARIO = 1   # admin de create-timewise.sql
+
+
+def sembrar(n: int) -> list:
+    db = SessionLocal()
+    try:
+        inicio = date.today()
+        db.execute(insert(Tarea), [{
+            "id_usuario": ID_USUARIO, "id_categoria": 1, "titulo": f"Tarea {i}",
+            "fecha": inicio + timedelta(days=i % 300), "hora": f"{i % 24:02d}:00",
+        } for i in range(n)])
+        db.commit()
+        return db.execute(select(Tarea.id_tarea).where(Tarea.id_usuario == ID_USUARIO)).scalars().all()
+    finally:
+        db.close()
+
+
+def medir(ids: list, segundos: float, lectores: int, escritores: int) -> dict:
+    contadores = {"lecturas": 0, "escrituras": 0, "errores": 0}
+    lock = threading.Lock()
+    fin = time.monotonic() + segundos
+
+    def sumar(clave):
+        with lock:
+            contadores[clave] += 1
+
+    def leer():
+        consulta = (select(Tarea.id_tarea, Tarea.titulo, Tarea.fecha, Tarea.hora, Tarea.estado)
+                    .where(Tarea.id_usuario == ID_USUARIO).order_by(Tarea.fecha, Tarea.hora).limit(50))
+        while time.monotonic() < fin:
+            db = SessionLocal()
+            try:
+                db.execute(consulta).all()
+                sumar("lecturas")
+            except Exception:
+                sumar("errores")
+            finally:
+                db.close()
+
+    def escribir():
+        while time.monotonic() < fin:
+            db = SessionLocal()
+            try:
+                tarea = db.get(Tarea, random.choice(ids))
+                tarea.estado = random.choice(["pendiente", "completada"])
+                db.commit()
+                sumar("escrituras")
+            except Exception:
+                sumar("errores")   # p. ej. "database is locked" al agotar busy_timeout
+            finally:
+                db.close()
+
+    hilos = [threading.Thread(target=leer) for _ in range(lectores)]
+    hilos += [threading.Thread(target=escribir) for _ in range(escritores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return contadores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendimiento de SQLite según DB_PROFILE")
+    parser.add_argument("--tareas", type=int, default=5000)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--lectores", type=int, default=8)
+    parser.add_argument("--escritores", type=int, default=4)
+    args = parser.parse_args()
+
+    ids = sembrar(args.tareas)
+    contadores = medir(ids, args.segundos, args.lectores, args.escritores)
+    print(f"Base: {DB_PATH}")
+    print(f"Perfil: {DB_PROFILE} {PERFIL['pragmas']}")
+    print(f"{args.lectores} lectores, {args.escritores} escritores, {args.segundos:g} s")
+    print(f"  lecturas/s:   {contadores['lecturas'] / args.segundos:10.1f}")
+    print(f"  escrituras/s: {contadores['escrituras'] / args.segundos:10.1f}")
+    print(f"  errores:      {contadores['errores']:10d}")
+
+
+if __name__ == "__main__":
+    main()
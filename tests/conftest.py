@@ -0,0 +1,59 @@
+# tests/conftest.py
+"""
+Las pruebas corren contra una base SQLite temporal (DB_PATH), creada con
+create-timewise.sql + migraciones igual que en producción. El entorno se
+fija antes de importar la app: los módulos leen su configuración al cargar.
+
+El cliente no ejecuta el lifespan, así que los servicios de fondo no
+arrancan; las pruebas que dependen de eventos usan el fixture `procesar_eventos`.
+"""
+import asyncio
+import itertools
+import os
+import tempfile
+from pathlib import Path
+
+_TEMPORAL = tempfile.mkdtemp(prefix="timewise-tests-")
+os.environ["DB_PATH"] = str(Path(_TEMPORAL) / "timewise.db")
+os.environ.setdefault("LIMITES_ACTIVOS", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.database.database import SessionLocal
+from app.routes.auth_utils import create_access_token
+from app.routes.eventos import bus
+from app.routes.models import Usuario
+
+_correos = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    return TestClient(app)
+
+
+@pytest.fixture
+def usuario():
+    """Usuario nuevo (sin pasar por bcrypt) → (id_usuario, headers con su token)."""
+    db = SessionLocal()
+    try:
+        nuevo = Usuario(
+            nombre="Prueba", apellido="Pruebas", edad=30, id_rol=2,
+            correo=f"usuario{next(_correos)}@pruebas.com", contrasena="sin-login",
+        )
+        db.add(nuevo)
+        db.commit()
+        id_usuario = nuevo.id_usuario
+    finally:
+        db.close()
+    token = create_access_token(data={"sub": str(id_usuario)})
+    return id_usuario, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def procesar_eventos():
+    """Función que entrega lo encolado en el bus (incluye lo que emitan los suscriptores)."""
+    return lambda: asyncio.run(bus.procesar_pendientes())
@@ -0,0 +1,60 @@
+# tests/test_admin_usuarios.py
+"""Búsqueda por prefijo del listado de usuarios: sin distinguir mayúsculas, también fuera de ASCII."""
+import pytest
+
+from app.database.database import SessionLocal
+from app.routes.auth_utils import create_access_token
+from app.routes.models import Usuario
+
+ADMIN = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+
+PERSONAS = {
+    "alvaro_acento": ("álvaro", "Ñúñez", "alvaro.acento@pruebas.com"),
+    "alex_acento": ("Álex", "Ortiz", "alex.acento@pruebas.com"),
+    "alvaro_ascii": ("Alvaro", "Ruiz", "alvaro.ascii@pruebas.com"),
+    "arroba": ("Zacarías", "Quintero", "zz@uno.com"),
+    "guion": ("Zenón", "Quesada", "zz_dos@pruebas.com"),
+}
+
+
+@pytest.fixture(scope="module")
+def ids():
+    db = SessionLocal()
+    try:
+        nuevos = {
+            clave: Usuario(nombre=n, apellido=a, correo=c, edad=30, id_rol=2, contrasena="sin-login")
+            for clave, (n, a, c) in PERSONAS.items()
+        }
+        db.add_all(nuevos.values())
+        db.commit()
+        return {clave: u.id_usuario for clave, u in nuevos.items()}
+    finally:
+        db.close()
+
+
+def _encontrados(cliente, ids, buscar):
+    r = cliente.get("/admin/usuarios", headers=ADMIN, params={"buscar": buscar, "limit": 500})
+    assert r.status_code == 200, r.text
+    propios = {v: k for k, v in ids.items()}
+    return {propios[u["id_usuario"]] for u in r.json()["items"] if u["id_usuario"] in propios}
+
+
+@pytest.mark.parametrize("buscar, esperado", [
+    ("Ál", {"alvaro_acento", "alex_acento"}),
+    ("ál", {"alvaro_acento", "alex_acento"}),
+    ("ÁLV", {"alvaro_acento"}),
+    ("alv", {"alvaro_acento", "alvaro_ascii"}),   # por correo / nombre ASCII
+    ("ALVARO.", {"alvaro_acento", "alvaro_ascii"}),
+    ("ñú", {"alvaro_acento"}),
+    ("Á%", set()),                                 # % es literal, no comodín
+    ("zz@", {"arroba"}),                           # '_' (0x5F) no cae entre 'zz@' y la cota
+    ("zz_", {"guion"}),
+    ("Zen", {"guion"}),
+])
+def test_prefijo_sin_distinguir_mayusculas(cliente, ids, buscar, esperado):
+    assert _encontrados(cliente, ids, buscar) == esperado
+
+
+def test_solo_admin(cliente, usuario):
+    _, headers = usuario
+    assert cliente.get("/admin/usuarios", headers=headers).status_code == 403
@@ -0,0 +1,106 @@
+# tests/test_auth_cache.py
+"""
+Caché del usuario autenticado entre workers: cada `CacheUsuarios` hace de
+un worker distinto y solo se entera de los cambios ajenos por la base
+(Usuarios_cambios + PRAGMA data_version).
+"""
+from sqlalchemy import text
+
+from app.database.database import DB_PATH, SessionLocal
+from app.routes.auth_cache import CacheUsuarios
+from app.routes.models import Usuario
+
+
+def _leer(id_usuario: int) -> Usuario:
+    db = SessionLocal()
+    try:
+        return db.get(Usuario, id_usuario)
+    finally:
+        db.close()
+
+
+def _worker(id_usuario: int, token: str) -> CacheUsuarios:
+    """Un worker con el usuario ya cacheado."""
+    cache = CacheUsuarios(100, 60, DB_PATH)
+    cache.revisar()   # primera revisión: toma la posición actual del registro
+    cache.guardar(token, _leer(id_usuario), None, cache.generacion(id_usuario))
+    assert cache.obtener(token) is not None
+    return cache
+
+
+def _sql(sentencia: str, **params):
+    db = SessionLocal()
+    try:
+        db.execute(text(sentencia), params)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_cambio_de_otro_worker_invalida(usuario):
+    id_usuario, _ = usuario
+    cache = _worker(id_usuario, "token-a")
+
+    cache.revisar()   # sin commits nuevos: no lee el registro
+    assert cache.obtener("token-a") is not None
+
+    _sql('UPDATE "Usuario" SET id_rol = 1 WHERE id_usuario = :id', id=id_usuario)
+    cache.revisar()
+    assert cache.obtener("token-a") is None
+    assert cache.estadisticas()["invalidaciones_externas"] == 1
+
+
+def test_columnas_sin_efecto_no_invalidan(usuario):
+    id_usuario, _ = usuario
+    cache = _worker(id_usuario, "token-b")
+
+    _sql('UPDATE "Usuario" SET ultimo_login = CURRENT_TIMESTAMP WHERE id_usuario = :id', id=id_usuario)
+    cache.revisar()
+    assert cache.obtener("token-b") is not None
+
+
+def test_solo_invalida_al_usuario_cambiado(usuario):
+    id_usuario, _ = usuario
+    cache = _worker(id_usuario, "token-c")
+    cache.guardar("token-admin", _leer(1), None, cache.generacion(1))
+
+    _sql('UPDATE "Usuario" SET nombre = \'Otro\' WHERE id_usuario = :id', id=id_usuario)
+    cache.revisar()
+    assert cache.obtener("token-c") is None
+    assert cache.obtener("token-admin") is not None
+
+
+def test_registro_purgado_vacia_la_cache(usuario):
+    id_usuario, _ = usuario
+    cache = _worker(id_usuario, "token-d")
+    cache.guardar("token-admin", _leer(1), None, cache.generacion(1))
+
+    # Cambios que este worker ya no puede ver: solo queda uno posterior
+    _sql('UPDATE "Usuario" SET nombre = \'Uno\' WHERE id_usuario = :id', id=id_usuario)
+    _sql('UPDATE "Usuario" SET nombre = \'Dos\' WHERE id_usuario = :id', id=id_usuario)
+    _sql('DELETE FROM "Usuarios_cambios" WHERE seq < (SELECT MAX(seq) FROM "Usuarios_cambios")')
+    cache.revisar()
+    assert cache.obtener("token-d") is None
+    assert cache.obtener("token-admin") is None
+
+
+def test_vaciado_descarta_consultas_en_curso(usuario):
+    id_usuario, _ = usuario
+    cache = CacheUsuarios(100, 60)
+    generacion = cache.generacion(id_usuario)
+    cache.limpiar()   # p. ej. una revisión que no pudo leer el registro
+
+    cache.guardar("token-e", _leer(id_usuario), None, generacion)
+    assert cache.obtener("token-e") is None
+
+
+def test_api_ve_el_cambio_de_rol(cliente, usuario, monkeypatch):
+    from app.routes import auth_cache
+    monkeypatch.setattr(auth_cache, "AUTH_CACHE_REVISION_SEGUNDOS", 0)
+    # El plazo que dejó la última petición de otra prueba seguiría vigente
+    monkeypatch.setattr(auth_cache.cache_usuarios, "_proxima_revision", 0)
+    id_usuario, headers = usuario
+    assert cliente.get("/admin/cache-usuarios", headers=headers).status_code == 403
+
+    _sql('UPDATE "Usuario" SET id_rol = 1 WHERE id_usuario = :id', id=id_usuario)   # "otro worker"
+    assert cliente.get("/admin/cache-usuarios", headers=headers).status_code == 200
@@ -0,0 +1,134 @@
+# tests/test_busqueda.py
+"""Búsqueda de texto completo: relevancia, aislamiento por usuario y páginas estables aunque bm25 cambie."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.routes import busqueda
+from app.routes.auth_utils import create_access_token
+from app.routes.paginacion import codificar_cursor
+
+DIA = date.today() + timedelta(days=2)
+ADMIN = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+
+
+def _crear(cliente, headers, titulo, descripcion=None, **campos) -> int:
+    datos = {"titulo": titulo, "fecha": DIA.isoformat(), "id_categoria": 1, **campos}
+    if descripcion:
+        datos["descripcion"] = descripcion
+    r = cliente.post("/tareas/", headers=headers, json=datos)
+    assert r.status_code == 201, r.text
+    return r.json()["id_tarea"]
+
+
+def _buscar(cliente, headers, q, **params):
+    r = cliente.get("/tareas/buscar", headers=headers, params={"q": q, **params})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _recorrer(cliente, headers, q, limit, entre_paginas=lambda: None, cursor=None):
+    ids = []
+    while True:
+        cuerpo = _buscar(cliente, headers, q, limit=limit, **({"cursor": cursor} if cursor else {}))
+        ids += [t["id_tarea"] for t in cuerpo["items"]]
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return ids
+        entre_paginas()
+
+
+def test_titulo_pesa_mas_y_sin_acentos(cliente, usuario):
+    _, headers = usuario
+    en_descripcion = _crear(cliente, headers, "Llamar al banco", "Antes de la reunión semanal")
+    en_titulo = _crear(cliente, headers, "Reunión de equipo")
+    items = _buscar(cliente, headers, "reunion")["items"]
+    assert [t["id_tarea"] for t in items] == [en_titulo, en_descripcion]
+    assert "<b>Reunión</b>" in items[0]["fragmento"]
+
+
+def test_solo_tareas_propias(cliente, usuario):
+    _, headers = usuario
+    propia = _crear(cliente, headers, "Presupuesto anual propio")
+    _crear(cliente, ADMIN, "Presupuesto anual ajeno")
+    assert [t["id_tarea"] for t in _buscar(cliente, headers, "presupuesto")["items"]] == [propia]
+
+
+def test_el_id_de_usuario_no_es_texto_buscable(cliente, usuario):
+    id_usuario, headers = usuario
+    _crear(cliente, headers, "Tarea sin números")
+    assert _buscar(cliente, headers, str(id_usuario))["items"] == []
+
+
+def test_paginas_estables_aunque_cambie_bm25(cliente, usuario):
+    """Altas de otro usuario y cambios propios entre páginas: ni saltos ni repetidos."""
+    _, headers = usuario
+    for i in range(9):
+        # Distinta densidad del término: rangos distintos que las altas ajenas desplazan
+        _crear(cliente, headers, "Informe " * (1 + i % 3) + f"número {i}", "informe" if i % 2 else None)
+    completo = [t["id_tarea"] for t in _buscar(cliente, headers, "informe", limit=100)["items"]]
+    assert len(completo) == 9
+
+    nuevas = []
+
+    def cambios():
+        for _ in range(5):
+            _crear(cliente, ADMIN, "Informe informe informe trimestral")
+        nuevas.append(_crear(cliente, headers, "Informe informe informe nuevo"))
+
+    ids = _recorrer(cliente, headers, "informe", 2, cambios)
+    # Las nuevas no entran hasta repetir la búsqueda; las anteriores salen una vez y en su orden
+    assert ids == completo
+    assert nuevas and not set(nuevas) & set(ids)
+
+
+def test_borrada_entre_paginas_desaparece(cliente, usuario):
+    _, headers = usuario
+    for i in range(5):
+        _crear(cliente, headers, f"Revisión contrato {i}")
+    completo = [t["id_tarea"] for t in _buscar(cliente, headers, "contrato", limit=100)["items"]]
+    primera = _buscar(cliente, headers, "contrato", limit=2)
+    assert cliente.delete(f"/tareas/{completo[3]}", headers=headers).status_code == 200
+    resto = _recorrer(cliente, headers, "contrato", 2, cursor=primera["next_cursor"])
+    assert [t["id_tarea"] for t in primera["items"]] + resto == completo[:3] + completo[4:]
+
+
+def test_una_sola_pagina_no_guarda_ranking(cliente, usuario):
+    id_usuario, headers = usuario
+    _crear(cliente, headers, "Comprar pintura")
+    assert _buscar(cliente, headers, "pintura")["next_cursor"] is None
+    with SessionLocal() as db:
+        n = db.execute(text('SELECT COUNT(*) FROM "Busquedas_resultados" WHERE id_usuario = :u'),
+                       {"u": id_usuario}).scalar()
+    assert n == 0
+
+
+def test_cursor_de_otro_usuario_o_caducado(cliente, usuario):
+    _, headers = usuario
+    for i in range(3):
+        _crear(cliente, headers, f"Vacaciones plan {i}")
+    cursor = _buscar(cliente, headers, "vacaciones", limit=1)["next_cursor"]
+    r = cliente.get("/tareas/buscar", headers=ADMIN, params={"q": "vacaciones", "cursor": cursor})
+    assert r.status_code == 410
+
+    with SessionLocal() as db:
+        db.execute(text(
+            'UPDATE "Busquedas_resultados" SET creada = datetime(\'now\', :antes)'
+        ), {"antes": f"-{busqueda.VIGENCIA_MINUTOS + 1} minutes"})
+        db.commit()
+    r = cliente.get("/tareas/buscar", headers=headers, params={"q": "vacaciones", "cursor": cursor})
+    assert r.status_code == 410
+
+
+@pytest.mark.parametrize("valores", [["token"], [1, 2], ["token", "2"], ["token", -1], ["token", 1.5]])
+def test_cursor_invalido(cliente, usuario, valores):
+    _, headers = usuario
+    r = cliente.get("/tareas/buscar", headers=headers, params={"q": "algo", "cursor": codificar_cursor(valores)})
+    assert r.status_code == 400
+
+
+def test_sin_palabras(cliente, usuario):
+    _, headers = usuario
+    assert cliente.get("/tareas/buscar", headers=headers, params={"q": "¿?!"}).status_code == 400
@@ -0,0 +1,169 @@
+# tests/test_correos.py
+"""
+Repartidor de correos contra un servidor SMTP local (aiosmtpd): entrega,
+reintento con espera exponencial y estado que queda en Correos_salida.
+"""
+import asyncio
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.routes import correos
+from app.routes.auth import conf
+from app.routes.correos import RepartidorCorreos, encolar
+
+
+class Buzon:
+    """Handler de aiosmtpd: guarda lo recibido o responde con los códigos de `respuestas`."""
+
+    def __init__(self):
+        self.recibidos = []
+        self.respuestas = []   # se consumen en orden; vacía = 250
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.respuestas:
+            return self.respuestas.pop(0)
+        self.recibidos.append(envelope)
+        return "250 OK"
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def buzon(monkeypatch):
+    buzon = Buzon()
+    controlador = Controller(buzon, hostname="127.0.0.1", port=_puerto_libre())
+    controlador.start()
+    # Nunca hacia el servidor real del .env
+    monkeypatch.setattr(conf, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(conf, "MAIL_PORT", controlador.port)
+    monkeypatch.setattr(conf, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(conf, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(conf, "USE_CREDENTIALS", False)
+    yield buzon
+    controlador.stop()
+
+
+def _encolar(destinatario: str) -> int:
+    db = SessionLocal()
+    try:
+        correo = encolar(db, destinatario=destinatario, asunto="Prueba", cuerpo="<p>Hola</p>")
+        db.commit()
+        return correo.id_correo
+    finally:
+        db.close()
+
+
+def _fila(id_correo: int):
+    db = SessionLocal()
+    try:
+        return db.execute(text("""
+            SELECT estado, intentos, ultimo_error, fecha_envio,
+                   (julianday(proximo_intento) - julianday('now')) * 86400 AS espera
+            FROM "Correos_salida" WHERE id_correo = :id
+        """), {"id": id_correo}).one()
+    finally:
+        db.close()
+
+
+def _vencer(id_correo: int):
+    """Adelanta el próximo intento para no esperar el backoff real."""
+    db = SessionLocal()
+    try:
+        db.execute(text('UPDATE "Correos_salida" SET proximo_intento = datetime(\'now\', \'-1 second\') WHERE id_correo = :id'),
+                   {"id": id_correo})
+        db.commit()
+    finally:
+        db.close()
+
+
+def _entregar(repartidor: RepartidorCorreos) -> int:
+    async def ronda():
+        try:
+            return await repartidor.entregar_pendientes()
+        finally:
+            await repartidor.detener()   # cierra las conexiones en el mismo loop
+    return asyncio.run(ronda())
+
+
+def test_entrega_y_marca_enviado(buzon):
+    id_correo = _encolar("destino@pruebas.com")
+    repartidor = RepartidorCorreos()
+
+    assert _entregar(repartidor) >= 1
+
+    assert any(e.rcpt_tos == ["destino@pruebas.com"] for e in buzon.recibidos)
+    fila = _fila(id_correo)
+    assert fila.estado == "enviado"
+    assert fila.intentos == 1
+    assert fila.fecha_envio is not None and fila.ultimo_error is None
+    assert repartidor.estadisticas()["enviados"] >= 1
+
+
+def test_error_transitorio_reintenta_con_espera(buzon, monkeypatch):
+    monkeypatch.setattr(correos.random, "uniform", lambda a, b: 1.0)   # sin jitter
+    id_correo = _encolar("reintento@pruebas.com")
+    buzon.respuestas = ["451 4.3.0 Intente más tarde"]
+
+    _entregar(RepartidorCorreos())
+    fila = _fila(id_correo)
+    assert fila.estado == "pendiente"
+    assert fila.intentos == 1
+    assert "451" in fila.ultimo_error
+    assert correos.ESPERA_BASE - 5 < fila.espera <= correos.ESPERA_BASE
+
+    # Todavía no toca: no se reclama
+    _entregar(RepartidorCorreos())
+    assert _fila(id_correo).intentos == 1
+
+    _vencer(id_correo)
+    buzon.respuestas = ["451 4.3.0 Intente más tarde"]
+    _entregar(RepartidorCorreos())
+    fila = _fila(id_correo)
+    assert fila.intentos == 2
+    assert 2 * correos.ESPERA_BASE - 5 < fila.espera <= 2 * correos.ESPERA_BASE   # se duplica
+
+    _vencer(id_correo)
+    _entregar(RepartidorCorreos())
+    fila = _fila(id_correo)
+    assert fila.estado == "enviado" and fila.intentos == 3 and fila.ultimo_error is None
+    assert any(e.rcpt_tos == ["reintento@pruebas.com"] for e in buzon.recibidos)
+
+
+def test_rechazo_permanente_marca_fallido(buzon):
+    id_correo = _encolar("rechazado@pruebas.com")
+    buzon.respuestas = ["550 5.1.1 Buzón inexistente"]
+
+    _entregar(RepartidorCorreos())
+    fila = _fila(id_correo)
+    assert fila.estado == "fallido"
+    assert "550" in fila.ultimo_error
+
+
+def test_agotar_intentos_marca_fallido(buzon, monkeypatch):
+    monkeypatch.setattr(correos, "MAX_INTENTOS", 2)
+    id_correo = _encolar("agotado@pruebas.com")
+
+    buzon.respuestas = ["451 4.3.0 Intente más tarde"]
+    _entregar(RepartidorCorreos())
+    assert _fila(id_correo).estado == "pendiente"
+
+    _vencer(id_correo)
+    buzon.respuestas = ["451 4.3.0 Intente más tarde"]
+    _entregar(RepartidorCorreos())
+    fila = _fila(id_correo)
+    assert fila.estado == "fallido" and fila.intentos == 2
+
+
+def test_espera_exponencial_con_tope(monkeypatch):
+    monkeypatch.setattr(correos.random, "uniform", lambda a, b: 1.0)
+    esperas = [correos._espera(n) for n in range(1, 12)]
+    assert esperas[:3] == [correos.ESPERA_BASE, 2 * correos.ESPERA_BASE, 4 * correos.ESPERA_BASE]
+    assert max(esperas) == correos.ESPERA_MAXIMA
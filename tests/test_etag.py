@@ -0,0 +1,82 @@
+# tests/test_etag.py
+"""GET condicional de los listados por usuario (Versiones_coleccion + If-None-Match)."""
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.routes.auth_utils import create_access_token
+from app.routes.etag import coincide_etag
+
+MANANA = (date.today() + timedelta(days=1)).isoformat()
+
+
+def _get(cliente, ruta, headers, etag=None):
+    if etag:
+        headers = {**headers, "If-None-Match": etag}
+    return cliente.get(ruta, headers=headers)
+
+
+def _crear_tarea(cliente, headers) -> int:
+    r = cliente.post("/tareas/", headers=headers, json={"titulo": "Con ETag", "fecha": MANANA, "id_categoria": 1})
+    assert r.status_code == 201, r.text
+    return r.json()["id_tarea"]
+
+
+def test_tareas_304_hasta_que_cambian(cliente, usuario):
+    _, headers = usuario
+    _crear_tarea(cliente, headers)
+    r = _get(cliente, "/tareas/", headers)
+    etag = r.headers["ETag"]
+    assert r.status_code == 200 and etag.startswith("W/")
+    assert r.headers["Cache-Control"] == "private, no-cache"
+
+    r = _get(cliente, "/tareas/", headers, etag)
+    assert r.status_code == 304 and r.content == b""
+    assert r.headers["ETag"] == etag
+
+    # Otros parámetros, otra representación
+    assert _get(cliente, "/tareas/?limit=1", headers, etag).status_code == 200
+
+    # Cualquier escritura (aquí un borrado en lote) cambia el sello
+    id_tarea = _crear_tarea(cliente, headers)
+    r = _get(cliente, "/tareas/", headers, etag)
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+    etag = r.headers["ETag"]
+    cliente.request("DELETE", "/tareas/batch", headers=headers, json={"ids": [id_tarea]})
+    assert _get(cliente, "/tareas/", headers, etag).status_code == 200
+
+
+def test_escrituras_de_otro_usuario_no_invalidan(cliente, usuario):
+    _, headers = usuario
+    r = _get(cliente, "/tareas/filtrar?prioridad=alta", headers)
+    etag = r.headers["ETag"]
+
+    admin = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    _crear_tarea(cliente, admin)
+    assert _get(cliente, "/tareas/filtrar?prioridad=alta", headers, etag).status_code == 304
+
+
+@pytest.mark.parametrize("ruta, escribir", [
+    ("/metas/", lambda c, h: c.post("/metas/", headers=h, json={"descripcion": "Meta de la semana", "frecuencia": "semanal", "objetivo": 3})),
+    ("/modos/mis-modos", lambda c, h: c.post("/modos/activar", headers=h, json={"id_modo": 1})),
+])
+def test_otras_colecciones(cliente, usuario, ruta, escribir):
+    _, headers = usuario
+    etag = _get(cliente, ruta, headers).headers["ETag"]
+    assert _get(cliente, ruta, headers, etag).status_code == 304
+
+    assert escribir(cliente, headers).status_code in (200, 201)
+    r = _get(cliente, ruta, headers, etag)
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+
+
+def test_coincide_etag():
+    def peticion(cabecera):
+        return SimpleNamespace(headers={"if-none-match": cabecera} if cabecera else {})
+
+    assert coincide_etag(peticion('W/"a", "b"'), '"b"')
+    assert coincide_etag(peticion('"a"'), 'W/"a"')     # comparación débil
+    assert coincide_etag(peticion("*"), '"x"')
+    assert not coincide_etag(peticion('"a"'), '"b"')
+    assert not coincide_etag(peticion(None), '"a"')
@@ -0,0 +1,102 @@
+# tests/test_exportacion.py
+"""Exportación NDJSON/CSV en streaming: contenido, filtros, bloques y `?usuario=` solo para admin."""
+import csv
+import io
+from datetime import date, timedelta
+
+import orjson
+import pytest
+from sqlalchemy import select
+
+from app.routes import exportacion
+from app.routes.auth_utils import create_access_token
+from app.routes.models import Tarea
+
+DIA = date.today() + timedelta(days=4)
+ADMIN = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+
+
+def _crear(cliente, headers, titulo, **campos) -> int:
+    datos = {"titulo": titulo, "fecha": DIA.isoformat(), "id_categoria": 1, **campos}
+    r = cliente.post("/tareas/", headers=headers, json=datos)
+    assert r.status_code == 201, r.text
+    return r.json()["id_tarea"]
+
+
+def _ndjson(respuesta):
+    return [orjson.loads(linea) for linea in respuesta.content.splitlines()]
+
+
+@pytest.fixture
+def tareas(usuario, cliente):
+    id_usuario, headers = usuario
+    ids = [
+        _crear(cliente, headers, "Exportar, con coma", prioridad="alta"),
+        _crear(cliente, headers, 'Exportar "comillas"', prioridad="baja", hora="09:30"),
+        _crear(cliente, headers, "Exportar tercera", prioridad="alta", hora="18:00"),
+    ]
+    return id_usuario, headers, ids
+
+
+def test_ndjson(cliente, tareas):
+    id_usuario, headers, ids = tareas
+    r = cliente.get("/tareas/export", headers=headers, params={"format": "ndjson"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert r.headers["content-disposition"] == f'attachment; filename="tareas_{id_usuario}.ndjson"'
+    filas = _ndjson(r)
+    assert sorted(f["id_tarea"] for f in filas) == sorted(ids)
+    assert {f["titulo"] for f in filas} >= {"Exportar, con coma", 'Exportar "comillas"'}
+    assert "contrasena" not in filas[0]
+
+
+def test_csv_con_filtros(cliente, tareas):
+    id_usuario, headers, ids = tareas
+    r = cliente.get("/tareas/export", headers=headers, params={"format": "csv", "prioridad": "alta"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    filas = list(csv.DictReader(io.StringIO(r.text)))
+    assert [int(f["id_tarea"]) for f in filas] == [ids[0], ids[2]]
+    assert filas[0]["titulo"] == "Exportar, con coma"
+    assert {f["prioridad"] for f in filas} == {"alta"}
+
+
+def test_csv_vacio_solo_encabezado(cliente, usuario):
+    _, headers = usuario
+    r = cliente.get("/tareas/export", headers=headers, params={"format": "csv"})
+    assert r.status_code == 200
+    lineas = r.text.splitlines()
+    assert len(lineas) == 1 and lineas[0].startswith("id_tarea,")
+
+
+def test_formato_invalido(cliente, usuario):
+    _, headers = usuario
+    assert cliente.get("/tareas/export", headers=headers, params={"format": "xml"}).status_code == 400
+
+
+@pytest.mark.parametrize("generar", [exportacion.generar_ndjson, exportacion.generar_csv])
+def test_sale_por_bloques(tareas, monkeypatch, generar):
+    """Con bloques de 2 filas, 3 tareas salen en 2 trozos (más el encabezado en CSV, que va con el primero)."""
+    id_usuario, _, _ = tareas
+    monkeypatch.setattr(exportacion, "FILAS_POR_BLOQUE", 2)
+    consulta = select(Tarea.id_tarea, Tarea.titulo).where(Tarea.id_usuario == id_usuario).order_by(Tarea.id_tarea)
+    trozos = list(generar(consulta))
+    assert len(trozos) == 2
+    assert sum(t.count(b"\n") for t in trozos) == 3 + (generar is exportacion.generar_csv)
+
+
+@pytest.mark.parametrize("ruta", ["/tareas/export", "/metas/export", "/logros/export"])
+def test_otro_usuario_solo_admin(cliente, tareas, ruta):
+    id_usuario, headers, _ = tareas
+    r = cliente.get(ruta, headers=headers, params={"usuario": 1})
+    assert r.status_code == 403
+    # Indicar el propio id sí se permite
+    assert cliente.get(ruta, headers=headers, params={"usuario": id_usuario}).status_code == 200
+
+
+def test_admin_exporta_otro_usuario(cliente, tareas):
+    id_usuario, _, ids = tareas
+    r = cliente.get("/tareas/export", headers=ADMIN, params={"usuario": id_usuario})
+    assert r.status_code == 200
+    assert r.headers["content-disposition"] == f'attachment; filename="tareas_{id_usuario}.ndjson"'
+    assert sorted(f["id_tarea"] for f in _ndjson(r)) == sorted(ids)
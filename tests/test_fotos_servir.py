@@ -0,0 +1,195 @@
+# tests/test_fotos_servir.py
+"""Servir fotos: Range, peticiones condicionales, caché y miniaturas bajo demanda."""
+import hashlib
+import io
+import os
+from email.utils import formatdate
+
+import pytest
+from PIL import Image
+
+from app.routes import fotos, miniaturas
+
+
+def _imagen(formato: str, lado: int = 300) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (lado, lado // 2), (10, 120, 200)).save(buffer, formato)
+    return buffer.getvalue()
+
+
+def _guardar(contenido: bytes, extension: str) -> str:
+    nombre = f"{hashlib.sha256(contenido).hexdigest()}.{extension}"
+    os.makedirs(fotos.DIRECTORIO_FOTOS, exist_ok=True)
+    with open(fotos.ruta_foto(nombre), "wb") as archivo:
+        archivo.write(contenido)
+    return nombre
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def foto():
+    contenido = _imagen("PNG")
+    return _guardar(contenido, "png"), contenido
+
+
+def test_completa_con_cache_inmutable(cliente, foto):
+    nombre, contenido = foto
+    r = cliente.get(f"/uploads/fotos/{nombre}")
+    assert r.status_code == 200
+    assert r.content == contenido
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["etag"] == f'"{nombre.split(".")[0]}"'
+    assert r.headers["cache-control"] == fotos.CACHE_INMUTABLE
+    assert r.headers["accept-ranges"] == "bytes"
+    assert int(r.headers["content-length"]) == len(contenido)
+
+
+def test_head_sin_cuerpo(cliente, foto):
+    nombre, contenido = foto
+    r = cliente.head(f"/uploads/fotos/{nombre}")
+    assert r.status_code == 200
+    assert r.content == b""
+    assert int(r.headers["content-length"]) == len(contenido)
+
+
+def test_por_bloques(cliente, foto, monkeypatch):
+    nombre, contenido = foto
+    monkeypatch.setattr(fotos, "BLOQUE_ENVIO", 100)
+    assert cliente.get(f"/uploads/fotos/{nombre}").content == contenido
+
+
+@pytest.mark.parametrize("rango, desde, hasta", [
+    ("bytes=0-9", 0, 9),
+    ("bytes=10-", 10, None),
+    ("bytes=-5", -5, None),
+    ("bytes=5-99999999", 5, None),
+])
+def test_range(cliente, foto, rango, desde, hasta):
+    nombre, contenido = foto
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"range": rango})
+    assert r.status_code == 206
+    parte = contenido[desde:None if hasta is None else hasta + 1]
+    assert r.content == parte
+    inicio = desde % len(contenido)
+    assert r.headers["content-range"] == f"bytes {inicio}-{inicio + len(parte) - 1}/{len(contenido)}"
+    assert int(r.headers["content-length"]) == len(parte)
+
+
+@pytest.mark.parametrize("rango", ["bytes=99999999-", "bytes=10-5"])
+def test_range_insatisfacible(cliente, foto, rango):
+    nombre, contenido = foto
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"range": rango})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(contenido)}"
+
+
+@pytest.mark.parametrize("rango", ["bytes=0-1,4-5", "items=0-1", "bytes=-"])
+def test_range_no_soportado_da_completo(cliente, foto, rango):
+    nombre, contenido = foto
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"range": rango})
+    assert r.status_code == 200 and r.content == contenido
+
+
+def test_if_range(cliente, foto):
+    nombre, contenido = foto
+    etag = f'"{nombre.split(".")[0]}"'
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"range": "bytes=0-3", "if-range": etag})
+    assert r.status_code == 206 and r.content == contenido[:4]
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"range": "bytes=0-3", "if-range": '"otra"'})
+    assert r.status_code == 200 and r.content == contenido
+
+
+@pytest.mark.parametrize("cabecera, esperado", [
+    ("{etag}", 304),
+    ("W/{etag}", 304),
+    ('"otra", {etag}', 304),
+    ("*", 304),
+    ('"otra"', 200),
+])
+def test_if_none_match(cliente, foto, cabecera, esperado):
+    nombre, _ = foto
+    etag = f'"{nombre.split(".")[0]}"'
+    r = cliente.get(f"/uploads/fotos/{nombre}", headers={"if-none-match": cabecera.format(etag=etag)})
+    assert r.status_code == esperado
+    if esperado == 304:
+        assert r.content == b"" and r.headers["etag"] == etag
+
+
+def test_if_modified_since(cliente, foto):
+    nombre, _ = foto
+    modificado = os.stat(fotos.ruta_foto(nombre)).st_mtime
+    ruta = f"/uploads/fotos/{nombre}"
+    assert cliente.get(ruta, headers={"if-modified-since": formatdate(modificado + 60, usegmt=True)}).status_code == 304
+    assert cliente.get(ruta, headers={"if-modified-since": formatdate(modificado - 60, usegmt=True)}).status_code == 200
+    assert cliente.get(ruta, headers={"if-modified-since": "no es una fecha"}).status_code == 200
+    # If-None-Match manda sobre If-Modified-Since
+    r = cliente.get(ruta, headers={"if-none-match": '"otra"',
+                                   "if-modified-since": formatdate(modificado + 60, usegmt=True)})
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("nombre", ["..%2F..%2Fapp.py", "A" * 64 + ".png", "0" * 64 + ".svg", "0" * 64 + ".png"])
+def test_nombres_invalidos_o_inexistentes(cliente, nombre):
+    assert cliente.get(f"/uploads/fotos/{nombre}").status_code == 404
+
+
+@pytest.mark.parametrize("formato, extension, salida, tipo", [
+    ("PNG", "png", "png", "image/png"),
+    ("JPEG", "jpg", "jpg", "image/jpeg"),
+    ("GIF", "gif", "png", "image/png"),   # GIF → PNG (primer cuadro)
+    ("WEBP", "webp", "webp", "image/webp"),
+])
+def test_miniatura(cliente, formato, extension, salida, tipo):
+    nombre = _guardar(_imagen(formato), extension)
+    sha = nombre.split(".")[0]
+    antes = miniaturas.estadisticas()
+    r = cliente.get(f"/uploads/fotos/{nombre}", params={"ancho": 64})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == tipo
+    assert r.headers["etag"] == f'"{sha}-64"'
+    with Image.open(io.BytesIO(r.content)) as imagen:
+        assert imagen.size == (64, 32)
+    assert os.path.exists(os.path.join(miniaturas.DIRECTORIO_MINIATURAS, f"{sha}_64.{salida}"))
+
+    # La segunda sale del disco, también con Range y condicionales
+    r = cliente.get(f"/uploads/fotos/{nombre}", params={"ancho": 64}, headers={"range": "bytes=0-1"})
+    assert r.status_code == 206
+    r = cliente.get(f"/uploads/fotos/{nombre}", params={"ancho": 64}, headers={"if-none-match": f'"{sha}-64"'})
+    assert r.status_code == 304
+    despues = miniaturas.estadisticas()
+    assert despues["generadas"] - antes["generadas"] == 1
+    assert despues["desde_disco"] - antes["desde_disco"] == 2
+
+
+def test_miniatura_ancho_no_permitido(cliente, foto):
+    nombre, _ = foto
+    assert cliente.get(f"/uploads/fotos/{nombre}", params={"ancho": 100}).status_code == 400
+
+
+def test_miniatura_de_foto_inexistente(cliente):
+    assert cliente.get(f"/uploads/fotos/{'0' * 64}.png", params={"ancho": 64}).status_code == 404
+
+
+def test_miniatura_de_imagen_corrupta(cliente):
+    nombre = _guardar(b"\x89PNG\r\n\x1a\n" + b"basura" * 20, "png")
+    assert cliente.get(f"/uploads/fotos/{nombre}", params={"ancho": 64}).status_code == 422
+    # Sin miniatura ni temporales a medias
+    assert not os.path.isdir(miniaturas.DIRECTORIO_MINIATURAS) or not os.listdir(miniaturas.DIRECTORIO_MINIATURAS)
+
+
+def test_foto_anterior_se_revalida(cliente):
+    os.makedirs(fotos.DIRECTORIO_UPLOADS, exist_ok=True)
+    ruta = os.path.join(fotos.DIRECTORIO_UPLOADS, "7_perfil.png")
+    with open(ruta, "wb") as archivo:
+        archivo.write(_imagen("PNG"))
+    r = cliente.get("/uploads/7_perfil.png")
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == fotos.CACHE_REVALIDAR
+    assert r.headers["etag"].startswith('W/"')
+    assert cliente.get("/uploads/7_perfil.png", headers={"if-none-match": r.headers["etag"]}).status_code == 304
+    assert cliente.get("/uploads/.oculto").status_code == 404
@@ -0,0 +1,124 @@
+# tests/test_fotos_subida.py
+"""Subida de fotos en streaming: tipo por contenido, tope de tamaño y almacenamiento por hash."""
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app.database.database import SessionLocal
+from app.routes import fotos
+
+
+def _png(lado: int = 16, color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (lado, lado), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    """Las rutas de uploads son relativas: cada prueba trabaja en su propio directorio."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _subir(cliente, headers, contenido: bytes, campo: str = "foto", nombre: str = "foto.png"):
+    return cliente.post("/perfil/foto", headers=headers,
+                        files={campo: (nombre, contenido, "image/png")})
+
+
+def _temporales():
+    return os.listdir(fotos.DIRECTORIO_TEMPORAL) if os.path.isdir(fotos.DIRECTORIO_TEMPORAL) else []
+
+
+@pytest.mark.parametrize("cabecera, esperado", [
+    (b"\xff\xd8\xff\xe0" + b"\0" * 8, "jpg"),
+    (b"\x89PNG\r\n\x1a\n\0\0\0\0", "png"),
+    (b"GIF87a" + b"\0" * 6, "gif"),
+    (b"GIF89a" + b"\0" * 6, "gif"),
+    (b"RIFF\x10\0\0\0WEBP", "webp"),
+    (b"RIFF\x10\0\0\0WAVE", None),
+    (b"<svg xmlns=", None),
+    (b"", None),
+])
+def test_detectar_tipo(cabecera, esperado):
+    assert fotos.detectar_tipo(cabecera) == esperado
+
+
+def test_subida_por_contenido(cliente, usuario):
+    _, headers = usuario
+    contenido = _png()
+    sha = hashlib.sha256(contenido).hexdigest()
+    r = _subir(cliente, headers, contenido, nombre="cualquier-nombre.jpg")
+    assert r.status_code == 200, r.text
+    assert r.json()["ruta"] == f"/uploads/fotos/{sha}.png"   # extensión por los bytes, no por el nombre
+    with open(fotos.ruta_foto(f"{sha}.png"), "rb") as archivo:
+        assert archivo.read() == contenido
+    assert _temporales() == []
+
+    # Otra subida igual (de otro usuario o repetida) comparte el archivo
+    assert _subir(cliente, headers, contenido).json()["ruta"] == f"/uploads/fotos/{sha}.png"
+    assert os.listdir(fotos.DIRECTORIO_FOTOS) == [f"{sha}.png"]
+
+
+def test_rechaza_lo_que_no_es_imagen(cliente, usuario):
+    _, headers = usuario
+    r = _subir(cliente, headers, b"<?php echo 'hola'; ?>" * 10, nombre="foto.png")
+    assert r.status_code == 400
+    assert "Solo se permiten imágenes" in r.json()["detail"]
+    assert _temporales() == []
+
+
+def test_rechaza_archivo_diminuto(cliente, usuario):
+    _, headers = usuario
+    assert _subir(cliente, headers, b"abc").status_code == 400
+    assert _temporales() == []
+
+
+def test_corta_al_pasar_el_tope(cliente, usuario, monkeypatch):
+    _, headers = usuario
+    monkeypatch.setattr(fotos, "MAX_BYTES", 1000)
+    contenido = b"\x89PNG\r\n\x1a\n" + os.urandom(5000)   # firma válida, pero más del tope
+    r = _subir(cliente, headers, contenido)
+    assert r.status_code == 400
+    assert "5MB" in r.json()["detail"]
+    assert _temporales() == []
+    assert not os.path.isdir(fotos.DIRECTORIO_FOTOS)
+
+
+def test_content_length_excesivo_no_llega_a_disco(cliente, usuario, monkeypatch):
+    _, headers = usuario
+    monkeypatch.setattr(fotos, "MAX_BYTES", 0)
+    r = _subir(cliente, headers, b"\x89PNG\r\n\x1a\n" + b"\0" * (70 * 1024))
+    assert r.status_code == 400
+    # Rechazada por el encabezado: ni siquiera se creó el temporal
+    assert not os.path.isdir(fotos.DIRECTORIO_TEMPORAL)
+
+
+def test_falta_el_campo(cliente, usuario):
+    _, headers = usuario
+    r = _subir(cliente, headers, _png(), campo="imagen")
+    assert r.status_code == 400
+    assert "foto" in r.json()["detail"]
+
+
+def test_no_multipart(cliente, usuario):
+    _, headers = usuario
+    r = cliente.post("/perfil/foto", headers={**headers, "content-type": "image/png"}, content=_png())
+    assert r.status_code == 400
+
+
+def test_recolectar_borra_la_foto_reemplazada(cliente, usuario):
+    _, headers = usuario
+    primera = _subir(cliente, headers, _png(color=(1, 2, 3))).json()["ruta"].lstrip("/")
+    segunda = _subir(cliente, headers, _png(color=(4, 5, 6))).json()["ruta"].lstrip("/")
+    # Recién subida: la gracia la protege de descartar_foto()
+    assert os.path.exists(primera)
+    db = SessionLocal()
+    try:
+        assert fotos.recolectar(db, gracia=-1) == 1
+    finally:
+        db.close()
+    assert not os.path.exists(primera) and os.path.exists(segunda)
@@ -0,0 +1,189 @@
+# tests/test_importacion.py
+"""Importación CSV / iCalendar: lectores incrementales y reporte de filas inválidas."""
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import tareas as rutas_tareas
+from app.routes.importacion import detectar_formato, leer_csv, leer_ics
+
+ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "SUMMARY:Reunión con un título muy largo que el cliente\r\n"
+    "  partió en dos líneas\r\n"
+    "DESCRIPTION:Primera\\nsegunda\\, con coma\\; y punto y coma\r\n"
+    "DTSTART;TZID=Europe/Madrid:20250115T093000\r\n"
+    "PRIORITY:1\r\n"
+    "BEGIN:VALARM\r\n"
+    "ACTION:DISPLAY\r\n"
+    "SUMMARY:Esto es de la alarma, no del evento\r\n"
+    "TRIGGER:-PT1H30M\r\n"
+    "END:VALARM\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT5M\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VTODO\r\n"
+    "SUMMARY:Tarea con vencimiento\r\n"
+    "DUE;VALUE=DATE:20250120\r\n"
+    "STATUS:COMPLETED\r\n"
+    "PRIORITY:9\r\n"
+    "COLOR:#FF8800\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER;RELATED=END:PT10M\r\n"
+    "END:VALARM\r\n"
+    "END:VTODO\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def _archivo(texto: str) -> io.BytesIO:
+    return io.BytesIO(texto.encode())
+
+
+# ======================= iCalendar =======================
+def test_ics_despliega_lineas_y_lee_alarmas():
+    filas = list(leer_ics(_archivo(ICS)))
+    assert [n for n, _ in filas] == [1, 2]
+    evento, pendiente = filas[0][1], filas[1][1]
+    assert evento == {
+        "titulo": "Reunión con un título muy largo que el cliente partió en dos líneas",
+        "descripcion": "Primera\nsegunda, con coma; y punto y coma",
+        "fecha": "2025-01-15",
+        "hora": "09:30",
+        "prioridad": "alta",
+        "recordatorio_minutos": 90,   # el primer TRIGGER; el SUMMARY de la alarma no pisa el título
+    }
+    # TRIGGER positivo (después del fin) no es un recordatorio previo
+    assert pendiente == {
+        "titulo": "Tarea con vencimiento",
+        "fecha": "2025-01-20",
+        "estado": "completada",
+        "prioridad": "baja",
+        "etiqueta_color": "#FF8800",
+    }
+
+
+def test_ics_dtstart_manda_sobre_due():
+    texto = "BEGIN:VTODO\nDUE:20250301\nDTSTART:20250228T080000Z\nSUMMARY:x\nEND:VTODO\n"
+    [(_, datos)] = leer_ics(_archivo(texto))
+    assert (datos["fecha"], datos["hora"]) == ("2025-02-28", "08:00")
+
+
+@pytest.mark.parametrize("trigger, minutos", [("-P1D", 1440), ("-P1W", 10080), ("-PT2H", 120), ("-PT0M", 0)])
+def test_ics_duracion_alarma(trigger, minutos):
+    texto = f"BEGIN:VEVENT\nSUMMARY:x\nBEGIN:VALARM\nTRIGGER:{trigger}\nEND:VALARM\nEND:VEVENT\n"
+    [(_, datos)] = leer_ics(_archivo(texto))
+    assert datos["recordatorio_minutos"] == minutos
+
+
+def test_ics_ignora_lo_que_esta_fuera_de_componentes():
+    texto = "SUMMARY:suelto\nBEGIN:VEVENT\nSUMMARY:dentro\nEND:VEVENT\nSUMMARY:otro suelto\n"
+    assert list(leer_ics(_archivo(texto))) == [(1, {"titulo": "dentro"})]
+
+
+# ======================= CSV =======================
+def test_csv_numera_lineas_fisicas():
+    texto = (
+        "Titulo,Categoria,fecha,extra\n"
+        'Primera,1,2025-01-01,ignorada\n'
+        '"Con salto\nde línea",2,2025-01-02\n'
+        "Tercera,,2025-01-03,a,b\n"
+    )
+    filas = list(leer_csv(_archivo(texto)))
+    assert filas == [
+        (2, {"titulo": "Primera", "id_categoria": "1", "fecha": "2025-01-01"}),
+        (4, {"titulo": "Con salto\nde línea", "id_categoria": "2", "fecha": "2025-01-02"}),
+        (5, {"titulo": "Tercera", "fecha": "2025-01-03"}),
+    ]
+
+
+def test_csv_con_bom():
+    [(_, datos)] = leer_csv(io.BytesIO("﻿titulo\nCon BOM\n".encode()))
+    assert datos == {"titulo": "Con BOM"}
+
+
+def test_csv_sin_titulo():
+    with pytest.raises(HTTPException) as e:
+        list(leer_csv(_archivo("nombre,fecha\nx,2025-01-01\n")))
+    assert e.value.status_code == 400
+
+
+@pytest.mark.parametrize("formato, nombre, esperado", [
+    (None, "agenda.ICS", "ics"), (None, "tareas.csv", "csv"), ("CSV", "tareas.ics", "csv"),
+])
+def test_detectar_formato(formato, nombre, esperado):
+    assert detectar_formato(formato, nombre) == esperado
+
+
+@pytest.mark.parametrize("formato, nombre", [(None, "tareas.txt"), (None, "sin_extension"), ("xml", "x.csv")])
+def test_formato_invalido(formato, nombre):
+    with pytest.raises(HTTPException) as e:
+        detectar_formato(formato, nombre)
+    assert e.value.status_code == 400
+
+
+# ======================= Endpoint =======================
+def _importar(cliente, headers, nombre, contenido, **params):
+    return cliente.post("/tareas/import", headers=headers, params=params,
+                        files={"archivo": (nombre, contenido.encode(), "application/octet-stream")})
+
+
+def _titulos(cliente, headers):
+    return {t["titulo"] for t in cliente.get("/tareas/?todas=true", headers=headers).json()}
+
+
+def test_importar_csv_reporta_filas_invalidas(cliente, usuario, monkeypatch):
+    _, headers = usuario
+    monkeypatch.setattr(rutas_tareas, "FILAS_POR_TRANSACCION", 2)   # varios bloques
+    texto = (
+        "titulo,fecha,id_categoria,prioridad\n"
+        "Importada uno,2020-01-01,1,alta\n"
+        ",2025-01-01,1,\n"
+        "Fecha imposible,2025-13-40,1,\n"
+        "Categoría inexistente,2025-01-01,999,\n"
+        "Importada dos,2025-01-02,,\n"
+        "Importada tres,2025-01-03,2,baja\n"
+    )
+    r = _importar(cliente, headers, "tareas.csv", texto, categoria=1)
+    assert r.status_code == 201, r.text
+    cuerpo = r.json()
+    assert (cuerpo["importadas"], cuerpo["con_error"], cuerpo["errores_truncados"]) == (3, 3, False)
+    assert [e["fila"] for e in cuerpo["errores"]] == [3, 4, 5]
+    assert "999" in cuerpo["errores"][2]["error"]
+    assert _titulos(cliente, headers) == {"Importada uno", "Importada dos", "Importada tres"}
+
+
+def test_importar_sin_categoria(cliente, usuario):
+    _, headers = usuario
+    r = _importar(cliente, headers, "tareas.csv", "titulo,fecha\nSin categoría,2025-01-01\n")
+    assert r.status_code == 201
+    assert r.json()["con_error"] == 1 and "categoría" in r.json()["errores"][0]["error"]
+
+
+def test_importar_categoria_por_defecto_inexistente(cliente, usuario):
+    _, headers = usuario
+    r = _importar(cliente, headers, "tareas.csv", "titulo\nx\n", categoria=999)
+    assert r.status_code == 400
+
+
+def test_importar_errores_truncados(cliente, usuario, monkeypatch):
+    _, headers = usuario
+    monkeypatch.setattr(rutas_tareas, "MAX_ERRORES_REPORTE", 2)
+    texto = "titulo,fecha,id_categoria\n" + "Mala fecha,no-es-fecha,1\n" * 5
+    cuerpo = _importar(cliente, headers, "tareas.csv", texto).json()
+    assert (cuerpo["con_error"], len(cuerpo["errores"]), cuerpo["errores_truncados"]) == (5, 2, True)
+
+
+def test_importar_ics(cliente, usuario):
+    _, headers = usuario
+    r = _importar(cliente, headers, "agenda.ics", ICS, categoria=2)
+    assert r.status_code == 201, r.text
+    assert r.json()["importadas"] == 2
+    tareas = {t["titulo"]: t for t in cliente.get("/tareas/?todas=true", headers=headers).json()}
+    evento = tareas["Reunión con un título muy largo que el cliente partió en dos líneas"]
+    assert (evento["recordatorio_minutos"], evento["id_categoria"]) == (90, 2)
+    assert tareas["Tarea con vencimiento"]["estado"] == "completada"
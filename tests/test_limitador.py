@@ -0,0 +1,108 @@
+# tests/test_limitador.py
+"""Cubetas del límite de peticiones: ráfaga, recarga, alcance por cuenta y almacén SQLite compartido."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import limitador as modulo
+from app.routes.limitador import LIMITES, Limitador
+
+
+class Reloj:
+    """Sustituye al módulo `time` del limitador: el tiempo solo avanza con `avanzar`."""
+
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def time(self):
+        return self.ahora
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    monkeypatch.setattr(modulo, "LIMITES_ACTIVOS", True)
+    reloj = Reloj()
+    monkeypatch.setattr(modulo, "time", reloj)
+    return reloj
+
+
+def _peticion(ip="10.0.0.1"):
+    return SimpleNamespace(client=SimpleNamespace(host=ip))
+
+
+def _rechazo(limitador, regla, ip="10.0.0.1", cuenta=None) -> HTTPException:
+    with pytest.raises(HTTPException) as error:
+        limitador.comprobar(_peticion(ip), regla, cuenta=cuenta)
+    assert error.value.status_code == 429
+    return error.value
+
+
+def test_rafaga_y_recarga(reloj):
+    limitador = Limitador()
+    limite = LIMITES[("reset-password", "ip")]   # 10 de ráfaga, 2 por minuto
+    for _ in range(limite.capacidad):
+        limitador.comprobar(_peticion(), "reset-password")
+    error = _rechazo(limitador, "reset-password")
+    assert error.headers["Retry-After"] == "30"   # una ficha cada 30 s
+
+    reloj.avanzar(29)
+    _rechazo(limitador, "reset-password")
+    reloj.avanzar(1)
+    limitador.comprobar(_peticion(), "reset-password")
+
+    # Otra IP tiene su propia cubeta
+    limitador.comprobar(_peticion("10.0.0.2"), "reset-password")
+    assert limitador.estadisticas()["reglas"]["reset-password:ip"] == {"admitidas": 12, "rechazadas": 2}
+
+
+def test_cubeta_por_cuenta_entre_ips(reloj):
+    limitador = Limitador()
+    capacidad = LIMITES[("login", "cuenta")].capacidad
+    for i in range(capacidad):
+        limitador.comprobar(_peticion(f"10.0.1.{i}"), "login", cuenta="victima@pruebas.com")
+    # Misma cuenta (sin distinguir mayúsculas) desde una IP nueva: rechazada
+    _rechazo(limitador, "login", ip="10.0.1.99", cuenta=" Victima@Pruebas.com ")
+    limitador.comprobar(_peticion("10.0.1.99"), "login", cuenta="otra@pruebas.com")
+
+
+def test_sqlite_compartido_entre_workers(reloj, tmp_path):
+    ruta = str(tmp_path / "limites.db")
+    workers = [Limitador(ruta), Limitador(ruta)]
+    capacidad = LIMITES[("recover-password", "ip")].capacidad
+    for i in range(capacidad):
+        workers[i % 2].comprobar(_peticion(), "recover-password")
+    for limitador in workers:
+        _rechazo(limitador, "recover-password")
+
+    reloj.avanzar(60)   # 1 por minuto
+    workers[1].comprobar(_peticion(), "recover-password")
+    _rechazo(workers[0], "recover-password")
+    assert workers[0].estadisticas()["almacen"] == "sqlite"
+
+
+def test_sqlite_inaccesible_usa_memoria(reloj, tmp_path):
+    limitador = Limitador(str(tmp_path))   # un directorio: sqlite3 no puede abrirlo
+    capacidad = LIMITES[("reset-password", "ip")].capacidad
+    for _ in range(capacidad):
+        limitador.comprobar(_peticion(), "reset-password")
+    _rechazo(limitador, "reset-password")   # no deja pasar todo
+    assert limitador.estadisticas()["errores_sqlite"] == capacidad + 1
+
+
+def test_login_responde_429(cliente, monkeypatch):
+    monkeypatch.setattr(modulo, "LIMITES_ACTIVOS", True)
+    monkeypatch.setattr(modulo, "limitador", Limitador())
+    monkeypatch.setattr("app.routes.auth.limitador", modulo.limitador)
+    datos = {"username": "nadie@pruebas.com", "password": "incorrecta"}
+    for _ in range(LIMITES[("login", "cuenta")].capacidad):
+        assert cliente.post("/auth/login", data=datos).status_code != 429
+    r = cliente.post("/auth/login", data=datos)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
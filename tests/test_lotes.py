@@ -0,0 +1,81 @@
+# tests/test_lotes.py
+"""Operaciones por lote de /tareas/batch: validación por elemento y fallos parciales."""
+from datetime import date, timedelta
+
+from app.routes import tareas
+from app.routes.auth_utils import create_access_token
+
+FECHA = (date.today() + timedelta(days=4)).isoformat()
+
+
+def _tarea(**campos):
+    return {"titulo": "En lote", "fecha": FECHA, "id_categoria": 1, **campos}
+
+
+def _leer(cliente, headers, id_tarea):
+    tareas_usuario = cliente.get("/tareas/?todas=true", headers=headers).json()
+    return next((t for t in tareas_usuario if t["id_tarea"] == id_tarea), None)
+
+
+def _lote(cliente, metodo, headers, json):
+    return cliente.request(metodo, "/tareas/batch", headers=headers, json=json)
+
+
+def test_crear_lote_mixto(cliente, usuario):
+    _, headers = usuario
+    r = _lote(cliente, "POST", headers, [_tarea(), _tarea(id_categoria=None), _tarea(id_categoria=9999), _tarea(id_categoria=2)])
+    assert r.status_code == 201, r.text
+    cuerpo = r.json()
+    assert (cuerpo["procesadas"], cuerpo["fallidas"]) == (2, 2)
+    resultados = cuerpo["resultados"]
+    assert [x["indice"] for x in resultados] == [0, 1, 2, 3]
+    assert [x["ok"] for x in resultados] == [True, False, False, True]
+    assert resultados[1]["error"] == "La categoría es obligatoria"
+    assert "9999" in resultados[2]["error"] and resultados[2]["id_tarea"] is None
+
+    # Solo se insertaron las válidas, con la categoría pedida
+    for x, categoria in ((resultados[0], 1), (resultados[3], 2)):
+        assert _leer(cliente, headers, x["id_tarea"])["id_categoria"] == categoria
+
+
+def test_crear_lote_todo_invalido_no_inserta(cliente, usuario):
+    _, headers = usuario
+    antes = len(cliente.get("/tareas/?todas=true", headers=headers).json())
+    r = _lote(cliente, "POST", headers, [_tarea(id_categoria=None)])
+    assert r.status_code == 201 and r.json()["fallidas"] == 1
+    assert len(cliente.get("/tareas/?todas=true", headers=headers).json()) == antes
+
+
+def test_actualizar_lote_parcial(cliente, usuario):
+    _, headers = usuario
+    ids = [x["id_tarea"] for x in _lote(cliente, "POST", headers, [_tarea(), _tarea()]).json()["resultados"]]
+    admin = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    ajena = _lote(cliente, "POST", admin, [_tarea()]).json()["resultados"][0]["id_tarea"]
+
+    r = _lote(cliente, "PUT", headers, [
+        {"id_tarea": ids[0], "titulo": "Renombrada"},
+        {"id_tarea": ids[1], "id_categoria": 9999},
+        {"id_tarea": ajena, "titulo": "No es mía"},
+    ])
+    assert r.status_code == 200, r.text
+    assert [x["ok"] for x in r.json()["resultados"]] == [True, False, False]
+    assert _leer(cliente, headers, ids[0])["titulo"] == "Renombrada"
+    assert _leer(cliente, headers, ids[1])["id_categoria"] == 1
+    assert _leer(cliente, admin, ajena)["titulo"] == "En lote"
+
+
+def test_eliminar_lote_parcial(cliente, usuario):
+    _, headers = usuario
+    id_tarea = _lote(cliente, "POST", headers, [_tarea()]).json()["resultados"][0]["id_tarea"]
+    r = _lote(cliente, "DELETE", headers, {"ids": [id_tarea, 987654321, id_tarea]})
+    assert r.status_code == 200
+    assert [x["ok"] for x in r.json()["resultados"]] == [True, False, True]
+    assert _leer(cliente, headers, id_tarea) is None
+
+
+def test_lote_vacio_grande_o_repetido(cliente, usuario, monkeypatch):
+    _, headers = usuario
+    assert _lote(cliente, "POST", headers, []).status_code == 400
+    monkeypatch.setattr(tareas, "MAX_LOTE", 2)
+    assert _lote(cliente, "POST", headers, [_tarea()] * 3).status_code == 400
+    assert _lote(cliente, "PUT", headers, [{"id_tarea": 1, "titulo": "Primera"}, {"id_tarea": 1, "titulo": "Segunda"}]).status_code == 400
@@ -0,0 +1,124 @@
+# tests/test_metricas.py
+"""GET /metrics: formato de texto de Prometheus, etiquetas por ruta plantilla y servicios registrados."""
+import re
+
+import pytest
+
+from app.routes import metricas as modulo
+from app.routes.metricas import Histograma, metricas
+
+# nombre{etiquetas} valor  (etiquetas opcionales, valores entre comillas con escapes)
+_MUESTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*)\})? (\S+)$')
+_ETIQUETA = re.compile(r'([a-zA-Z_]\w*)="((?:[^"\\]|\\.)*)"')
+
+
+def _leer(cliente, **headers) -> dict:
+    """{(nombre, ((etiqueta, valor), ...)): valor}; falla si alguna línea no es del formato."""
+    r = cliente.get("/metrics", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert r.text.endswith("\n")
+    muestras = {}
+    for linea in r.text.splitlines():
+        if linea.startswith("# HELP ") or linea.startswith("# TYPE "):
+            continue
+        coincidencia = _MUESTRA.match(linea)
+        assert coincidencia, f"línea inválida: {linea!r}"
+        nombre, etiquetas, valor = coincidencia.groups()
+        clave = (nombre, tuple(sorted(_ETIQUETA.findall(etiquetas or ""))))
+        assert clave not in muestras, f"serie repetida: {linea!r}"
+        muestras[clave] = float(valor)
+    return muestras
+
+
+def _peticiones(muestras, method, route, status) -> float:
+    clave = ("timewise_http_requests_total",
+             tuple(sorted({"method": method, "route": route, "status": str(status)}.items())))
+    return muestras.get(clave, 0.0)
+
+
+def test_cuenta_por_ruta_plantilla(cliente, usuario):
+    _, headers = usuario
+    antes = _leer(cliente)
+    cliente.get("/tareas/", headers=headers)
+    cliente.put("/tareas/987654321", headers=headers, json={"titulo": "No existe"})
+    cliente.put("/tareas/987654322", headers=headers, json={"titulo": "No existe"})
+    despues = _leer(cliente)
+
+    assert _peticiones(despues, "GET", "/tareas/", 200) - _peticiones(antes, "GET", "/tareas/", 200) == 1
+    # La URL concreta no crea series: las dos van a la plantilla
+    assert _peticiones(despues, "PUT", "/tareas/{id_tarea}", 404) - _peticiones(antes, "PUT", "/tareas/{id_tarea}", 404) == 2
+    assert not any("987654321" in str(clave) for clave in despues)
+
+
+def test_rutas_desconocidas_y_metodos_raros(cliente):
+    antes = _leer(cliente)
+    cliente.get("/no/existe/1")
+    cliente.get("/no/existe/2")
+    cliente.request("PROPFIND", "/metrics")
+    despues = _leer(cliente)
+    assert _peticiones(despues, "GET", modulo.SIN_RUTA, 404) - _peticiones(antes, "GET", modulo.SIN_RUTA, 404) == 2
+    assert _peticiones(despues, "OTRO", "/metrics", 405) - _peticiones(antes, "OTRO", "/metrics", 405) == 1
+
+
+def test_histograma_de_latencia_acumulado(cliente, usuario):
+    _, headers = usuario
+    cliente.get("/tareas/", headers=headers)
+    muestras = _leer(cliente)
+    etiquetas = (("method", "GET"), ("route", "/tareas/"))
+    cubetas = [
+        (float(dict(e)["le"]), v) for (n, e), v in muestras.items()
+        if n == "timewise_http_request_duration_seconds_bucket" and tuple(x for x in e if x[0] != "le") == etiquetas
+    ]
+    assert [le for le, _ in sorted(cubetas)] == [*modulo.CUBETAS_LATENCIA, float("inf")]
+    conteos = [v for _, v in sorted(cubetas)]
+    assert conteos == sorted(conteos)   # acumulado: nunca decrece
+    assert conteos[-1] == muestras[("timewise_http_request_duration_seconds_count", etiquetas)] >= 1
+    assert muestras[("timewise_http_request_duration_seconds_sum", etiquetas)] > 0
+
+
+def test_gauges_y_threadpool(cliente):
+    muestras = _leer(cliente)
+    assert muestras[("timewise_http_requests_in_flight", ())] == 1   # la propia petición a /metrics
+    assert muestras[("timewise_threadpool_workers", ())] >= 1
+    assert ("timewise_threadpool_queue_wait_seconds_count", ()) in muestras
+    assert ("timewise_threadpool_queue_wait_seconds_bucket", (("le", "+Inf"),)) in muestras
+
+
+def test_lineas_del_histograma():
+    histograma = Histograma((0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor)
+    assert histograma.lineas("x", 'a="b"') == [
+        'x_bucket{a="b",le="0.1"} 2',   # le incluye el límite
+        'x_bucket{a="b",le="1.0"} 3',
+        'x_bucket{a="b",le="+Inf"} 4',
+        'x_sum{a="b"} 3.65',
+        'x_count{a="b"} 4',
+    ]
+    assert histograma.lineas("y", "")[-2:] == ["y_sum 3.65", "y_count 4"]
+
+
+def test_escapa_etiquetas():
+    assert modulo._etiquetas(route='a"b\\c\nd') == 'route="a\\"b\\\\c\\nd"'
+
+
+def test_servicios_registrados(cliente, monkeypatch):
+    monkeypatch.setitem(metricas.servicios, "prueba-x", lambda: {
+        "enviados": 3, "activo": True, "por_tipo": {"a.b": 2.5}, "estado": "ok", "ultimo": None,
+    })
+    muestras = _leer(cliente)
+    assert muestras[("timewise_prueba_x_enviados", ())] == 3.0
+    assert muestras[("timewise_prueba_x_activo", ())] == 1.0
+    assert muestras[("timewise_prueba_x_por_tipo_a_b", ())] == 2.5
+    assert not any(n.startswith("timewise_prueba_x_estado") or n.startswith("timewise_prueba_x_ultimo")
+                   for n, _ in muestras)
+
+
+@pytest.mark.parametrize("autorizacion, esperado", [
+    (None, 401), ("Bearer otro", 401), ("secreto", 401), ("Bearer secreto", 200),
+])
+def test_token(cliente, monkeypatch, autorizacion, esperado):
+    monkeypatch.setattr(modulo, "METRICAS_TOKEN", "secreto")
+    headers = {"authorization": autorizacion} if autorizacion else {}
+    assert cliente.get("/metrics", headers=headers).status_code == esperado
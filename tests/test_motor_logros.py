@@ -0,0 +1,76 @@
+# tests/test_motor_logros.py
+"""Motor de logros: contadores con tope en 0 y logro de meta por ventana."""
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.routes import motor_logros
+from app.routes.eventos import Evento, TAREA_COMPLETADA, TAREA_REABIERTA
+from app.routes.progreso_metas import renovar_ventanas
+
+
+def _consultar(sql: str, **params):
+    db = SessionLocal()
+    try:
+        return db.execute(text(sql), params).all()
+    finally:
+        db.close()
+
+
+def _reglas(id_usuario: int, prefijo: str) -> list:
+    return sorted(f.regla for f in _consultar(
+        'SELECT regla FROM "logros" WHERE id_usuario = :id AND regla LIKE :prefijo',
+        id=id_usuario, prefijo=f"{prefijo}:%"))
+
+
+def _contador(id_usuario: int, clave: str):
+    return tuple(_consultar('SELECT anterior, valor FROM "Contadores_usuario" WHERE id_usuario = :id AND clave = :clave',
+                            id=id_usuario, clave=clave)[0])
+
+
+def test_contador_con_tope_devuelve_el_anterior_real(usuario, procesar_eventos):
+    id_usuario, _ = usuario
+    motor_logros.procesar_eventos([Evento(TAREA_COMPLETADA, id_usuario)])
+    assert _contador(id_usuario, "tareas_completadas") == (0, 1)
+    assert _reglas(id_usuario, "tareas") == ["tareas:1"]
+
+    # 1 + 1 - 3 queda en 0 por el tope: el anterior es 1, no valor - delta = 2
+    motor_logros.procesar_eventos([Evento(TAREA_COMPLETADA, id_usuario)] + [Evento(TAREA_REABIERTA, id_usuario)] * 3)
+    assert _contador(id_usuario, "tareas_completadas") == (1, 0)
+
+    motor_logros.procesar_eventos([Evento(TAREA_COMPLETADA, id_usuario)] * 10)
+    assert _contador(id_usuario, "tareas_completadas") == (0, 10)
+    assert _reglas(id_usuario, "tareas") == ["tareas:1", "tareas:10"]
+    procesar_eventos()   # rachas emitidas
+
+
+def test_logro_de_meta_una_vez_por_ventana(cliente, usuario, procesar_eventos):
+    id_usuario, headers = usuario
+    hoy, manana = date.today(), date.today() + timedelta(days=1)
+    r = cliente.post("/metas/", headers=headers, json={
+        "descripcion": "Una al día", "frecuencia": "diaria", "objetivo": 1, "automatica": True,
+    })
+    id_meta = r.json()["id_meta"]
+
+    def completar(fecha):
+        r = cliente.post("/tareas/", headers=headers, json={"titulo": "Diaria", "fecha": fecha.isoformat(), "id_categoria": 1})
+        id_tarea = r.json()["id_tarea"]
+        cliente.put(f"/tareas/{id_tarea}", headers=headers, json={"estado": "completada"})
+        procesar_eventos()
+        return id_tarea
+
+    id_tarea = completar(hoy)
+    assert _reglas(id_usuario, "meta") == [f"meta:{id_meta}:{hoy}"]
+
+    # Reabrir y volver a cumplir en la misma ventana no repite el logro
+    cliente.put(f"/tareas/{id_tarea}", headers=headers, json={"estado": "pendiente"})
+    cliente.put(f"/tareas/{id_tarea}", headers=headers, json={"estado": "completada"})
+    procesar_eventos()
+    assert _reglas(id_usuario, "meta") == [f"meta:{id_meta}:{hoy}"]
+
+    # La ventana siguiente, cumplida al renovarse, vuelve a otorgarlo
+    completar(manana)
+    renovar_ventanas(hoy=manana)
+    procesar_eventos()
+    assert _reglas(id_usuario, "meta") == [f"meta:{id_meta}:{hoy}", f"meta:{id_meta}:{manana}"]
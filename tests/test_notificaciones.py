@@ -0,0 +1,52 @@
+# tests/test_notificaciones.py
+"""Marcar notificaciones como leídas: solo las propias y con la misma forma de respuesta que el resto ({"msg": ...})."""
+from datetime import datetime, timedelta
+
+from app.database.database import SessionLocal
+from app.routes.models import Notificacion
+
+
+def _notificar(id_usuario: int, n: int):
+    db = SessionLocal()
+    try:
+        ahora = datetime.utcnow()
+        nuevas = [
+            Notificacion(id_usuario=id_usuario, tipo="recordatorio", mensaje=f"Aviso {i}",
+                         momento=ahora + timedelta(seconds=i))
+            for i in range(n)
+        ]
+        db.add_all(nuevas)
+        db.commit()
+        return [x.id_notificacion for x in nuevas]
+    finally:
+        db.close()
+
+
+def _no_leidas(cliente, headers):
+    r = cliente.get("/notificaciones/", headers=headers, params={"no_leidas": True})
+    assert r.status_code == 200, r.text
+    return [x["id_notificacion"] for x in r.json()["items"]]
+
+
+def test_marcar_una(cliente, usuario):
+    id_usuario, headers = usuario
+    ids = _notificar(id_usuario, 2)
+    r = cliente.put(f"/notificaciones/{ids[0]}/leida", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == {"msg": "Notificación marcada como leída"}
+    assert _no_leidas(cliente, headers) == [ids[1]]
+
+
+def test_marcar_ajena_es_404(cliente, usuario):
+    _, headers = usuario
+    ajena = _notificar(1, 1)[0]
+    assert cliente.put(f"/notificaciones/{ajena}/leida", headers=headers).status_code == 404
+
+
+def test_marcar_todas(cliente, usuario):
+    id_usuario, headers = usuario
+    _notificar(id_usuario, 3)
+    r = cliente.put("/notificaciones/leidas", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == {"msg": "3 notificaciones marcadas como leídas"}
+    assert _no_leidas(cliente, headers) == []
@@ -0,0 +1,134 @@
+# tests/test_paginacion.py
+"""Paginación por keyset: recorrer con cursores da lo mismo que el listado completo, sin saltos ni repetidos."""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, insert, select, text
+
+from app.routes.paginacion import codificar_cursor, decodificar_cursor, paginar
+
+DIA = date.today() + timedelta(days=3)
+
+
+def _crear(cliente, headers, fecha, hora=None, **campos) -> int:
+    datos = {"titulo": "Paginada", "fecha": fecha.isoformat(), "id_categoria": 1, **campos}
+    if hora:
+        datos["hora"] = hora
+    r = cliente.post("/tareas/", headers=headers, json=datos)
+    assert r.status_code == 201, r.text
+    return r.json()["id_tarea"]
+
+
+def _recorrer(cliente, headers, ruta, limit, **filtros):
+    ids, cursor, paginas = [], None, 0
+    while True:
+        params = {**filtros, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = cliente.get(ruta, headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        cuerpo = r.json()
+        assert len(cuerpo["items"]) <= limit
+        ids += [t["id_tarea"] for t in cuerpo["items"]]
+        paginas += 1
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return ids, paginas
+
+
+@pytest.fixture
+def tareas(cliente, usuario):
+    """13 tareas con empates de fecha y hora y horas vacías (NULL)."""
+    _, headers = usuario
+    for i in range(13):
+        _crear(cliente, headers, DIA + timedelta(days=i % 3), hora=[None, "08:00", "08:00", "21:30"][i % 4],
+               prioridad=["alta", "baja"][i % 2])
+    return headers
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 13, 50])
+def test_cursores_igual_que_listado_completo(cliente, tareas, limit):
+    completo = [t["id_tarea"] for t in cliente.get("/tareas/?todas=true", headers=tareas).json()]
+    ids, paginas = _recorrer(cliente, tareas, "/tareas/", limit)
+    assert ids == completo and len(completo) == 13
+    assert paginas == max(1, -(-13 // limit))
+
+
+def test_filtrar_con_cursor(cliente, tareas):
+    completo = [t["id_tarea"] for t in cliente.get("/tareas/filtrar?prioridad=alta&todas=true", headers=tareas).json()]
+    ids, _ = _recorrer(cliente, tareas, "/tareas/filtrar", 2, prioridad="alta")
+    assert ids == completo and len(ids) == 7
+
+
+def test_altas_entre_paginas_no_repiten(cliente, tareas):
+    r = cliente.get("/tareas/", headers=tareas, params={"limit": 5}).json()
+    vistas = [t["id_tarea"] for t in r["items"]]
+    nueva_antes = _crear(cliente, tareas, DIA)                               # cae en la página ya leída
+    nueva_despues = _crear(cliente, tareas, DIA + timedelta(days=30))
+
+    cursor = r["next_cursor"]
+    while cursor:
+        r = cliente.get("/tareas/", headers=tareas, params={"limit": 5, "cursor": cursor}).json()
+        vistas += [t["id_tarea"] for t in r["items"]]
+        cursor = r["next_cursor"]
+    assert len(vistas) == len(set(vistas)) == 14
+    assert nueva_antes not in vistas and nueva_despues in vistas
+
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    codificar_cursor([1]),
+    codificar_cursor({"a": 1}),
+    # Bien formados pero con elementos que no son escalares ni fechas del propio cursor
+    codificar_cursor([{"a": 1}, 1, 2]),
+    codificar_cursor([[1], 1, 2]),
+    codificar_cursor([{"$d": 1}, 1, 2]),
+    codificar_cursor([{"$d": "2025-01-01", "x": 1}, 1, 2]),
+    codificar_cursor([{"$dt": "no-es-fecha"}, 1, 2]),
+])
+def test_cursor_invalido(cliente, usuario, cursor):
+    _, headers = usuario
+    r = cliente.get("/tareas/", headers=headers, params={"cursor": cursor})
+    assert r.status_code == 400
+
+
+def test_cursor_conserva_fechas():
+    valores = [date(2025, 1, 2), datetime(2025, 1, 2, 3, 4, 5, 6), None, "08:00", 7]
+    assert decodificar_cursor(codificar_cursor(valores), len(valores)) == valores
+
+
+def test_descendente_con_nulos_y_fechas_en_dos_formatos():
+    """Como los logros: fecha DESC con textos de CURRENT_TIMESTAMP (sin microsegundos) y de SQLAlchemy ('.ffffff')."""
+    engine = create_engine("sqlite://")
+    tabla = Table("t", MetaData(), Column("id", Integer, primary_key=True), Column("fecha", DateTime))
+    tabla.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(tabla), [{"id": i, "fecha": datetime(2025, 1, 1, 12, 0, 0, 500 * (i % 2))} for i in range(1, 7)])
+        conn.execute(text("INSERT INTO t (id, fecha) VALUES (7, '2025-01-01 12:00:01'), (8, '2025-01-01 11:59:59'), "
+                          "(9, NULL), (10, NULL)"))
+
+    orden = [(tabla.c.fecha, True), (tabla.c.id, True)]
+    with engine.connect() as conn:
+        class Consulta:
+            """Adaptador mínimo para `paginar` (espera la interfaz de db.query)."""
+            def __init__(self, sentencia):
+                self.sentencia = sentencia
+
+            def filter(self, *c):
+                return Consulta(self.sentencia.where(*c))
+
+            def order_by(self, *c):
+                return Consulta(self.sentencia.order_by(*c))
+
+            def limit(self, n):
+                return Consulta(self.sentencia.limit(n))
+
+            def all(self):
+                return conn.execute(self.sentencia).all()
+
+        esperado = [f.id for f in Consulta(select(tabla)).order_by(tabla.c.fecha.desc(), tabla.c.id.desc()).all()]
+        ids, cursor = [], None
+        while True:
+            filas, cursor = paginar(Consulta(select(tabla)), orden, 2, cursor)
+            ids += [f.id for f in filas]
+            if cursor is None:
+                break
+    assert ids == esperado and len(ids) == 10
@@ -0,0 +1,130 @@
+# tests/test_planes_consulta.py
+"""
+Migraciones sobre una base nueva y planes de las consultas de lectura.
+
+Las consultas no se copian aquí: se capturan las que ejecutan los endpoints
+(listado, cursor, filtros, estadísticas, sync) y se pasa cada SELECT por
+EXPLAIN QUERY PLAN. Ninguna puede recorrer una tabla completa.
+"""
+import re
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.database.database import DB_PATH, SQL_FILE, engine, async_engine
+from app.database.migraciones import MIGRACIONES, aplicar_migraciones
+
+# "SCAN Tareas" (aunque sea "USING COVERING INDEX") recorre la tabla o el
+# índice completo; "SCAN (subquery-1)" solo lee el resultado de una subconsulta
+_RECORRIDO = re.compile(r"^SCAN (?!\()")
+_BUSQUEDA = re.compile(r"^SEARCH (\S+) USING (COVERING INDEX|INDEX|PRIMARY KEY|INTEGER PRIMARY KEY)")
+
+
+def _base_nueva(ruta):
+    conn = sqlite3.connect(str(ruta))
+    with open(SQL_FILE, encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.close()
+
+
+def test_migraciones_en_base_nueva(tmp_path):
+    ruta = tmp_path / "nueva.db"
+    _base_nueva(ruta)
+
+    assert aplicar_migraciones(ruta) == MIGRACIONES[-1][0]
+    # Segunda pasada: nada pendiente, misma versión
+    assert aplicar_migraciones(ruta) == MIGRACIONES[-1][0]
+
+    conn = sqlite3.connect(str(ruta))
+    indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    for esperado in ("ix_tareas_usuario_fecha_hora", "ix_tareas_usuario_estado_fecha",
+                     "ix_tareas_usuario_categoria_fecha", "ix_tareas_usuario_seq",
+                     "ix_estadisticas_usuario_periodo", "ix_sync_eliminados_usuario_seq"):
+        assert esperado in indices
+
+
+@pytest.fixture
+def capturar_sql():
+    """Lista que se llena con (sentencia, parámetros) de ambos motores mientras dura la prueba."""
+    capturadas = []
+
+    def registrar(conn, cursor, sentencia, parametros, contexto, varias):
+        capturadas.append((sentencia, parametros))
+
+    motores = (engine, async_engine.sync_engine)
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", registrar)
+    yield capturadas
+    for motor in motores:
+        event.remove(motor, "before_cursor_execute", registrar)
+
+
+def _planes(capturadas):
+    """sentencia → líneas del plan, solo de las lecturas."""
+    conn = sqlite3.connect(str(DB_PATH))
+    try:
+        planes = {}
+        for sentencia, parametros in capturadas:
+            if sentencia.lstrip().upper().startswith(("SELECT", "WITH")):
+                filas = conn.execute(f"EXPLAIN QUERY PLAN {sentencia}", parametros).fetchall()
+                planes[sentencia] = [fila[3] for fila in filas]
+        return planes
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def con_datos(cliente, usuario):
+    id_usuario, headers = usuario
+    manana = date.today() + timedelta(days=1)
+    for i in range(5):
+        r = cliente.post("/tareas/", headers=headers, json={
+            "titulo": f"Tarea {i}", "fecha": (manana + timedelta(days=i)).isoformat(), "id_categoria": 1,
+        })
+        assert r.status_code == 201
+    cliente.delete(f"/tareas/{r.json()['id_tarea']}", headers=headers)   # deja una lápida para sync
+    return headers
+
+
+@pytest.mark.parametrize("url, tablas", [
+    ("/tareas/?limit=2", {"Tareas"}),
+    ("/tareas/?categoria=1&limit=2", {"Tareas"}),
+    ("/tareas/filtrar?estado=pendiente", {"Tareas"}),
+    ("/tareas/filtrar?prioridad=media&categoria=1", {"Tareas"}),
+    ("/tareas/filtrar?desde=2000-01-01&hasta=2100-12-31", {"Tareas"}),
+    ("/estadisticas/", {"Estadisticas"}),
+    ("/estadisticas/grafico", {"Estadisticas"}),
+    ("/sync?since=0", {"Tareas", "Sync_eliminados", "Metas", "logros"}),
+    ("/metas/", {"Metas"}),
+    ("/logros/", {"logros"}),
+])
+def test_lecturas_usan_indices(cliente, con_datos, capturar_sql, url, tablas):
+    r = cliente.get(url, headers=con_datos)
+    assert r.status_code == 200
+    planes = _planes(capturar_sql)
+    assert planes
+
+    buscadas = set()
+    for sentencia, lineas in planes.items():
+        for linea in lineas:
+            assert not _RECORRIDO.match(linea), f"{url}: recorrido completo ({linea}) en\n{sentencia}"
+            encontrada = _BUSQUEDA.match(linea)
+            if encontrada:
+                buscadas.add(encontrada.group(1))
+    assert tablas <= buscadas
+
+
+def test_segunda_pagina_usa_indice(cliente, con_datos, capturar_sql):
+    r = cliente.get("/tareas/?limit=2", headers=con_datos)
+    cursor = r.json()["next_cursor"]
+    assert cursor
+    capturar_sql.clear()
+
+    r = cliente.get("/tareas/", params={"limit": 2, "cursor": cursor}, headers=con_datos)
+    assert r.status_code == 200
+    lineas = [linea for plan in _planes(capturar_sql).values() for linea in plan]
+    assert any(re.match(r"SEARCH Tareas USING (COVERING )?INDEX ix_tareas_usuario_fecha_hora", l) for l in lineas)
+    assert not any(_RECORRIDO.match(l) for l in lineas)
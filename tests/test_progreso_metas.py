@@ -0,0 +1,199 @@
+# tests/test_progreso_metas.py
+"""
+Progreso automático de metas: cada cambio de una tarea completada resta en
+la clave vieja y suma en la nueva, igual que los rollups de estadísticas.
+Las metas son diarias para que la ventana sea siempre la de hoy.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.routes import progreso_metas
+from app.routes.eventos import META_CUMPLIDA, META_REABIERTA
+from app.routes.progreso_metas import renovar_ventanas, ventana
+
+HOY = date.today().isoformat()
+MANANA = (date.today() + timedelta(days=1)).isoformat()
+PASADO = (date.today() + timedelta(days=2)).isoformat()
+
+
+@pytest.fixture
+def api(cliente, usuario, procesar_eventos):
+    """Atajos sobre la API con el usuario del test; cada llamada entrega los eventos pendientes."""
+    _, headers = usuario
+
+    class Api:
+        def meta(self, objetivo=2, frecuencia="diaria", **filtros):
+            r = cliente.post("/metas/", headers=headers, json={
+                "descripcion": "Meta automática", "frecuencia": frecuencia, "objetivo": objetivo,
+                "automatica": True, **filtros,
+            })
+            assert r.status_code == 201, r.text
+            return r.json()["id_meta"]
+
+        def progreso(self, id_meta):
+            procesar_eventos()
+            meta = cliente.get(f"/metas/{id_meta}", headers=headers).json()
+            return meta["progreso"], meta["completada"]
+
+        def ventana(self, id_meta):
+            meta = cliente.get(f"/metas/{id_meta}", headers=headers).json()
+            return meta["fecha_inicio"][:10], meta["fin_ventana"]
+
+        def tarea_completada(self, **campos):
+            datos = {"titulo": "Tarea de prueba", "fecha": HOY, "id_categoria": 1, **campos}
+            r = cliente.post("/tareas/", headers=headers, json=datos)
+            assert r.status_code == 201, r.text
+            id_tarea = r.json()["id_tarea"]
+            self.editar(id_tarea, estado="completada")
+            return id_tarea
+
+        def editar(self, id_tarea, **campos):
+            r = cliente.put(f"/tareas/{id_tarea}", headers=headers, json=campos)
+            assert r.status_code == 200, r.text
+
+        def eliminar(self, id_tarea):
+            assert cliente.delete(f"/tareas/{id_tarea}", headers=headers).status_code == 200
+
+        def eliminar_lote(self, ids):
+            r = cliente.request("DELETE", "/tareas/batch", headers=headers, json={"ids": ids})
+            assert r.status_code == 200 and r.json()["fallidas"] == 0, r.text
+
+        def importar(self, csv: str):
+            r = cliente.post("/tareas/import", headers=headers,
+                             files={"archivo": ("tareas.csv", csv.encode(), "text/csv")})
+            assert r.status_code == 201, r.text
+            return r.json()
+
+    return Api()
+
+
+def test_completar_y_reabrir(api):
+    id_meta = api.meta(objetivo=2)
+    id_tarea = api.tarea_completada()
+    api.tarea_completada()
+    assert api.progreso(id_meta) == (2, True)
+
+    api.editar(id_tarea, estado="pendiente")
+    assert api.progreso(id_meta) == (1, False)
+
+
+def test_cambiar_fecha_de_completada(api):
+    id_meta = api.meta(objetivo=1)
+    id_tarea = api.tarea_completada()
+    assert api.progreso(id_meta) == (1, True)
+
+    api.editar(id_tarea, fecha=MANANA)   # sale de la ventana de hoy
+    assert api.progreso(id_meta) == (0, False)
+
+    api.editar(id_tarea, fecha=HOY)
+    assert api.progreso(id_meta) == (1, True)
+
+
+def test_cambiar_categoria_y_prioridad_de_completada(api):
+    general = api.meta()
+    por_categoria = api.meta(id_categoria=1)
+    por_prioridad = api.meta(prioridad="alta")
+    id_tarea = api.tarea_completada(prioridad="alta")
+    assert [api.progreso(m)[0] for m in (general, por_categoria, por_prioridad)] == [1, 1, 1]
+
+    api.editar(id_tarea, id_categoria=2)
+    assert [api.progreso(m)[0] for m in (general, por_categoria, por_prioridad)] == [1, 0, 1]
+
+    api.editar(id_tarea, prioridad="baja")
+    assert [api.progreso(m)[0] for m in (general, por_categoria, por_prioridad)] == [1, 0, 0]
+
+
+def test_mover_dentro_de_la_meta_no_la_reabre(api, monkeypatch):
+    id_meta = api.meta(objetivo=1)
+    id_tarea = api.tarea_completada(prioridad="alta")
+    assert api.progreso(id_meta) == (1, True)
+
+    emitidos = []
+    emitir = progreso_metas.bus.emitir
+    monkeypatch.setattr(progreso_metas.bus, "emitir", lambda tipo, *a, **k: (emitidos.append(tipo), emitir(tipo, *a, **k)))
+    api.editar(id_tarea, prioridad="baja")   # sigue contando para la misma meta
+    assert api.progreso(id_meta) == (1, True)
+    assert META_CUMPLIDA not in emitidos and META_REABIERTA not in emitidos
+
+
+def test_eliminar_completada(api):
+    id_meta = api.meta(objetivo=3)
+    ids = [api.tarea_completada() for _ in range(3)]
+    assert api.progreso(id_meta) == (3, True)
+
+    api.eliminar(ids[0])
+    assert api.progreso(id_meta) == (2, False)
+
+    api.eliminar_lote(ids[1:])
+    assert api.progreso(id_meta) == (0, False)
+
+
+def test_eliminar_pendiente_no_resta(api):
+    id_meta = api.meta(objetivo=2)
+    api.tarea_completada()
+    id_tarea = api.tarea_completada()
+    api.editar(id_tarea, estado="pendiente")
+    assert api.progreso(id_meta) == (1, False)
+
+    api.eliminar(id_tarea)
+    assert api.progreso(id_meta) == (1, False)
+
+
+def test_importar_completadas(api):
+    general = api.meta(objetivo=3)
+    por_prioridad = api.meta(prioridad="alta")
+    resultado = api.importar(
+        "titulo,fecha,id_categoria,prioridad,estado\n"
+        f"Importada uno,{HOY},1,alta,completada\n"
+        f"Importada dos,{HOY},2,media,completada\n"
+        f"Importada tres,{HOY},1,alta,pendiente\n"
+        f"Importada cuatro,{MANANA},1,alta,completada\n"
+    )
+    assert resultado["importadas"] == 4
+    assert api.progreso(general) == (2, False)
+    assert api.progreso(por_prioridad) == (1, False)
+
+
+# === Renovación de ventanas ===
+def test_renovar_reinicia_el_progreso(api):
+    id_meta = api.meta(objetivo=1)
+    api.tarea_completada()
+    assert api.progreso(id_meta) == (1, True)
+
+    renovar_ventanas(hoy=date.today() + timedelta(days=1))
+    assert api.ventana(id_meta) == (MANANA, PASADO)
+    assert api.progreso(id_meta) == (0, False)
+
+
+def test_renovar_cuenta_las_adelantadas_y_emite_cumplida(api, monkeypatch):
+    id_meta = api.meta(objetivo=2)
+    api.tarea_completada(fecha=MANANA)
+    api.tarea_completada(fecha=MANANA, id_categoria=2)
+    assert api.progreso(id_meta) == (0, False)
+
+    emitidos = []
+    monkeypatch.setattr(progreso_metas.bus, "emitir", lambda tipo, id_usuario, **datos: emitidos.append((tipo, datos)))
+    renovar_ventanas(hoy=date.today() + timedelta(days=1), lote=1)   # un commit por meta
+    assert (META_CUMPLIDA, {"id_meta": id_meta, "fecha_inicio": MANANA, "descripcion": "Meta automática"}) in emitidos
+    monkeypatch.undo()
+    assert api.progreso(id_meta) == (2, True)
+
+    # Las tareas de la ventana renovada siguen sumando
+    api.tarea_completada(fecha=MANANA)
+    assert api.progreso(id_meta) == (3, True)
+
+
+def test_renovar_no_toca_la_ventana_vigente(api):
+    id_meta = api.meta(objetivo=5, frecuencia="mensual")
+    inicio, fin = ventana("mensual", date.today())
+    api.tarea_completada()
+    assert api.ventana(id_meta) == (inicio.isoformat(), fin.isoformat())
+
+    renovar_ventanas(hoy=fin - timedelta(days=1))   # último día: sigue vigente
+    assert api.ventana(id_meta) == (inicio.isoformat(), fin.isoformat())
+    assert api.progreso(id_meta) == (1, False)
+
+    renovar_ventanas(hoy=fin)
+    assert api.ventana(id_meta)[0] == fin.isoformat()
+    assert api.progreso(id_meta) == (0, False)
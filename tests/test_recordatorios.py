@@ -0,0 +1,62 @@
+# tests/test_recordatorios.py
+"""Seguimiento de cambios del programador de recordatorios (seq de Tareas + lápidas)."""
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.routes import recordatorios
+from app.routes.recordatorios import ProgramadorRecordatorios
+
+
+def _seq_actual() -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(text('SELECT seq FROM "Sync_secuencia" WHERE id = 1')).scalar()
+    finally:
+        db.close()
+
+
+def _crear(cliente, headers, n):
+    fecha = (date.today() + timedelta(days=2)).isoformat()
+    ids = []
+    for i in range(n):
+        r = cliente.post("/tareas/", headers=headers, json={
+            "titulo": f"Con aviso {i}", "fecha": fecha, "hora": "10:00", "id_categoria": 1, "recordatorio_minutos": 15,
+        })
+        assert r.status_code == 201, r.text
+        ids.append(r.json()["id_tarea"])
+    return ids
+
+
+def test_leer_cambios_altas_y_bajas_hasta_el_tope(cliente, usuario):
+    _, headers = usuario
+    desde = _seq_actual()
+    ids = _crear(cliente, headers, 3)
+    cliente.delete(f"/tareas/{ids[0]}", headers=headers)
+
+    ultimo, filas, borradas = ProgramadorRecordatorios()._leer_cambios(desde)
+    assert ultimo == _seq_actual()
+    assert {f.id_tarea for f in filas} == set(ids[1:])
+    assert borradas == [ids[0]]
+
+    # Nada nuevo: misma posición, sin cambios
+    assert ProgramadorRecordatorios()._leer_cambios(ultimo) == (ultimo, [], [])
+
+
+def test_leer_cambios_por_lotes_no_salta_lapidas(cliente, usuario, monkeypatch):
+    monkeypatch.setattr(recordatorios, "LOTE_CAMBIOS", 2)
+    _, headers = usuario
+    desde = _seq_actual()
+    ids = _crear(cliente, headers, 3)
+    cliente.delete(f"/tareas/{ids[2]}", headers=headers)   # lápida por encima del primer lote
+
+    programador = ProgramadorRecordatorios()
+    ultimo, filas, borradas = programador._leer_cambios(desde)
+    assert [f.id_tarea for f in filas] == ids[:2]
+    assert borradas == []
+    assert ultimo == filas[-1].seq
+
+    ultimo, filas, borradas = programador._leer_cambios(ultimo)
+    assert filas == [] and borradas == [ids[2]]
+    assert ultimo == _seq_actual()
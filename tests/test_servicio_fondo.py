@@ -0,0 +1,78 @@
+# tests/test_servicio_fondo.py
+"""Ciclo de vida común de los servicios de fondo (servicio_fondo.py)."""
+import asyncio
+
+from app.routes.servicio_fondo import ServicioFondo
+
+
+class Contador(ServicioFondo):
+    """Cuenta ciclos; falla en los ciclos indicados en `fallar`."""
+
+    def __init__(self, fallar=()):
+        super().__init__(ciclos=0)
+        self.fallar = set(fallar)
+        self.detenido = False
+
+    async def _ciclo(self):
+        self._contadores["ciclos"] += 1
+        if self._contadores["ciclos"] in self.fallar:
+            raise RuntimeError("falla de prueba")
+
+    async def _al_detener(self):
+        self.detenido = True
+
+
+async def _esperar(condicion):
+    for _ in range(100):
+        if condicion():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("la condición no se cumplió")
+
+
+def test_avisar_y_errores_no_matan_la_tarea():
+    async def escenario():
+        servicio = Contador(fallar={2})
+        servicio.iniciar()
+        servicio.iniciar()   # idempotente
+        await _esperar(lambda: servicio.estadisticas()["ciclos"] == 1)
+
+        servicio.avisar()   # ciclo 2 falla...
+        await _esperar(lambda: servicio.estadisticas()["errores"] == 1)
+        servicio.avisar()   # ...y la tarea sigue viva
+        await _esperar(lambda: servicio.estadisticas()["ciclos"] == 3)
+
+        await servicio.detener()
+        assert servicio.detenido and servicio._tarea is None
+        servicio.avisar()   # detenido: no hace nada
+        return servicio.estadisticas()
+
+    assert asyncio.run(escenario()) == {"ciclos": 3, "errores": 1}
+
+
+def test_espera_vence_sin_aviso():
+    class Periodico(Contador):
+        def _espera(self):
+            return 0.01
+
+    async def escenario():
+        servicio = Periodico()
+        servicio.iniciar()
+        await _esperar(lambda: servicio.estadisticas()["ciclos"] >= 3)
+        await servicio.detener()
+
+    asyncio.run(escenario())
+
+
+def test_drenar_al_detener_corre_un_ultimo_ciclo():
+    class Drenable(Contador):
+        DRENAR_AL_DETENER = True
+
+    async def escenario():
+        servicio = Drenable()
+        servicio.iniciar()
+        await _esperar(lambda: servicio.estadisticas()["ciclos"] == 1)
+        await servicio.detener()
+        return servicio.estadisticas()["ciclos"]
+
+    assert asyncio.run(escenario()) == 2
@@ -0,0 +1,127 @@
+# tests/test_sync.py
+"""Feed de cambios /sync: altas, modificaciones y lápidas en orden de seq, paginado y con purga."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.database.database import SessionLocal
+from app.database.sync_cambios import purgar_eliminados
+from app.routes.auth_utils import create_access_token
+from app.routes.paginacion import codificar_cursor
+
+FECHA = (date.today() + timedelta(days=5)).isoformat()
+
+
+def _sync(cliente, headers, since, **params):
+    r = cliente.get("/sync", headers=headers, params={"since": since, **params})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _crear(cliente, headers, titulo="Sincronizada") -> int:
+    r = cliente.post("/tareas/", headers=headers, json={"titulo": titulo, "fecha": FECHA, "id_categoria": 1})
+    assert r.status_code == 201, r.text
+    return r.json()["id_tarea"]
+
+
+def _todo(cliente, headers, since, limit):
+    """Recorre todas las páginas; retorna (cuerpos, seq final)."""
+    paginas, cursor = [], None
+    while True:
+        cuerpo = _sync(cliente, headers, since, limit=limit, **({"cursor": cursor} if cursor else {}))
+        paginas.append(cuerpo)
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return paginas, cuerpo["seq"]
+
+
+def test_altas_cambios_y_lapidas(cliente, usuario):
+    _, headers = usuario
+    editada, borrada = _crear(cliente, headers), _crear(cliente, headers)
+    inicio = _sync(cliente, headers, 0)
+    assert {t["id_tarea"] for t in inicio["tareas"]} == {editada, borrada}
+    desde = inicio["seq"]
+    assert _sync(cliente, headers, desde)["tareas"] == []
+
+    cliente.put(f"/tareas/{editada}", headers=headers, json={"titulo": "Editada"})
+    cliente.delete(f"/tareas/{borrada}", headers=headers)
+    efimera = _crear(cliente, headers)
+    cliente.delete(f"/tareas/{efimera}", headers=headers)   # creada y borrada: solo su lápida
+
+    cambios = _sync(cliente, headers, desde)
+    assert [(t["id_tarea"], t["titulo"]) for t in cambios["tareas"]] == [(editada, "Editada")]
+    assert cambios["tareas"][0]["seq"] > desde
+    assert [(e["coleccion"], e["id"]) for e in cambios["eliminados"]] == [("tareas", borrada), ("tareas", efimera)]
+    assert cambios["seq"] >= max(e["seq"] for e in cambios["eliminados"])
+    assert _sync(cliente, headers, cambios["seq"])["eliminados"] == []
+
+
+def test_otras_colecciones_y_otros_usuarios(cliente, usuario):
+    _, headers = usuario
+    desde = _sync(cliente, headers, 0)["seq"]
+    cliente.post("/modos/activar", headers=headers, json={"id_modo": 2})
+    r = cliente.post("/metas/", headers=headers, json={"descripcion": "Meta sincronizada", "frecuencia": "semanal", "objetivo": 2})
+    id_meta = r.json()["id_meta"]
+
+    cambios = _sync(cliente, headers, desde)
+    assert [m["id_modo"] for m in cambios["modos"]] == [2]
+    assert [m["id_meta"] for m in cambios["metas"]] == [id_meta]
+
+    cliente.delete("/modos/desactivar/2", headers=headers)
+    cliente.delete(f"/metas/{id_meta}", headers=headers)
+    _crear(cliente, {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"})   # el admin
+    cambios = _sync(cliente, headers, cambios["seq"])
+    assert sorted((e["coleccion"], e["id"]) for e in cambios["eliminados"]) == [("metas", id_meta), ("modos", 2)]
+    assert cambios["tareas"] == [] and cambios["metas"] == [] and cambios["modos"] == []
+
+
+def test_paginas_igual_que_una_sola(cliente, usuario):
+    _, headers = usuario
+    ids = [_crear(cliente, headers, f"Lote {i}") for i in range(5)]
+    cliente.delete(f"/tareas/{ids[1]}", headers=headers)
+    cliente.put(f"/tareas/{ids[0]}", headers=headers, json={"titulo": "Lote 0 editada"})
+    cliente.post("/modos/activar", headers=headers, json={"id_modo": 1})
+
+    unica = _sync(cliente, headers, 0)
+    paginas, seq = _todo(cliente, headers, 0, limit=2)
+    assert len(paginas) > 2 and seq == unica["seq"]
+    for coleccion in ("tareas", "modos", "eliminados"):
+        juntas = [x for p in paginas for x in p[coleccion]]
+        assert juntas == unica[coleccion], coleccion
+    # Mientras hay más páginas, seq es el de la última fila entregada: seguro para reanudar
+    for p in paginas[:-1]:
+        assert p["seq"] == max(x["seq"] for c in ("tareas", "metas", "logros", "modos", "eliminados") for x in p[c])
+
+
+@pytest.mark.parametrize("cursor", [
+    ["x", 1, 2],                  # seq no entero
+    [1, "inexistente", 2],        # colección desconocida
+    [1, "tareas", "2"],           # id no entero
+    [1.5, "tareas", 2],
+    [True, "tareas", 2],
+    [1, ["tareas"], 2],
+])
+def test_cursor_con_forma_invalida(cliente, usuario, cursor):
+    _, headers = usuario
+    r = cliente.get("/sync", headers=headers, params={"since": 0, "cursor": codificar_cursor(cursor)})
+    assert r.status_code == 400
+
+
+def test_since_purgado_responde_410(cliente, usuario):
+    _, headers = usuario
+    desde = _sync(cliente, headers, 0)["seq"]
+    cliente.delete(f"/tareas/{_crear(cliente, headers)}", headers=headers)
+    despues = _sync(cliente, headers, desde)["seq"]
+
+    db = SessionLocal()
+    try:
+        db.execute(text('UPDATE "Sync_eliminados" SET fecha = datetime(\'now\', \'-2 days\')'))
+        assert purgar_eliminados(db, dias=1) >= 1
+    finally:
+        db.close()
+
+    r = cliente.get("/sync", headers=headers, params={"since": desde})
+    assert r.status_code == 410
+    assert _sync(cliente, headers, 0)["eliminados"] == []        # desde cero siempre se puede
+    assert _sync(cliente, headers, despues)["eliminados"] == []  # posterior a lo purgado